@@ -2,13 +2,23 @@ from flask import Flask, send_from_directory
 from flasgger import Swagger
 from app.extensions import db, login_manager, migrate, csrf, bcrypt, jwt, cors
 from app.routes import all_blueprints
-from app.models import User
 from app.routes.public import public_bp
 from app.extensions import mail
 from .context_processors import inject_counts
 from app.routes.blog import blog_bp
-from .routes.api import api_bp
+from .routes.api import api_bp, api_error
 from app.extensions import limiter
+from app.financial_rollups import rebuild_rollups_command
+from app.image_variants import generate_variants_command
+from app.search import rebuild_search_index_command
+from app.posts import rebuild_blog_command
+from app.json_provider import json_provider_class
+from app.compression import init_compression
+from app.query_stats import init_query_stats
+from app.metrics import init_metrics
+from app.profiling import init_profiling
+from app.principals import get_principal, load_session_user
+from app.auth_tokens import is_token_revoked
 import os
 import locale
 
@@ -28,6 +38,8 @@ def create_app():
             app.logger.warning("Turkish locale could not be set. Date/time formats may appear in English.")
 
     app.config.from_object("config.Config")
+    # JSON cevapları: orjson kuruluysa orjson, değilse standart json (bkz. app/json_provider.py)
+    app.json = json_provider_class(app.config.get("JSON_PROVIDER", "auto"))(app)
     app.jinja_env.add_extension('jinja2.ext.do')
     
     Swagger(app)
@@ -42,6 +54,14 @@ def create_app():
     limiter.init_app(app)
     bcrypt.init_app(app)
     mail.init_app(app)
+    # API ve HTML cevaplarının gzip/brotli sıkıştırması (bkz. app/compression.py)
+    init_compression(app)
+    # İstek başına sorgu sayısı/süresi (Server-Timing) ve yavaş sorgu günlüğü (bkz. app/query_stats.py)
+    init_query_stats(app)
+    # Prometheus metrikleri ve /metrics (bkz. app/metrics.py)
+    init_metrics(app)
+    # Yöneticiler için istek profili ve örnekleyici (bkz. app/profiling.py)
+    init_profiling(app)
 
 
     cors.init_app(
@@ -81,15 +101,41 @@ def create_app():
     # Blueprint kaydedildikten SONRA onu CSRF korumasından muaf tutuyoruz.
     csrf.exempt(api_bp)
 
+    # Web oturumu: kullanıcı, yetki özeti önbelleğinden çözülür; sadece aktif kullanıcılar
     @login_manager.user_loader
     def load_user(user_id):
-        user = User.query.get(int(user_id))
-        if user and user.is_active:
-            return user
-        return None
+        return load_session_user(user_id)
+
+    # API: JWT'deki kullanıcı, yetki özeti önbelleğinden çözülür (bkz. app/principals.py)
+    @jwt.user_lookup_loader
+    def load_jwt_principal(_jwt_header, jwt_data):
+        return get_principal(jwt_data["sub"])
+
+    @jwt.user_lookup_error_loader
+    def jwt_principal_not_found(_jwt_header, _jwt_data):
+        return api_error("Kullanıcı bulunamadı", 404)
+
+    # İptal edilmiş token'lar (çıkış, hesap silme, refresh rotasyonu) veritabanından denetlenir (bkz. app/auth_tokens.py)
+    @jwt.token_in_blocklist_loader
+    def check_token_revoked(_jwt_header, jwt_data):
+        return is_token_revoked(jwt_data)
+
+    @jwt.revoked_token_loader
+    def jwt_token_revoked(_jwt_header, _jwt_data):
+        return api_error("Oturumunuz sonlandırılmış. Lütfen tekrar giriş yapın.", 401)
+
+    @jwt.expired_token_loader
+    def jwt_token_expired(_jwt_header, _jwt_data):
+        return api_error("Oturum süresi doldu.", 401)
 
     app.context_processor(inject_counts)
 
+    # Yönetim komutları (flask <komut>)
+    app.cli.add_command(rebuild_rollups_command)
+    app.cli.add_command(generate_variants_command)
+    app.cli.add_command(rebuild_search_index_command)
+    app.cli.add_command(rebuild_blog_command)
+
     for bp in all_blueprints:
         app.register_blueprint(bp)
 
@@ -0,0 +1,133 @@
+# app/auth_tokens.py
+"""
+Mobil uygulama için kısa ömürlü erişim (access) ve dönen (rotating) yenileme
+(refresh) token'ları ile token iptal listesi (denylist).
+
+  - Erişim token'ı JWT_ACCESS_TOKEN_EXPIRES kadar (varsayılan 15 dk) geçerlidir;
+    süresi dolunca uygulama /token/refresh ile yeni bir çift alır.
+  - Her yenilemede eski refresh token iptal edilir; aynı refresh token ikinci
+    kez kullanılamaz.
+  - İptal kayıtları veritabanında tutulur; böylece hangi işçi süreç/instance iptal
+    ederse etsin tüm işçiler aynı kararı verir. Tek tek iptal edilen token'lar
+    (çıkış, refresh rotasyonu) RevokedToken tablosuna yazılır; kayıt token'ın
+    süresi dolunca cron görevi ile silinir.
+  - Bir kullanıcının tüm cihazlardaki oturumlarını kapatmak için User.tokens_valid_after
+    alanına, o ana kadar üretilmiş token'ları geçersiz sayan bir zaman damgası
+    (milisaniye) yazılır. JWT'nin standart `iat` alanı saniye hassasiyetinde
+    olduğundan token'lara milisaniyelik `iat_ms` alanı eklenir; aynı saniye içinde
+    yeniden giriş yapan cihazın yeni token'ı iptal edilmiş sayılmaz.
+  - Her istekteki kontrol tek sorgudur (kullanıcı satırı + jti için EXISTS); okunan
+    principal_version, yetki özetinin doğrulanmasında tekrar kullanılır
+    (bkz. app/principals.py).
+  - Süresi (`exp`) olmayan token'lar (kısa ömürlü token'lara geçmeden önce
+    üretilmiş olanlar) kabul edilmez; bu cihazlar yeniden giriş yapar.
+
+İptal fonksiyonları kendi değişikliklerini hemen commit eder; iptal, yanıt
+dönmeden önce kalıcı olur.
+"""
+
+import time
+from datetime import datetime, timedelta
+
+from flask import current_app
+from flask_jwt_extended import create_access_token, create_refresh_token, decode_token
+from sqlalchemy import delete, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.extensions import db
+from app.models import RevokedToken, User
+from app.principals import remember_principal_version
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _remaining_lifetime(jwt_payload):
+    """Token'ın bitişine kalan saniye; süresiz token'lar için refresh ömrü kullanılır."""
+    exp = jwt_payload.get('exp')
+    if exp is None:
+        return int(current_app.config['JWT_REFRESH_TOKEN_EXPIRES'].total_seconds())
+    return max(int(exp - time.time()), 1)
+
+
+def issue_tokens(user_id):
+    """Kullanıcı için yeni bir erişim/yenileme token çifti üretir."""
+    identity = str(user_id)
+    access_expires = current_app.config['JWT_ACCESS_TOKEN_EXPIRES']
+    claims = {"iat_ms": _now_ms()}
+    return {
+        "access_token": create_access_token(identity=identity, additional_claims=claims),
+        "refresh_token": create_refresh_token(identity=identity, additional_claims=claims),
+        "expires_in": int(access_expires.total_seconds()) if access_expires else None,
+    }
+
+
+def revoke_token(jwt_payload):
+    """
+    Tek bir token'ı iptal eder. Token daha önce iptal edilmişse False döner;
+    refresh rotasyonunda aynı token'ın iki kez kullanılmasını engellemek için kullanılır
+    (eş zamanlı iki istekten sadece birinin INSERT'ü başarılı olur).
+    """
+    expires_at = datetime.utcnow() + timedelta(seconds=_remaining_lifetime(jwt_payload))
+    try:
+        with db.session.begin_nested():
+            db.session.add(RevokedToken(jti=jwt_payload['jti'], expires_at=expires_at))
+    except IntegrityError:
+        return False
+    db.session.commit()
+    return True
+
+
+def revoke_encoded_token(encoded_token, user_id):
+    """İstemcinin gönderdiği (ör. çıkışta refresh) token'ı, kullanıcıya aitse iptal eder."""
+    try:
+        jwt_payload = decode_token(encoded_token, allow_expired=True)
+    except Exception:
+        return False
+    if jwt_payload.get('sub') != str(user_id):
+        return False
+    revoke_token(jwt_payload)
+    return True
+
+
+def revoke_all_user_tokens(user_id):
+    """Kullanıcının şu ana kadar üretilmiş tüm token'larını (tüm cihazlar) iptal eder."""
+    db.session.execute(update(User).where(User.id == user_id).values(tokens_valid_after=_now_ms()))
+    db.session.commit()
+
+
+def is_token_revoked(jwt_payload):
+    """JWT token_in_blocklist_loader: token tek başına veya kullanıcı bazında iptal edilmiş mi?"""
+    if jwt_payload.get('exp') is None:
+        return True
+    try:
+        user_id = int(jwt_payload['sub'])
+    except (KeyError, TypeError, ValueError):
+        return True
+
+    jti_revoked = select(RevokedToken.jti).where(RevokedToken.jti == jwt_payload['jti']).exists()
+    row = db.session.execute(
+        select(User.principal_version, User.tokens_valid_after, jti_revoked).where(User.id == user_id)
+    ).one_or_none()
+    if row is None:
+        # Kullanıcı silinmiş; yetki özeti de bulunamaz ve istek reddedilir
+        remember_principal_version(user_id, None)
+        return False
+    principal_version, tokens_valid_after, revoked = row
+    remember_principal_version(user_id, principal_version)
+
+    if revoked:
+        return True
+    if tokens_valid_after is None:
+        return False
+    # iat_ms olmayan token'lar için saniyelik iat kullanılır (aynı saniyede üretilmişse iptal sayılır)
+    issued_at = jwt_payload.get('iat_ms', jwt_payload.get('iat', 0) * 1000)
+    return issued_at < tokens_valid_after
+
+
+def purge_expired_revocations():
+    """Süresi dolmuş token'ların iptal kayıtlarını siler; silinen kayıt sayısını döndürür."""
+    result = db.session.execute(delete(RevokedToken).where(RevokedToken.expires_at < datetime.utcnow()))
+    db.session.commit()
+    return result.rowcount
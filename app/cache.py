@@ -0,0 +1,90 @@
+# app/cache.py
+"""
+Süreçler arası paylaşılabilen basit anahtar/değer önbelleği.
+
+CACHE_REDIS_URL ayarlıysa Redis kullanılır; böylece tüm gunicorn işçileri
+aynı değerleri (ör. HMS erişim token'ı) görür. Ayarlı değilse her süreç kendi
+bellek içi önbelleğini kullanır. Değerler JSON'a çevrilebilir olmalıdır.
+"""
+
+import json
+import threading
+import time
+
+from flask import current_app
+
+_init_lock = threading.Lock()
+
+
+class MemoryCache:
+    """Süreç içi, thread-safe, süreli (TTL) önbellek."""
+
+    def __init__(self):
+        self._data = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.monotonic() + ttl if ttl else None
+        with self._lock:
+            self._data[key] = (value, expires_at)
+
+    def add(self, key, value, ttl=None):
+        """Anahtar yoksa yazar ve True döner (basit kilit olarak kullanılabilir)."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and (item[1] is None or item[1] > time.monotonic()):
+                return False
+            self._data[key] = (value, time.monotonic() + ttl if ttl else None)
+            return True
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class RedisCache:
+    """Redis üzerinde, tüm süreçlerin paylaştığı önbellek ('redis' paketi gerekir)."""
+
+    def __init__(self, url, prefix='ays:'):
+        import redis  # opsiyonel bağımlılık: sadece CACHE_REDIS_URL ayarlıysa gerekir
+
+        self._client = redis.Redis.from_url(url)
+        self._prefix = prefix
+
+    def get(self, key):
+        raw = self._client.get(self._prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    def set(self, key, value, ttl=None):
+        self._client.set(self._prefix + key, json.dumps(value), ex=int(ttl) if ttl else None)
+
+    def add(self, key, value, ttl=None):
+        return bool(self._client.set(self._prefix + key, json.dumps(value), ex=int(ttl) if ttl else None, nx=True))
+
+    def delete(self, key):
+        self._client.delete(self._prefix + key)
+
+
+def get_cache():
+    """Uygulamanın önbellek arka ucunu döndürür (uygulama başına bir kez oluşturulur)."""
+    app = current_app._get_current_object()
+    cache = app.extensions.get('ays_cache')
+    if cache is None:
+        with _init_lock:
+            cache = app.extensions.get('ays_cache')
+            if cache is None:
+                redis_url = app.config.get('CACHE_REDIS_URL')
+                cache = RedisCache(redis_url) if redis_url else MemoryCache()
+                app.extensions['ays_cache'] = cache
+    return cache
@@ -0,0 +1,172 @@
+# app/compression.py
+"""
+Cevap sıkıştırma (gzip, brotli).
+
+Mobil uygulamanın JSON cevapları ve yönetici HTML sayfaları (talep listesi,
+kasa defteri, aidat tablosu) hücresel ağda tam boyutuyla iniyordu. Her cevap
+son aşamada (after_request) burada sıkıştırılır:
+
+  - Kodlama Accept-Encoding'e göre seçilir; 'brotli' paketi kuruluysa br, değilse gzip.
+  - COMPRESS_MIN_SIZE bayttan küçük gövdeler, zaten sıkıştırılmış içerik türleri
+    (resim, pdf, zip...), dosya gönderimleri ve Content-Encoding taşıyan cevaplar
+    olduğu gibi bırakılır.
+  - Akış (stream) olarak üretilen cevaplar parça parça sıkıştırılır; gövde
+    belleğe toplanmaz.
+  - Sıkıştırma oranı ve atlanma sebepleri get_compression_metrics ile alınır.
+"""
+
+import gzip
+import threading
+import zlib
+from collections import Counter
+
+from flask import current_app, request
+
+from app.metrics import record_compression
+
+try:
+    import brotli  # opsiyonel bağımlılık: yoksa sadece gzip sunulur
+except ImportError:
+    brotli = None
+
+# Sıkıştırmadan fayda gören içerik türleri (geri kalanı zaten sıkıştırılmış kabul edilir)
+COMPRESSIBLE_MIMETYPES = frozenset({
+    'text/html', 'text/css', 'text/plain', 'text/xml', 'text/csv', 'text/javascript',
+    'application/json', 'application/javascript', 'application/xml', 'application/rss+xml',
+    'application/problem+json', 'image/svg+xml',
+})
+
+_compression_metrics = Counter()
+_compression_metrics_lock = threading.Lock()
+
+
+def _record(**counts):
+    with _compression_metrics_lock:
+        _compression_metrics.update(counts)
+
+
+def get_compression_metrics():
+    """Sıkıştırılan cevap sayısı (kodlamaya göre), bayt toplamları, oran ve atlanma sebepleri."""
+    with _compression_metrics_lock:
+        metrics = dict(_compression_metrics)
+    bytes_in = metrics.get('bytes_in', 0)
+    metrics['ratio'] = round(metrics.get('bytes_out', 0) / bytes_in, 3) if bytes_in else None
+    return metrics
+
+
+class _GzipStream:
+    def __init__(self, level):
+        # wbits=31: gzip başlığı ve sağlama toplamı ile
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, chunk):
+        return self._compressor.compress(chunk)
+
+    def flush(self):
+        return self._compressor.flush()
+
+
+class _BrotliStream:
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, chunk):
+        return self._compressor.process(chunk)
+
+    def flush(self):
+        return self._compressor.finish()
+
+
+def _compress(data, encoding, config):
+    if encoding == 'br':
+        return brotli.compress(data, quality=config['COMPRESS_BROTLI_QUALITY'])
+    return gzip.compress(data, compresslevel=config['COMPRESS_LEVEL'], mtime=0)
+
+
+def _stream(encoding, config):
+    if encoding == 'br':
+        return _BrotliStream(config['COMPRESS_BROTLI_QUALITY'])
+    return _GzipStream(config['COMPRESS_LEVEL'])
+
+
+def _compress_iter(source, chunks, encoding, config):
+    """Akış cevabını parça parça sıkıştırır; toplamlar akış bitince sayaçlara yazılır."""
+    compressor = _stream(encoding, config)
+    bytes_in = bytes_out = 0
+    try:
+        for chunk in chunks:
+            bytes_in += len(chunk)
+            out = compressor.compress(chunk)
+            if out:
+                bytes_out += len(out)
+                yield out
+        out = compressor.flush()
+        bytes_out += len(out)
+        yield out
+    finally:
+        # Asıl akışın kapanması (ör. stream_with_context'in istek bağlamı) atlanmasın
+        if hasattr(source, 'close'):
+            source.close()
+        _record(**{f'compressed_{encoding}': 1, 'streamed': 1, 'bytes_in': bytes_in, 'bytes_out': bytes_out})
+        record_compression(encoding, bytes_in, bytes_out)
+
+
+def _skip_reason(response, config):
+    if request.method == 'HEAD' or response.status_code < 200 or response.status_code in (204, 304):
+        return 'no_body'
+    if 'Content-Encoding' in response.headers:
+        return 'already_encoded'
+    if response.direct_passthrough:
+        return 'file'
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES:
+        return 'content_type'
+    if 'no-transform' in (response.headers.get('Cache-Control') or ''):
+        return 'no_transform'
+    if not response.is_streamed and response.content_length is not None \
+            and response.content_length < config['COMPRESS_MIN_SIZE']:
+        return 'small'
+    return None
+
+
+def _negotiate():
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return request.accept_encodings.best_match(offered)
+
+
+def compress_response(response):
+    """after_request: cevabı istemcinin kabul ettiği kodlamayla sıkıştırır."""
+    config = current_app.config
+    if not config.get('COMPRESS_ENABLED', True):
+        return response
+
+    reason = _skip_reason(response, config)
+    if reason is None:
+        # Sıkıştırılabilir cevap, kodlamaya göre değişir (ara önbellekler için)
+        response.vary.add('Accept-Encoding')
+        encoding = _negotiate()
+        if encoding is None:
+            reason = 'not_accepted'
+    if reason is not None:
+        _record(**{f'skipped_{reason}': 1})
+        return response
+
+    if response.is_streamed:
+        response.response = _compress_iter(response.response, response.iter_encoded(), encoding, config)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        compressed = _compress(data, encoding, config)
+        response.set_data(compressed)
+        _record(**{f'compressed_{encoding}': 1, 'bytes_in': len(data), 'bytes_out': len(compressed)})
+        record_compression(encoding, len(data), len(compressed))
+
+    response.headers['Content-Encoding'] = encoding
+    # Gövde kodlamaya göre değiştiği için güçlü ETag zayıfa çevrilir
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    app.after_request(compress_response)
@@ -1,5 +1,7 @@
 from flask_login import current_user
-from .models import Request, RequestStatus, Dues, User, Announcement
+from sqlalchemy import func
+from .extensions import db
+from .models import Request, RequestStatus, Dues, User, Announcement, announcement_read_status
 from datetime import datetime
 
 def inject_counts():
@@ -34,7 +36,10 @@ def inject_counts():
             total_announcements_count = Announcement.query.filter_by(apartment_id=current_user.apartment_id).count()
             
             # 2. Kullanıcının okuduğu duyuruların sayısını bul
-            read_announcements_count = current_user.read_announcements.count()
+            # (current_user.read_announcements tam kullanıcı kaydını yükler; doğrudan ara tablo sayılır)
+            read_announcements_count = db.session.query(func.count()).select_from(announcement_read_status).filter(
+                announcement_read_status.c.user_id == current_user.id
+            ).scalar()
             
             # 3. Aradaki fark, okunmamış duyuru sayısını verir
             counts['unread_announcements_count'] = total_announcements_count - read_announcements_count
@@ -0,0 +1,217 @@
+# app/direct_uploads.py
+"""
+İstemciden depolamaya doğrudan (imzalı URL ile) dosya yükleme.
+
+Akış iki adımlıdır:
+  1) create_upload: Yetki ve dosya türü kontrol edilir, kısa ömürlü bir imzalı
+     PUT URL'i ve tamamlama adımında kullanılacak imzalı bir 'upload_token' döner.
+  2) İstemci dosyayı doğrudan depolamaya PUT eder (uygulama sunucusu baytları görmez).
+  3) complete_upload: Nesnenin depolamada olduğu doğrulanır, ilgili kayda
+     (aidat, belge, talep, gider) işlenir ve varsa sonraki işlem (OCR vb.) tetiklenir.
+
+Hem mobil API (JWT) hem web (oturum) uçları bu modülü kullanır.
+"""
+
+from datetime import datetime, timedelta
+
+from flask import current_app
+from itsdangerous.url_safe import URLSafeTimedSerializer as Serializer
+
+from app.extensions import db
+from app.image_variants import reset_variants, start_image_processing
+from app.models import Document, Dues, Expense, Request as RequestModel
+from app.receipt_processing import queue_receipt, start_receipt_verification, serialize_receipt_status
+from app.storage import get_storage, new_object_key
+
+# Yükleme amacı → depolama klasörü
+UPLOAD_PURPOSES = {
+    'receipt': 'receipts',
+    'document': 'documents',
+    'request': 'requests',
+    'invoice': 'invoices',
+}
+
+# Formlardaki FileAllowed kuralıyla aynı: PDF, PNG, JPG
+ALLOWED_CONTENT_TYPES = {
+    'application/pdf': ('pdf',),
+    'image/png': ('png',),
+    'image/jpeg': ('jpg', 'jpeg'),
+}
+
+
+class DirectUploadError(Exception):
+    """Kullanıcıya gösterilecek mesaj ve HTTP durum koduyla yükleme hatası."""
+
+    def __init__(self, message, status_code=400):
+        super().__init__(message)
+        self.message = message
+        self.status_code = status_code
+
+
+def _serializer():
+    return Serializer(current_app.config['SECRET_KEY'], salt='direct-upload')
+
+
+def _load_target(user, purpose, target_id):
+    """Yüklemenin bağlanacağı kaydı bulur ve kullanıcının yetkisini kontrol eder."""
+    if purpose == 'document':
+        if not user.apartment_id:
+            raise DirectUploadError("Belge yükleyebilmek için bir apartmana kayıtlı olmalısınız.", 403)
+        return None
+
+    if not target_id:
+        raise DirectUploadError("Bu yükleme türü için 'target_id' zorunludur.", 400)
+
+    if purpose == 'receipt':
+        dues = Dues.query.get(target_id)
+        if not dues:
+            raise DirectUploadError("Aidat borcu bulunamadı.", 404)
+        if dues.user_id != user.id:
+            raise DirectUploadError("Bu aidat borcuna erişim veya işlem yapma yetkiniz yok.", 403)
+        if dues.is_paid:
+            raise DirectUploadError("Bu aidat zaten ödenmiş.", 400)
+        return dues
+
+    if purpose == 'request':
+        req = RequestModel.query.get(target_id)
+        if not req:
+            raise DirectUploadError("Talep bulunamadı.", 404)
+        if req.user_id != user.id:
+            raise DirectUploadError("Bu talebe dosya ekleme yetkiniz yok.", 403)
+        return req
+
+    # purpose == 'invoice'
+    expense = Expense.query.get(target_id)
+    if not expense:
+        raise DirectUploadError("Gider bulunamadı.", 404)
+    if user.role != 'admin' or expense.apartment_id != user.apartment_id:
+        raise DirectUploadError("Bu gidere fatura ekleme yetkiniz yok.", 403)
+    return expense
+
+
+def create_upload(user, purpose, filename, content_type, target_id=None, size=None):
+    """İmzalı yükleme URL'i ve tamamlama token'ı üretir."""
+    if purpose not in UPLOAD_PURPOSES:
+        raise DirectUploadError(f"Geçersiz yükleme türü: {purpose}", 400)
+    if not filename:
+        raise DirectUploadError("Dosya adı zorunludur.", 400)
+
+    extension = filename.rsplit('.', 1)[-1].lower() if '.' in filename else ''
+    if extension not in ALLOWED_CONTENT_TYPES.get(content_type, ()):
+        raise DirectUploadError("Sadece PDF, PNG ve JPG dosyalarına izin verilmektedir!", 400)
+
+    max_size = current_app.config['MAX_CONTENT_LENGTH']
+    if size is not None and size > max_size:
+        raise DirectUploadError(f"Dosya boyutu en fazla {max_size // (1024 * 1024)} MB olabilir.", 400)
+
+    _load_target(user, purpose, target_id)
+
+    expires_in = current_app.config.get('DIRECT_UPLOAD_URL_EXPIRES', 900)
+    key = new_object_key(UPLOAD_PURPOSES[purpose], filename)
+    upload_url, headers = get_storage().generate_upload_url(key, content_type, expires_in, max_size)
+
+    upload_token = _serializer().dumps({
+        'u': user.id, 'p': purpose, 'k': key, 't': target_id, 'ct': content_type,
+    })
+
+    return {
+        "upload_url": upload_url,
+        "method": "PUT",
+        "headers": headers,
+        "object_key": key,
+        "upload_token": upload_token,
+        "expires_at": (datetime.utcnow() + timedelta(seconds=expires_in)).isoformat(),
+    }
+
+
+def complete_upload(user, upload_token, data):
+    """
+    Depolamaya yüklenen nesneyi ilgili kayda işler.
+    (mesaj, yanıt verisi) döndürür; hata durumunda DirectUploadError fırlatır.
+    """
+    expires_in = current_app.config.get('DIRECT_UPLOAD_URL_EXPIRES', 900)
+    try:
+        # PUT, URL'in süresi dolmadan hemen önce başlamış olabilir; kısa bir tolerans tanı
+        payload = _serializer().loads(upload_token or '', max_age=expires_in + 300)
+    except Exception:
+        raise DirectUploadError("Yükleme token'ı geçersiz veya süresi dolmuş.", 400)
+
+    if payload['u'] != user.id:
+        raise DirectUploadError("Bu yüklemeyi tamamlama yetkiniz yok.", 403)
+
+    purpose, key = payload['p'], payload['k']
+    storage = get_storage()
+    size = storage.get_size(key)
+    if size is None:
+        raise DirectUploadError("Dosya depolamada bulunamadı. Lütfen yüklemeyi tekrar deneyin.", 400)
+    if size > current_app.config['MAX_CONTENT_LENGTH']:
+        storage.delete(key)
+        raise DirectUploadError("Dosya izin verilen boyutu aşıyor.", 400)
+
+    target = _load_target(user, purpose, payload['t'])
+    file_url = storage.public_url(key)
+    return _COMPLETE_HANDLERS[purpose](user, target, file_url, data or {})
+
+
+# ──────────────────────────────────────────────────────────────
+# Amaç bazlı tamamlama işlemleri
+# ──────────────────────────────────────────────────────────────
+def _complete_receipt(user, dues, file_url, data):
+    # Aynı token ile tekrar çağrılırsa dekont yeniden kuyruğa alınmaz
+    if dues.receipt_filename != file_url:
+        queue_receipt(dues, file_url)
+        db.session.commit()
+        start_receipt_verification(dues.id)
+    return "Dekont yüklendi ve doğrulanıyor. Sonuç bildirim olarak iletilecek.", serialize_receipt_status(dues)
+
+
+def _complete_document(user, target, file_url, data):
+    doc_type = (data.get('doc_type') or '').strip()
+    if not 3 <= len(doc_type) <= 100:
+        raise DirectUploadError("Belge türü 3 ila 100 karakter arasında olmalıdır.", 400)
+
+    document = Document.query.filter_by(user_id=user.id, filename=file_url).first()
+    if not document:
+        document = Document(
+            user_id=user.id,
+            apartment_id=user.apartment_id,
+            filename=file_url,
+            doc_type=doc_type
+        )
+        db.session.add(document)
+        db.session.commit()
+
+    return "Belge başarıyla yüklendi.", {
+        "document": {
+            "id": document.id,
+            "doc_type": document.doc_type,
+            "filename": document.filename,
+            "upload_date": document.upload_date.isoformat()
+        }
+    }
+
+
+def _complete_request(user, req, file_url, data):
+    if req.attachment_url != file_url:
+        req.attachment_url = file_url
+        reset_variants(req, 'request')
+        db.session.commit()
+        start_image_processing('request', req.id)
+    return "Dosya talebe eklendi.", {"request_id": req.id, "attachment_url": req.attachment_url}
+
+
+def _complete_invoice(user, expense, file_url, data):
+    expense.invoice_filename = file_url
+    db.session.commit()
+    return "Fatura başarıyla yüklendi ve gidere eklendi.", {
+        "expense_id": expense.id,
+        "invoice_url": expense.invoice_filename
+    }
+
+
+_COMPLETE_HANDLERS = {
+    'receipt': _complete_receipt,
+    'document': _complete_document,
+    'request': _complete_request,
+    'invoice': _complete_invoice,
+}
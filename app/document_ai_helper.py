@@ -1,15 +1,27 @@
+from functools import lru_cache
+import os
+
 from google.cloud import documentai
 from flask import current_app
 
+
+@lru_cache(maxsize=None)
+def _get_client(location: str):
+    """
+    Bölge başına tek bir DocumentProcessorServiceClient oluşturur ve süreç boyunca yeniden kullanır.
+    (gRPC istemcisi thread-safe'tir; her istekte yeni kanal açmanın maliyetinden kurtuluruz.)
+    """
+    opts = {"api_endpoint": f"{location}-documentai.googleapis.com"}
+    return documentai.DocumentProcessorServiceClient(client_options=opts)
+
+
 def process_receipt_from_gcs(gcs_uri: str, processor_id: str, project_id: str, location: str) -> dict:
     """
     Google Cloud Storage'daki bir dekont dosyasını Document AI ile işler
     ve yapılandırılmış veriyi bir sözlük olarak döndürür.
     """
     try:
-        # API istemcisini, işlemcinin bulunduğu bölgeye göre oluştur
-        opts = {"api_endpoint": f"{location}-documentai.googleapis.com"}
-        client = documentai.DocumentProcessorServiceClient(client_options=opts)
+        client = _get_client(location)
 
         # İşlenecek dosyanın GCS yolunu ve mime türünü belirt
         # Şimdilik en yaygın olanları destekleyelim: pdf, jpg, png
@@ -25,7 +37,7 @@ def process_receipt_from_gcs(gcs_uri: str, processor_id: str, project_id: str, l
         gcs_document = documentai.GcsDocument(
             gcs_uri=gcs_uri, mime_type=mime_type
         )
-        
+
         # Tam işlemci adını oluştur (API'nin istediği format)
         processor_name = client.processor_path(project_id, location, processor_id)
 
@@ -45,7 +57,7 @@ def process_receipt_from_gcs(gcs_uri: str, processor_id: str, project_id: str, l
             entity_type = entity.type_
             # Metindeki olası satır sonu karakterlerini temizle
             entity_value = entity.mention_text.replace('\n', ' ').strip()
-            
+
             # İhtiyacımız olan etiketleri kontrol et ve sözlüğe ekle
             if entity_type == 'supplier_name':
                 extracted_data['supplier'] = entity_value
@@ -64,4 +76,42 @@ def process_receipt_from_gcs(gcs_uri: str, processor_id: str, project_id: str, l
     except Exception as e:
         # Hata durumunda logla ve None döndür
         current_app.logger.error(f"Document AI işleme hatası: {e}")
-        return None
\ No newline at end of file
+        return None
+
+
+# ──────────────────────────────────────────────────────────────
+# Değiştirilebilir OCR arka uçları (RECEIPT_OCR_BACKEND)
+# ──────────────────────────────────────────────────────────────
+def _documentai_backend(gcs_uri: str) -> dict:
+    return process_receipt_from_gcs(
+        gcs_uri,
+        current_app.config.get('DOCAI_PROCESSOR_ID'),
+        os.environ.get('GCLOUD_PROJECT'),
+        current_app.config.get('DOCAI_LOCATION'),
+    )
+
+
+def _stub_backend(gcs_uri: str) -> dict:
+    """
+    Yerel geliştirme ve testler için Document AI'a gitmeyen sahte OCR.
+    RECEIPT_OCR_STUB_RESULT ayarındaki sözlüğü döndürür (None ise "veri çıkarılamadı" gibi davranır).
+    """
+    result = current_app.config.get('RECEIPT_OCR_STUB_RESULT')
+    current_app.logger.info(f"Sahte OCR kullanıldı ({gcs_uri}): {result}")
+    return dict(result) if result is not None else None
+
+
+OCR_BACKENDS = {
+    'documentai': _documentai_backend,
+    'stub': _stub_backend,
+}
+
+
+def extract_receipt_data(gcs_uri: str) -> dict:
+    """Ayarlı OCR arka ucuyla dekonttan {supplier, amount, date} verisini çıkarır."""
+    backend_name = current_app.config.get('RECEIPT_OCR_BACKEND', 'documentai')
+    backend = OCR_BACKENDS.get(backend_name)
+    if backend is None:
+        current_app.logger.error(f"Bilinmeyen OCR arka ucu: {backend_name}")
+        return None
+    return backend(gcs_uri)
@@ -3,19 +3,22 @@
 SendGrid + Brevo ile e-posta gönderimi.
 Kural: Microsoft domainlerine (outlook/hotmail/live/msn) Brevo SMTP,
 diğer tüm adreslere SendGrid API üzerinden gönder.
-`send_email()` proje genelinde tek çağrı noktasıdır.
+`send_email()` tekil e-postalar, `send_bulk_email()` toplu (duyuru, aidat,
+anket) gönderimler için çağrı noktasıdır.
 """
 
 from flask import current_app, render_template
 from threading import Thread
+import html
 import os
 import re
 import ssl
 import smtplib
 import sendgrid
 from email.message import EmailMessage
-from sendgrid.helpers.mail import Mail as SGMail, Email
+from sendgrid.helpers.mail import Mail as SGMail, Email, Personalization, Substitution, To
 from python_http_client.exceptions import HTTPError
+from app.metrics import record_notifications
 
 # ──────────────────────────────────────────────────────────────
 # 0) Microsoft domainleri seti
@@ -75,27 +78,70 @@ def _html_to_text(html: str) -> str:
     text = re.sub(r"<[^>]+>", "", text)
     return re.sub(r"\n{3,}", "\n\n", text).strip()
 
+def _placeholder(key: str, part: str) -> str:
+    """Toplu şablonda alıcıya özel değerin yerini tutan işaret (Jinja autoescape'ten etkilenmez)."""
+    return f"%%ays_{key}_{part}%%"
+
+def _render_broadcast(template: str, shared_ctx: dict, keys) -> tuple:
+    """
+    Şablonu TEK KEZ, alıcıya özel parametrelerin yerine işaretler koyarak render eder.
+    (html, text) döndürür; her alıcı için sadece işaretlerin yerine değer yazılır.
+    Şablon işaretle render edilemiyorsa (ör. değer url_for'a int olarak veriliyor) veya bir
+    işaret çıktıda aynen görünmüyorsa (ör. |upper) None döndürür; bu durumda alıcı başına
+    render'a düşülür.
+    """
+    placeholders = {key: _placeholder(key, "html") for key in keys}
+    try:
+        html_body = render_template(f"{template}.html", **{**shared_ctx, **placeholders})
+    except Exception:
+        return None
+    if not all(placeholder in html_body for placeholder in placeholders.values()):
+        return None
+    # Düz metin kısmında değerler HTML-escape edilmeden yazılır; bu yüzden ayrı işaret kullanılır
+    text_body = _html_to_text(html_body)
+    for key, placeholder in placeholders.items():
+        text_body = text_body.replace(placeholder, _placeholder(key, "text"))
+    return html_body, text_body
+
+def _substitutions(values: dict) -> dict:
+    """Alıcının değerlerinden {işaret: değer} eşlemesi üretir (HTML için escape edilmiş)."""
+    substitutions = {}
+    for key, value in values.items():
+        value = "" if value is None else str(value)
+        substitutions[_placeholder(key, "html")] = html.escape(value, quote=False)
+        substitutions[_placeholder(key, "text")] = value
+    return substitutions
+
+def _apply_substitutions(body: str, substitutions: dict) -> str:
+    for placeholder, value in substitutions.items():
+        body = body.replace(placeholder, value)
+    return body
+
 # ──────────────────────────────────────────────────────────────
 # 4) Arka planda gerçek gönderimler
 # ──────────────────────────────────────────────────────────────
+def _deliver_sendgrid(app, msg: SGMail) -> None:
+    """SendGrid ile gönderir; hata olursa metriği yazar ve istisnayı çağırana bırakır."""
+    try:
+        resp = _get_sg_client().send(msg)
+    except Exception:
+        record_notifications("sendgrid", failed=1)
+        raise
+    app.logger.info("Mail OK (SendGrid) → %s (status %s)", msg.to, resp.status_code)
+    record_notifications("sendgrid", sent=1)
+
 def _async_sendgrid(app, msg: SGMail) -> None:
     """SendGrid çağrısını app context’iyle çalıştır."""
     with app.app_context():
         try:
-            sg_client = _get_sg_client()
-            resp = sg_client.send(msg)
-            app.logger.info("Mail OK (SendGrid) → %s (status %s)", msg.to, resp.status_code)
+            _deliver_sendgrid(app, msg)
         except HTTPError as exc:
             body = exc.body.decode() if hasattr(exc.body, "decode") else exc.body
             app.logger.error("SendGrid %s | Body: %s", getattr(exc, "status_code", "?"), body)
         except Exception as exc:
             app.logger.error("SendGrid exception: %s", exc)
 
-# --- DEĞİŞİKLİK 1: _async_brevo fonksiyonu artık 'brevo_config' parametresi alıyor ---
-def _async_brevo(app, sender_addr: str, to: str, subject: str, html_body: str, text_body: str, brevo_config: dict) -> None:
-    """Brevo SMTP ile gönderim. Ayarları parametre olarak alır."""
-    # brevo_config = _get_brevo_config() <-- BU SATIR KALDIRILDI
-
+def _build_brevo_message(app, sender_addr: str, to: str, subject: str, html_body: str, text_body: str) -> EmailMessage:
     msg = EmailMessage()
     from_name = app.config.get("MAIL_FROM_NAME", "Apartman Yönetim Sistemi")
     msg["Subject"] = subject
@@ -103,37 +149,146 @@ def _async_brevo(app, sender_addr: str, to: str, subject: str, html_body: str, t
     msg["To"] = to
     msg.set_content(text_body or _html_to_text(html_body))
     msg.add_alternative(html_body, subtype="html")
+    return msg
+
+def _open_brevo_session(brevo_config: dict) -> smtplib.SMTP:
+    """Brevo'ya bağlanır, STARTTLS ve login yapar; açık SMTP oturumunu döndürür."""
+    server = smtplib.SMTP(brevo_config["host"], brevo_config["port"], timeout=10)
+    try:
+        server.starttls(context=ssl.create_default_context())
+        server.login(brevo_config["login"], brevo_config["password"])
+    except Exception:
+        server.close()
+        raise
+    return server
 
-    context = ssl.create_default_context()
+def _deliver_brevo(app, msg: EmailMessage, brevo_config: dict) -> None:
+    """Brevo SMTP ile gönderir; hata olursa metriği yazar ve istisnayı çağırana bırakır."""
+    try:
+        with _open_brevo_session(brevo_config) as server:
+            server.send_message(msg)
+    except Exception:
+        record_notifications("brevo", failed=1)
+        raise
+    app.logger.info("Mail OK (Brevo) → %s", msg["To"])
+    record_notifications("brevo", sent=1)
+
+# --- DEĞİŞİKLİK 1: _async_brevo fonksiyonu artık 'brevo_config' parametresi alıyor ---
+def _async_brevo(app, sender_addr: str, to: str, subject: str, html_body: str, text_body: str, brevo_config: dict) -> None:
+    """Brevo SMTP ile gönderim. Ayarları parametre olarak alır."""
+    msg = _build_brevo_message(app, sender_addr, to, subject, html_body, text_body)
     with app.app_context():
         try:
-            with smtplib.SMTP(brevo_config["host"], brevo_config["port"], timeout=10) as server:
-                server.starttls(context=context)
-                server.login(brevo_config["login"], brevo_config["password"])
-                server.send_message(msg)
-            app.logger.info("Mail OK (Brevo) → %s", to)
+            _deliver_brevo(app, msg, brevo_config)
         except Exception as exc:
             app.logger.error("Brevo SMTP exception: %s", exc)
 
+# ──────────────────────────────────────────────────────────────
+# 4b) Toplu gönderimler (send_bulk_email)
+# ──────────────────────────────────────────────────────────────
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def _sendgrid_bulk(app, from_email: Email, subject: str, messages: list, batch_size: int) -> None:
+    """
+    Aynı içeriği alacak alıcıları tek bir SendGrid isteğinde toplar: her alıcı ayrı
+    bir personalization'dır (alıcılar birbirini görmez), istek başına en fazla batch_size.
+    Alıcıya özel değerler (ad vb.) SendGrid tarafında personalization substitution'ı ile yazılır.
+    """
+    sg_client = _get_sg_client()
+    groups = {}
+    for to, html_body, text_body, substitutions in messages:
+        groups.setdefault((html_body, text_body), []).append((to, substitutions))
+
+    for (html_body, text_body), recipients in groups.items():
+        for batch in _chunks(recipients, batch_size):
+            msg = SGMail(
+                from_email=from_email,
+                subject=subject,
+                html_content=html_body,
+                plain_text_content=text_body,
+            )
+            for addr, substitutions in batch:
+                personalization = Personalization()
+                personalization.add_to(To(addr))
+                for placeholder, value in substitutions.items():
+                    personalization.add_substitution(Substitution(placeholder, value))
+                msg.add_personalization(personalization)
+            try:
+                resp = sg_client.send(msg)
+                app.logger.info("Mail OK (SendGrid, toplu) → %s alıcı (status %s)", len(batch), resp.status_code)
+                record_notifications("sendgrid", sent=len(batch))
+            except HTTPError as exc:
+                body = exc.body.decode() if hasattr(exc.body, "decode") else exc.body
+                app.logger.error("SendGrid %s | %s alıcı | Body: %s", getattr(exc, "status_code", "?"), len(batch), body)
+                record_notifications("sendgrid", failed=len(batch))
+            except Exception as exc:
+                app.logger.error("SendGrid exception (%s alıcı): %s", len(batch), exc)
+                record_notifications("sendgrid", failed=len(batch))
+
+def _brevo_bulk(app, sender_addr: str, subject: str, messages: list, brevo_config: dict, batch_size: int) -> None:
+    """Her batch_size mesaj için tek bir SMTP oturumu (bir TLS el sıkışması + login) kullanır."""
+    for batch in _chunks(messages, batch_size):
+        server = None
+        sent = 0
+        try:
+            for to, html_body, text_body, substitutions in batch:
+                msg = _build_brevo_message(app, sender_addr, to, subject,
+                                           _apply_substitutions(html_body, substitutions),
+                                           _apply_substitutions(text_body, substitutions))
+                try:
+                    if server is None:
+                        server = _open_brevo_session(brevo_config)
+                    server.send_message(msg)
+                except smtplib.SMTPServerDisconnected:
+                    # Sunucu oturumu kapattıysa bir kez yeniden bağlanıp devam et
+                    server = _open_brevo_session(brevo_config)
+                    server.send_message(msg)
+                except smtplib.SMTPRecipientsRefused as exc:
+                    app.logger.error("Brevo alıcıyı reddetti → %s: %s", to, exc)
+                    continue
+                sent += 1
+            app.logger.info("Mail OK (Brevo, toplu) → %s alıcı", len(batch))
+        except Exception as exc:
+            app.logger.error("Brevo SMTP exception (%s alıcılık parti): %s", len(batch), exc)
+        finally:
+            record_notifications("brevo", sent=sent, failed=len(batch) - sent)
+            if server is not None:
+                try:
+                    server.quit()
+                except Exception:
+                    server.close()
+
+def _async_bulk(app, from_email: Email, sender_addr: str, subject: str,
+                sendgrid_messages: list, brevo_messages: list, brevo_config: dict) -> None:
+    """Toplu gönderimi app context'iyle arka planda çalıştır."""
+    with app.app_context():
+        if sendgrid_messages:
+            try:
+                _sendgrid_bulk(app, from_email, subject, sendgrid_messages,
+                               app.config.get("SENDGRID_PERSONALIZATIONS_PER_REQUEST", 1000))
+            except Exception as exc:
+                app.logger.error("SendGrid toplu gönderim başarısız: %s", exc)
+        if brevo_messages:
+            _brevo_bulk(app, sender_addr, subject, brevo_messages, brevo_config,
+                        app.config.get("BREVO_SMTP_BATCH_SIZE", 100))
+
 # ──────────────────────────────────────────────────────────────
 # 5) Dışa açık yardımcı
 # ──────────────────────────────────────────────────────────────
-def send_email(to: str, subject: str, template: str, **kwargs) -> None:
+def _prepare_email(app, to: str, subject: str, template: str, kwargs: dict):
     """
-    send_email("user@mail.com", "Hoş Geldiniz", "email/welcome", username="Okan")
-    • `template`  ⇒  templates/<template>.html  (uzantı ekleme)
-    • `kwargs`    ⇒  Jinja2 şablonuna parametre olarak geçilir
-    KURAL: Microsoft domainleri → Brevo, diğerleri → SendGrid
+    Şablonu render eder; (gönderen adresi, SendGrid gönderici, html, metin) döndürür.
+    MAIL_DEBUG_MODE açıksa e-postayı konsola yazar ve None döndürür.
     """
-    app = current_app._get_current_object()
-    debug_mode = app.config.get("MAIL_DEBUG_MODE") == "True"
     sender_raw = app.config.get("MAIL_DEFAULT_SENDER", "noreply@flatnetsite.com")
     sender_addr = sender_raw[-1] if isinstance(sender_raw, (tuple, list)) else sender_raw
     from_email = Email(sender_addr, name=app.config.get("MAIL_FROM_NAME", "Apartman Yönetim Sistemi"))
     html_body = render_template(f"{template}.html", **kwargs)
     text_body = _html_to_text(html_body)
 
-    if debug_mode:
+    if app.config.get("MAIL_DEBUG_MODE") == "True":
         print("── DEBUG MAIL ──")
         print("Konu     :", subject)
         print("Gönderen :", sender_addr)
@@ -141,7 +296,22 @@ def send_email(to: str, subject: str, template: str, **kwargs) -> None:
         print("──────── HTML ───────────────")
         print(html_body)
         print("─────────────────────────────")
+        return None
+    return sender_addr, from_email, html_body, text_body
+
+def send_email(to: str, subject: str, template: str, **kwargs) -> None:
+    """
+    send_email("user@mail.com", "Hoş Geldiniz", "email/welcome", username="Okan")
+    • `template`  ⇒  templates/<template>.html  (uzantı ekleme)
+    • `kwargs`    ⇒  Jinja2 şablonuna parametre olarak geçilir
+    KURAL: Microsoft domainleri → Brevo, diğerleri → SendGrid
+    Gönderim arka planda yapılır; sağlayıcı hataları sadece günlüğe yazılır.
+    """
+    app = current_app._get_current_object()
+    prepared = _prepare_email(app, to, subject, template, kwargs)
+    if prepared is None:
         return
+    sender_addr, from_email, html_body, text_body = prepared
 
     use_brevo = _is_ms(to) and _brevo_ready()
     if use_brevo:
@@ -157,4 +327,91 @@ def send_email(to: str, subject: str, template: str, **kwargs) -> None:
         subject=subject,
         html_content=html_body,
     )
-    Thread(target=_async_sendgrid, args=(app, msg), daemon=True).start()
\ No newline at end of file
+    Thread(target=_async_sendgrid, args=(app, msg), daemon=True).start()
+
+def send_email_now(to: str, subject: str, template: str, **kwargs) -> None:
+    """
+    send_email ile aynı kural ve şablonla, ama arka plana atmadan gönderir.
+    Sağlayıcı (SendGrid/Brevo) hatasında istisna fırlatır; gönderimin sonucuna göre
+    iş yapan çağıranlar içindir (ör. özet e-postası gönderildi olarak işaretlenmeden önce).
+    """
+    app = current_app._get_current_object()
+    prepared = _prepare_email(app, to, subject, template, kwargs)
+    if prepared is None:
+        return
+    sender_addr, from_email, html_body, text_body = prepared
+
+    if _is_ms(to) and _brevo_ready():
+        msg = _build_brevo_message(app, sender_addr, to, subject, html_body, text_body)
+        _deliver_brevo(app, msg, _get_brevo_config())
+        return
+
+    msg = SGMail(
+        from_email=from_email,
+        to_emails=[to],
+        subject=subject,
+        html_content=html_body,
+    )
+    _deliver_sendgrid(app, msg)
+
+def send_bulk_email(recipients, subject: str, template: str, per_recipient_ctx: dict = None, **kwargs) -> None:
+    """
+    Aynı e-postayı birçok alıcıya tek seferde gönderir (duyuru, aidat, anket).
+    send_bulk_email(["a@x.com", "b@y.com"], "Yeni Duyuru", "email/new_announcement_notification",
+                    per_recipient_ctx={"a@x.com": {"resident_name": "Ali"}}, announcement=ann)
+    • `kwargs`             ⇒  tüm alıcılar için ortak şablon parametreleri
+    • `per_recipient_ctx`  ⇒  {adres: {parametre: değer}}; ortak parametrelerin üzerine yazılır
+    Alıcıya özel değerlerin hepsi metin/sayı ise şablon bir kez render edilir ve değerler
+    işaretlerin yerine yazılır (N alıcı için tek Jinja render'ı ve tek HTML→metin dönüşümü).
+    KURAL send_email ile aynıdır: Microsoft domainleri → Brevo (parti başına tek SMTP oturumu),
+    diğerleri → SendGrid (istek başına en fazla 1000 alıcı).
+    """
+    app = current_app._get_current_object()
+    per_recipient_ctx = per_recipient_ctx or {}
+    recipients = [addr for addr in dict.fromkeys(recipients) if addr]
+    if not recipients:
+        return
+
+    debug_mode = app.config.get("MAIL_DEBUG_MODE") == "True"
+    sender_raw = app.config.get("MAIL_DEFAULT_SENDER", "noreply@flatnetsite.com")
+    sender_addr = sender_raw[-1] if isinstance(sender_raw, (tuple, list)) else sender_raw
+    from_email = Email(sender_addr, name=app.config.get("MAIL_FROM_NAME", "Apartman Yönetim Sistemi"))
+    brevo_ready = _brevo_ready()
+
+    keys = {key for addr in recipients for key in per_recipient_ctx.get(addr, {})}
+    simple_values = all(
+        value is None or isinstance(value, (str, int, float))
+        for addr in recipients for value in per_recipient_ctx.get(addr, {}).values()
+    )
+    broadcast = _render_broadcast(template, kwargs, keys) if simple_values else None
+
+    sendgrid_messages, brevo_messages = [], []
+    for addr in recipients:
+        recipient_ctx = per_recipient_ctx.get(addr, {})
+        if broadcast:
+            html_body, text_body = broadcast
+            # Bu alıcı için verilmeyen parametrelerde ortak değer kullanılır
+            values = {key: recipient_ctx.get(key, kwargs.get(key)) for key in keys}
+            message = (addr, html_body, text_body, _substitutions(values))
+        else:
+            html_body = render_template(f"{template}.html", **{**kwargs, **recipient_ctx})
+            message = (addr, html_body, _html_to_text(html_body), {})
+        if brevo_ready and _is_ms(addr):
+            brevo_messages.append(message)
+        else:
+            sendgrid_messages.append(message)
+
+    if debug_mode:
+        print("── DEBUG TOPLU MAIL ──")
+        print("Konu     :", subject)
+        print("Gönderen :", sender_addr)
+        print("Alıcılar :", len(recipients), f"(SendGrid: {len(sendgrid_messages)}, Brevo: {len(brevo_messages)})")
+        print("─────────────────────────────")
+        return
+
+    brevo_cfg = _get_brevo_config() if brevo_messages else None
+    Thread(
+        target=_async_bulk,
+        args=(app, from_email, sender_addr, subject, sendgrid_messages, brevo_messages, brevo_cfg),
+        daemon=True
+    ).start()
\ No newline at end of file
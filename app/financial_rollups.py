@@ -0,0 +1,343 @@
+# app/financial_rollups.py
+"""
+Aylık finansal özet (rollup) tablosunun bakımı.
+
+Her Transaction yazımı (ekleme / güncelleme / silme) `after_flush` olayında
+yakalanır ve ilgili ayın MonthlyFinancialSummary satırına artımlı olarak
+yansıtılır; sonraki ayların açılış/kapanış bakiyeleri de aynı tutar kadar
+kaydırılır. Geçmiş veriler için `flask rebuild-financial-rollups` komutu
+tabloyu ham işlemlerden yeniden oluşturur.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event, func, inspect, select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.extensions import db
+from app.models import Apartment, MonthlyFinancialSummary, Transaction
+
+# Transaction.source_type → özet kategorisi
+SOURCE_TYPE_LABELS = {
+    'dues': 'Aidat Gelirleri',
+    'expense': 'Masraflar',
+    'manual': 'Manuel İşlemler',
+}
+DEFAULT_CATEGORY = 'Diğer'
+
+# Rollup'ı etkileyen Transaction alanları
+TRACKED_ATTRS = ('apartment_id', 'transaction_date', 'amount', 'source_type', 'description')
+
+
+def month_start(value):
+    """datetime/date değerini ayın ilk gününe (date) indirger."""
+    return date(value.year, value.month, 1)
+
+
+def category_of(source_type, description):
+    """Bir işlemin özet tablosunda hangi kategoriye yazılacağını belirler."""
+    # resident.monthly_summary ile aynı kural: açıklamasında "Aidat" geçenler aidat gelirleridir.
+    if source_type == 'dues' or 'Aidat' in (description or ''):
+        return SOURCE_TYPE_LABELS['dues']
+    return SOURCE_TYPE_LABELS.get(source_type, DEFAULT_CATEGORY)
+
+
+def _add_to_bucket(breakdown, category, value):
+    breakdown = dict(breakdown or {})
+    breakdown[category] = round(breakdown.get(category, 0.0) + value, 2)
+    if abs(breakdown[category]) < 0.005:
+        del breakdown[category]
+    return breakdown
+
+
+# ──────────────────────────────────────────────────────────────
+# 1) Artımlı güncelleme
+# ──────────────────────────────────────────────────────────────
+def _collect_changes(session):
+    """
+    Flush edilen Transaction nesnelerinden (apartman, ay, tutar, kategori, işaret)
+    listesi çıkarır. Güncellemeler "eski değeri geri al + yeni değeri ekle" olarak ifade edilir.
+    """
+    changes = []
+
+    def _change(apartment_id, when, amount, source_type, description, sign):
+        if apartment_id is None or not amount:
+            return
+        changes.append((apartment_id, month_start(when or datetime.utcnow()), float(amount),
+                        category_of(source_type, description), sign))
+
+    for obj in session.new:
+        if isinstance(obj, Transaction):
+            _change(obj.apartment_id, obj.transaction_date, obj.amount, obj.source_type, obj.description, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, Transaction):
+            _change(obj.apartment_id, obj.transaction_date, obj.amount, obj.source_type, obj.description, -1)
+
+    for obj in session.dirty:
+        if not isinstance(obj, Transaction) or not session.is_modified(obj, include_collections=False):
+            continue
+        old, new = {}, {}
+        for attr in TRACKED_ATTRS:
+            hist = inspect(obj).attrs[attr].history
+            new[attr] = getattr(obj, attr)
+            old[attr] = hist.deleted[0] if hist.deleted else new[attr]
+        if old == new:
+            continue
+        _change(old['apartment_id'], old['transaction_date'], old['amount'], old['source_type'], old['description'], -1)
+        _change(new['apartment_id'], new['transaction_date'], new['amount'], new['source_type'], new['description'], 1)
+
+    return changes
+
+
+def _shift_later_months(connection, apartment_id, period, delta):
+    """Sonraki ayların açılış/kapanış bakiyelerini aynı tutar kadar kaydırır."""
+    table = MonthlyFinancialSummary.__table__
+    connection.execute(
+        table.update()
+        .where(table.c.apartment_id == apartment_id, table.c.period > period)
+        .values(opening_balance=table.c.opening_balance + delta,
+                closing_balance=table.c.closing_balance + delta)
+    )
+
+
+def _apply_to_month(connection, apartment_id, period, amount, category, sign):
+    """
+    Tek bir değişikliği o ayın rollup satırına uygular.
+    O ay için satır yoksa False döner (satır sonradan defterden oluşturulur).
+    """
+    table = MonthlyFinancialSummary.__table__
+    delta = sign * amount
+
+    # Kırılımlar JSON olduğu için satır okunup yazılır; eşzamanlı işlemlerin
+    # birbirinin güncellemesini ezmemesi için satır işlem sonuna kadar kilitlenir.
+    row = connection.execute(
+        select(table).where(table.c.apartment_id == apartment_id, table.c.period == period).with_for_update()
+    ).mappings().first()
+    if row is None:
+        return False
+
+    values = {'closing_balance': round(row['closing_balance'] + delta, 2), 'updated_at': datetime.utcnow()}
+    if amount > 0:
+        values['total_income'] = round(row['total_income'] + delta, 2)
+        values['income_breakdown'] = _add_to_bucket(row['income_breakdown'], category, delta)
+    else:
+        values['total_expense'] = round(row['total_expense'] - delta, 2)
+        values['expense_breakdown'] = _add_to_bucket(row['expense_breakdown'], category, -delta)
+
+    connection.execute(table.update().where(table.c.id == row['id']).values(**values))
+    return True
+
+
+def _build_month_from_ledger(connection, apartment_id, period):
+    """Eksik bir ay satırını doğrudan Transaction tablosundan hesaplayıp ekler."""
+    next_period = add_months(period, 1)
+    start_dt = datetime.combine(period, datetime.min.time())
+    end_dt = datetime.combine(next_period, datetime.min.time())
+    tx = Transaction.__table__
+
+    opening = connection.execute(
+        select(func.coalesce(func.sum(tx.c.amount), 0.0))
+        .where(tx.c.apartment_id == apartment_id, tx.c.transaction_date < start_dt)
+    ).scalar() or 0.0
+
+    rows = connection.execute(
+        select(tx.c.amount, tx.c.source_type, tx.c.description)
+        .where(tx.c.apartment_id == apartment_id,
+               tx.c.transaction_date >= start_dt,
+               tx.c.transaction_date < end_dt)
+    ).all()
+
+    summary = _summarize(apartment_id, period, opening, rows)
+    connection.execute(MonthlyFinancialSummary.__table__.insert().values(**summary))
+
+
+def _create_month(connection, apartment_id, period, month_changes):
+    """
+    Eksik ay satırını defterden oluşturur. Aynı ayı eşzamanlı bir işlem bizden önce
+    oluşturduysa (benzersiz anahtar çakışması), o satır bu işlemin henüz commit edilmemiş
+    kayıtlarını görmeden hesaplanmıştır; bu durumda değişiklikler o satıra uygulanır.
+    """
+    try:
+        with connection.begin_nested():
+            _build_month_from_ledger(connection, apartment_id, period)
+    except IntegrityError:
+        current_app.logger.info(f"Aylık özet satırı eşzamanlı oluşturuldu, değişiklikler uygulanıyor "
+                                f"(apartman {apartment_id}, {period:%Y-%m}).")
+        for amount, category, sign in month_changes:
+            if not _apply_to_month(connection, apartment_id, period, amount, category, sign):
+                raise
+
+
+def _summarize(apartment_id, period, opening, rows):
+    """(amount, source_type, description) satırlarından bir rollup kaydı sözlüğü üretir."""
+    income, expense = 0.0, 0.0
+    income_breakdown, expense_breakdown = {}, {}
+    for amount, source_type, description in rows:
+        category = category_of(source_type, description)
+        if amount > 0:
+            income += amount
+            income_breakdown = _add_to_bucket(income_breakdown, category, amount)
+        elif amount < 0:
+            expense += -amount
+            expense_breakdown = _add_to_bucket(expense_breakdown, category, -amount)
+
+    return {
+        'apartment_id': apartment_id,
+        'period': period,
+        'opening_balance': round(opening, 2),
+        'closing_balance': round(opening + income - expense, 2),
+        'total_income': round(income, 2),
+        'total_expense': round(expense, 2),
+        'income_breakdown': income_breakdown,
+        'expense_breakdown': expense_breakdown,
+        'updated_at': datetime.utcnow(),
+    }
+
+
+def _keep_old_value(target, value, oldvalue, initiator):
+    pass
+
+
+# commit sonrası expire edilmiş bir alan değiştirildiğinde eski değerin de
+# history'ye yüklenmesi için (aksi halde güncellemenin eski ayı bilinemez)
+for _attr in TRACKED_ATTRS:
+    event.listen(getattr(Transaction, _attr), 'set', _keep_old_value, active_history=True)
+
+
+@event.listens_for(Session, 'after_flush')
+def _update_rollups_after_flush(session, flush_context):
+    changes = _collect_changes(session)
+    if not changes:
+        return
+
+    connection = session.connection()
+    # Rollup bakımı asla asıl işlemi (ödeme onayı, masraf kaydı...) bozmamalı.
+    # Hata olursa sadece bu kısım geri alınır; tablo backfill komutuyla onarılabilir.
+    savepoint = connection.begin_nested()
+    try:
+        missing = defaultdict(list)
+        for apartment_id, period, amount, category, sign in changes:
+            _shift_later_months(connection, apartment_id, period, sign * amount)
+            if not _apply_to_month(connection, apartment_id, period, amount, category, sign):
+                missing[(apartment_id, period)].append((amount, category, sign))
+        for (apartment_id, period), month_changes in sorted(missing.items()):
+            _create_month(connection, apartment_id, period, month_changes)
+        savepoint.commit()
+    except Exception as e:
+        savepoint.rollback()
+        current_app.logger.error(f"Aylık finansal özet güncellenemedi: {e}", exc_info=True)
+
+
+# ──────────────────────────────────────────────────────────────
+# 2) Okuma
+# ──────────────────────────────────────────────────────────────
+def add_months(period, months):
+    """Ayın ilk günü olan bir tarihe ay ekler/çıkarır."""
+    index = period.year * 12 + (period.month - 1) + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def get_monthly_history(apartment_id, start, end):
+    """
+    [start, end] aralığındaki (ayın ilk günleri, dahil) her ay için özet sözlükleri döndürür.
+    İşlem olmayan aylar, bir önceki ayın kapanış bakiyesiyle sıfır hareketli olarak doldurulur.
+    """
+    rows = MonthlyFinancialSummary.query.filter(
+        MonthlyFinancialSummary.apartment_id == apartment_id,
+        MonthlyFinancialSummary.period.between(start, end)
+    ).order_by(MonthlyFinancialSummary.period).all()
+    by_period = {row.period: row for row in rows}
+
+    # Aralık işlem olmayan bir ayla başlıyorsa, önceki son kapanış bakiyesini bul
+    balance = 0.0
+    if start not in by_period:
+        previous = MonthlyFinancialSummary.query.filter(
+            MonthlyFinancialSummary.apartment_id == apartment_id,
+            MonthlyFinancialSummary.period < start
+        ).order_by(MonthlyFinancialSummary.period.desc()).first()
+        if previous:
+            balance = previous.closing_balance
+
+    history = []
+    period = start
+    while period <= end:
+        row = by_period.get(period)
+        if row:
+            history.append({
+                'period': period,
+                'opening_balance': row.opening_balance,
+                'closing_balance': row.closing_balance,
+                'total_income': row.total_income,
+                'total_expense': row.total_expense,
+                'income_breakdown': row.income_breakdown or {},
+                'expense_breakdown': row.expense_breakdown or {},
+            })
+            balance = row.closing_balance
+        else:
+            history.append({
+                'period': period,
+                'opening_balance': balance,
+                'closing_balance': balance,
+                'total_income': 0.0,
+                'total_expense': 0.0,
+                'income_breakdown': {},
+                'expense_breakdown': {},
+            })
+        period = add_months(period, 1)
+    return history
+
+
+# ──────────────────────────────────────────────────────────────
+# 3) Backfill
+# ──────────────────────────────────────────────────────────────
+def rebuild_rollups(apartment_id=None):
+    """
+    Rollup tablosunu ham Transaction kayıtlarından sıfırdan oluşturur.
+    apartment_id verilmezse tüm apartmanlar işlenir. Oluşturulan satır sayısını döndürür.
+    """
+    apartment_ids = [apartment_id] if apartment_id else [a.id for a in Apartment.query.with_entities(Apartment.id)]
+    created = 0
+
+    for apt_id in apartment_ids:
+        MonthlyFinancialSummary.query.filter_by(apartment_id=apt_id).delete()
+
+        transactions = db.session.query(
+            Transaction.transaction_date, Transaction.amount, Transaction.source_type, Transaction.description
+        ).filter(
+            Transaction.apartment_id == apt_id
+        ).order_by(Transaction.transaction_date.asc()).yield_per(1000)
+
+        balance = 0.0
+        current_period, current_rows = None, []
+        for when, amount, source_type, description in transactions:
+            period = month_start(when)
+            if current_period is not None and period != current_period:
+                summary = _summarize(apt_id, current_period, balance, current_rows)
+                db.session.add(MonthlyFinancialSummary(**summary))
+                balance, created = summary['closing_balance'], created + 1
+                current_rows = []
+            current_period = period
+            current_rows.append((amount, source_type, description))
+
+        if current_period is not None:
+            db.session.add(MonthlyFinancialSummary(**_summarize(apt_id, current_period, balance, current_rows)))
+            created += 1
+
+        db.session.commit()
+
+    return created
+
+
+@click.command('rebuild-financial-rollups')
+@click.option('--apartment-id', type=int, default=None, help="Sadece bu apartmanın özetlerini yeniden oluştur.")
+@with_appcontext
+def rebuild_rollups_command(apartment_id):
+    """Aylık finansal özet tablosunu işlem geçmişinden yeniden oluşturur."""
+    created = rebuild_rollups(apartment_id)
+    click.echo(f"{created} adet aylık özet satırı oluşturuldu.")
@@ -0,0 +1,32 @@
+# app/formatters.py
+"""
+API cevaplarındaki görüntüleme alanları (*_display) için önbellekli biçimlendiriciler.
+
+Aidat, hareket ve duyuru listelerinde aynı tutar ve tarihler satır satır tekrar
+eder (ör. bir dönemin tüm aidatları aynı tutar ve son ödeme tarihini taşır).
+Biçimlendirme sonuçları süreç içinde LRU önbellekte tutulur; tekrar eden
+değerler yeniden biçimlendirilmez. Ay adları uygulama açılışında ayarlanan
+LC_TIME yereline göre yazılır.
+"""
+
+from functools import lru_cache
+
+
+def format_tl(value):
+    # 7500.5 -> ₺7.500,50
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        v = 0.0
+    return _format_tl(v)
+
+
+@lru_cache(maxsize=4096)
+def _format_tl(v):
+    return f"₺{v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+@lru_cache(maxsize=4096)
+def format_date(value, fmt='%d %B %Y, %H:%M'):
+    """Tarih/saat değerini strftime biçimiyle yazar; değer yoksa boş metin döner."""
+    return value.strftime(fmt) if value else ''
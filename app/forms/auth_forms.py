@@ -1,6 +1,7 @@
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, BooleanField, SelectField
 from wtforms.validators import DataRequired, Email, EqualTo, Length, Optional, Regexp
+from app.notification_digest import NOTIFICATION_DIGEST_CHOICES
 
 # --- Hata Mesajları için Ortak Değişkenler ---
 MSG_REQUIRED = "Bu alan zorunludur."
@@ -97,6 +98,11 @@ class ProfileEditForm(FlaskForm):
         "Yeni Şifreyi Onayla", 
         validators=[Optional(), EqualTo("password", message=MSG_PASSWORDS_MATCH)]
     )
+    notification_digest = SelectField(
+        "Bildirim E-postaları",
+        choices=NOTIFICATION_DIGEST_CHOICES,
+        validators=[DataRequired(MSG_REQUIRED)]
+    )
     submit = SubmitField("Bilgileri Güncelle")
 
 class RequestResetForm(FlaskForm):
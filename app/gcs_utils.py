@@ -1,35 +1,40 @@
 # app/gcs_utils.py
 
-from google.cloud import storage
 from flask import current_app
-import uuid
+from app.storage import get_storage
+from urllib.parse import unquote
 
 def upload_to_gcs(file_to_upload, folder_name, return_gcs_uri=False):
     """
-    Bir dosyayı GCS'e yükler.
+    Bir dosyayı ayarlı depolama arka ucuna (varsayılan GCS) yükler.
     return_gcs_uri True ise GCS URI'ını, değilse public URL'i döndürür.
+    (Yerel arka uçta her iki durumda da dosyanın URL'i döner.)
     """
     try:
-        storage_client = storage.Client()
-        bucket_name = current_app.config.get('GCS_BUCKET_NAME')
-        if not bucket_name:
-            raise ValueError("GCS_BUCKET_NAME konfigürasyonda ayarlanmamış.")
-            
-        bucket = storage_client.bucket(bucket_name)
-
-        unique_filename = f"{folder_name}/{uuid.uuid4().hex}-{file_to_upload.filename}"
-        
-        blob = bucket.blob(unique_filename)
-        blob.upload_from_file(file_to_upload, content_type=file_to_upload.content_type)
+        backend = get_storage()
+        public_url, gcs_uri = backend.save(file_to_upload, folder_name)
 
         # === YENİ EKLENEN KONTROL ===
-        if return_gcs_uri:
+        if return_gcs_uri and backend.name == 'gcs':
             # Document AI'ın istediği format: gs://bucket_adi/dosya_adi
-            return f"gs://{bucket_name}/{unique_filename}"
-        
+            return gcs_uri
+
         # Varsayılan olarak, mevcut kod gibi public URL'i döndür
-        return blob.public_url
+        return public_url
 
     except Exception as e:
         current_app.logger.error(f"GCS Yükleme Hatası: {e}", exc_info=True)
-        return None
\ No newline at end of file
+        return None
+
+
+def gcs_uri_from_url(url):
+    """
+    upload_to_gcs'in döndürdüğü public URL'i Document AI'ın beklediği gs:// URI'ına çevirir.
+    Zaten gs:// ile başlıyorsa olduğu gibi döndürür.
+    """
+    if not url or url.startswith('gs://'):
+        return url
+    prefix = 'https://storage.googleapis.com/'
+    if url.startswith(prefix):
+        return 'gs://' + unquote(url[len(prefix):])
+    return None
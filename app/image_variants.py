@@ -0,0 +1,156 @@
+# app/image_variants.py
+"""
+Yüklenen resimler için arka planda küçük resim (thumbnail) ve küçültülmüş
+varyant üretimi.
+
+Talep ekleri ve blog kapak resimleri telefon kamerasının ürettiği tam boyutta
+saklanır. Yükleme kaydedildikten sonra bu modül orijinali depolamadan okur,
+yönünü EXIF'e göre düzeltir ve EXIF/konum bilgisi taşımayan WebP varyantlarını
+(IMAGE_VARIANTS) üretip URL'lerini modele yazar. Listeler küçük varyantı,
+detay sayfaları orta boy varyantı kullanır; varyant henüz yoksa orijinale düşülür.
+"""
+
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from app.extensions import db
+from app.models import Post, Request as RequestModel
+from app.storage import get_storage
+
+# Hedef → (model, kaynak URL alanı, {varyant adı: URL alanı})
+IMAGE_TARGETS = {
+    'request': (RequestModel, 'attachment_url', {'thumb': 'attachment_thumb_url', 'medium': 'attachment_medium_url'}),
+    'post': (Post, 'image_url', {'thumb': 'image_thumb_url', 'medium': 'image_medium_url'}),
+}
+
+# Varyant adları değişmeyen (uuid'li) nesnelere yazıldığı için uzun süre önbelleklenebilir
+VARIANT_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='image-variants')
+
+
+def reset_variants(obj, target):
+    """Kaynak resim değiştiğinde eski varyantları temizler (yenileri üretilene kadar orijinal gösterilir)."""
+    _, _, variant_fields = IMAGE_TARGETS[target]
+    for field in variant_fields.values():
+        setattr(obj, field, None)
+
+
+def start_image_processing(target, obj_id):
+    """
+    Varyant üretimini başlatır. Commit'ten sonra çağrılmalıdır.
+    IMAGE_VARIANTS_ASYNC kapalıysa (testler) aynı istekte çalıştırır.
+    """
+    app = current_app._get_current_object()
+    if app.config.get('IMAGE_VARIANTS_ASYNC', True):
+        _executor.submit(_run_job, app, target, obj_id)
+    else:
+        _run_job(app, target, obj_id)
+
+
+def _run_job(app, target, obj_id):
+    with app.app_context():
+        try:
+            generate_variants(target, obj_id)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Resim varyantları üretilemedi ({target} #{obj_id}): {e}", exc_info=True)
+        finally:
+            db.session.remove()
+
+
+def render_variants(data, sizes, quality):
+    """
+    Ham resim baytlarından {varyant adı: WebP baytları} üretir.
+    Resim olmayan içerikler (ör. PDF) için None döndürür.
+    """
+    try:
+        image = Image.open(io.BytesIO(data))
+        image.load()
+    except (UnidentifiedImageError, OSError):
+        return None
+
+    # Telefon fotoğraflarındaki döndürme bilgisini piksellere uygula; EXIF yeniden yazılmaz
+    image = ImageOps.exif_transpose(image)
+    image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+    variants = {}
+    for name, max_side in sizes.items():
+        variant = image.copy()
+        variant.thumbnail((max_side, max_side), Image.LANCZOS)
+        buffer = io.BytesIO()
+        variant.save(buffer, format='WEBP', quality=quality, method=4)
+        variants[name] = buffer.getvalue()
+    return variants
+
+
+def generate_variants(target, obj_id):
+    """Bir kaydın resmi için varyantları üretir ve URL'lerini kaydeder."""
+    model, source_field, variant_fields = IMAGE_TARGETS[target]
+    obj = model.query.get(obj_id)
+    source_url = getattr(obj, source_field, None) if obj else None
+    if not source_url:
+        return None
+
+    storage = get_storage()
+    source_key = storage.key_for_url(source_url)
+    if not source_key:
+        current_app.logger.warning(f"Resim varyantı için kaynak depolamada bulunamadı: {source_url}")
+        return None
+
+    config = current_app.config
+    variants = render_variants(
+        storage.read(source_key),
+        config.get('IMAGE_VARIANTS', {'thumb': 480, 'medium': 1280}),
+        config.get('IMAGE_WEBP_QUALITY', 80),
+    )
+    if variants is None:
+        return None
+
+    base_key = os.path.splitext(source_key)[0]
+    urls = {}
+    for name, data in variants.items():
+        urls[variant_fields[name]] = storage.save_bytes(
+            f"{base_key}-{name}.webp", data, 'image/webp', cache_control=VARIANT_CACHE_CONTROL
+        )
+
+    # Bu sırada resim değiştiyse eski resmin varyantlarını yazma.
+    # updated_at kendi değeriyle yazılır; varyant üretimi kaydı "güncellenmiş" göstermez
+    updated = model.query.filter(
+        model.id == obj_id,
+        getattr(model, source_field) == source_url
+    ).update({**urls, 'updated_at': model.updated_at}, synchronize_session=False)
+    db.session.commit()
+    if updated:
+        current_app.logger.info(f"Resim varyantları üretildi ({target} #{obj_id}): {list(variants)}")
+    return urls if updated else None
+
+
+@click.command('generate-image-variants')
+@click.option('--target', type=click.Choice(sorted(IMAGE_TARGETS)), default=None,
+              help="Sadece bu kayıt türü için üret (varsayılan: hepsi).")
+@with_appcontext
+def generate_variants_command(target):
+    """Varyantı olmayan mevcut talep eklerinin ve blog resimlerinin varyantlarını üretir."""
+    total = 0
+    for name in ([target] if target else sorted(IMAGE_TARGETS)):
+        model, source_field, variant_fields = IMAGE_TARGETS[name]
+        thumb_field = getattr(model, variant_fields['thumb'])
+        ids = [obj_id for obj_id, in db.session.query(model.id).filter(
+            getattr(model, source_field).isnot(None),
+            thumb_field.is_(None)
+        )]
+        for obj_id in ids:
+            try:
+                if generate_variants(name, obj_id):
+                    total += 1
+            except Exception as e:
+                db.session.rollback()
+                click.echo(f"{name} #{obj_id} atlandı: {e}")
+    click.echo(f"{total} kayıt için resim varyantları üretildi.")
@@ -0,0 +1,79 @@
+# app/json_provider.py
+"""
+Uygulamanın JSON sağlayıcısı (jsonify, api_success/api_error).
+
+'orjson' paketi kuruluysa cevaplar orjson ile doğrudan bayta yazılır (standart
+json modülünden belirgin şekilde hızlı); kurulu değilse standart kütüphane
+kullanılır. İki sağlayıcı da aynı çıktıyı üretir:
+  - datetime/date ISO 8601 metin olarak yazılır (Flask varsayılanındaki HTTP
+    tarih biçimi yerine),
+  - Decimal sayı (float) olarak yazılır,
+  - anahtarlar sıralanır, Türkçe karakterler \\u kaçışı olmadan UTF-8 yazılır.
+"""
+
+import dataclasses
+import decimal
+import uuid
+from datetime import date, datetime, time
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson  # opsiyonel bağımlılık: yoksa standart json kullanılır
+except ImportError:
+    orjson = None
+
+
+def _default(obj):
+    """Yerleşik olarak yazılamayan tipler için ortak dönüştürme."""
+    if isinstance(obj, (datetime, date, time)):
+        return obj.isoformat()
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if hasattr(obj, '__html__'):
+        return str(obj.__html__())
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class StdlibJSONProvider(DefaultJSONProvider):
+    """Standart json modülüyle, orjson sağlayıcısıyla aynı kurallarda yazan sağlayıcı."""
+
+    default = staticmethod(_default)
+    ensure_ascii = False
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """orjson ile yazan sağlayıcı; okuma (loads) da orjson ile yapılır."""
+
+    ensure_ascii = False
+
+    def _options(self):
+        options = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        if self._app.debug:
+            options |= orjson.OPT_INDENT_2
+        return options
+
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=_default, option=self._options()).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        body = orjson.dumps(obj, default=_default, option=self._options() | orjson.OPT_APPEND_NEWLINE)
+        return self._app.response_class(body, mimetype=self.mimetype)
+
+
+def json_provider_class(name='auto'):
+    """JSON_PROVIDER ayarına ('auto', 'orjson', 'stdlib') göre sağlayıcı sınıfını seçer."""
+    if name == 'stdlib' or orjson is None:
+        return StdlibJSONProvider
+    return OrjsonProvider
+
@@ -0,0 +1,201 @@
+# app/metrics.py
+"""
+Prometheus metrikleri ve /metrics endpoint'i.
+
+Toplanan metrikler:
+  - ays_http_request_duration_seconds / ays_http_requests_total: blueprint ve
+    endpoint bazında istek süresi histogramı ve durum kodlu istek sayısı
+  - ays_db_pool_connections_in_use: havuzdan alınmış veritabanı bağlantıları
+  - ays_cache_requests_total: önbellek isabet/ıskalama (sayfa, kullanıcı özeti)
+  - ays_notifications_total: sağlayıcı (fcm/hms/sendgrid/brevo) ve sonuca göre bildirim sayısı
+  - ays_login_attempts_total / ays_login_duration_seconds: web ve API girişleri
+  - ays_compression_bytes_total: sıkıştırma öncesi/sonrası bayt (oran = out / in)
+  - ays_job_queue_depth: bildirim kutusu ve dekont doğrulama kuyruğu (her okumada veritabanından)
+  - ays_cron_job_duration_seconds / ays_cron_job_last_success_timestamp_seconds
+
+gunicorn gibi çok işçili çalıştırmada her işçinin sayaçları ayrı süreçte
+tutulur. PROMETHEUS_MULTIPROC_DIR ortam değişkeni (uygulama başlamadan önce,
+boş bir dizin) ayarlanırsa işçiler değerlerini bu dizine yazar ve /metrics
+hepsini toplayarak döndürür. Bu modda gunicorn yapılandırmasına
+`child_exit = lambda server, worker: prometheus_client.multiprocess.mark_process_dead(worker.pid)`
+eklenmelidir; aksi halde kapanan işçilerin bağlantı sayıları toplamda kalır.
+
+/metrics, cron görevleri gibi sadece X-Appengine-Cron başlığıyla çağrılabilir.
+"""
+
+import os
+import time
+from functools import wraps
+
+from flask import current_app, g, make_response, request
+from prometheus_client import (
+    CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.multiprocess import MultiProcessCollector
+from sqlalchemy import event, func
+from sqlalchemy.pool import Pool
+
+from app.extensions import db
+
+HTTP_REQUEST_DURATION = Histogram(
+    'ays_http_request_duration_seconds', 'İstek işleme süresi',
+    ['blueprint', 'endpoint', 'method'],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+HTTP_REQUESTS = Counter(
+    'ays_http_requests_total', 'İstek sayısı', ['blueprint', 'endpoint', 'method', 'status'],
+)
+DB_POOL_IN_USE = Gauge(
+    'ays_db_pool_connections_in_use', 'Havuzdan alınmış veritabanı bağlantısı',
+    multiprocess_mode='livesum',
+)
+CACHE_REQUESTS = Counter(
+    'ays_cache_requests_total', 'Önbellek okumaları', ['cache', 'result'],
+)
+NOTIFICATIONS = Counter(
+    'ays_notifications_total', 'Gönderilen bildirim/e-posta sayısı', ['provider', 'outcome'],
+)
+LOGIN_ATTEMPTS = Counter(
+    'ays_login_attempts_total', 'Giriş denemeleri', ['outcome'],
+)
+LOGIN_DURATION = Histogram(
+    'ays_login_duration_seconds', 'Şifre doğrulama dahil giriş süresi',
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+COMPRESSION_BYTES = Counter(
+    'ays_compression_bytes_total', 'Sıkıştırılan cevap baytları', ['encoding', 'direction'],
+)
+CRON_JOB_DURATION = Histogram(
+    'ays_cron_job_duration_seconds', 'Cron görevi süresi', ['job', 'outcome'],
+    buckets=(0.1, 0.5, 1.0, 5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0),
+)
+CRON_JOB_LAST_SUCCESS = Gauge(
+    'ays_cron_job_last_success_timestamp_seconds', 'Cron görevinin son başarılı bitişi (unix)',
+    ['job'], multiprocess_mode='max',
+)
+
+
+# ──────────────────────────────────────────────────────────────
+# Diğer modüllerin çağırdığı kayıt fonksiyonları
+# ──────────────────────────────────────────────────────────────
+def record_cache(cache, result):
+    CACHE_REQUESTS.labels(cache, result).inc()
+
+
+def record_notifications(provider, **counts):
+    for outcome, value in counts.items():
+        if value:
+            NOTIFICATIONS.labels(provider, outcome).inc(value)
+
+
+def record_login(outcome, duration=None):
+    LOGIN_ATTEMPTS.labels(outcome).inc()
+    if duration is not None:
+        LOGIN_DURATION.observe(duration)
+
+
+def record_compression(encoding, bytes_in, bytes_out):
+    COMPRESSION_BYTES.labels(encoding, 'in').inc(bytes_in)
+    COMPRESSION_BYTES.labels(encoding, 'out').inc(bytes_out)
+
+
+def cron_job(fn):
+    """
+    Cron görevinin süresini ve son başarılı bitişini kaydeder (yetkisiz çağrılar hariç).
+    URL parametreleri etikete eklenir (ör. send_notification_digests:hourly); aynı fonksiyonun
+    farklı görevleri ayrı seriler olur. Parametreler sınırlı değerli olmalıdır (ör. any(...)).
+    """
+    @wraps(fn)
+    def wrapper(*args, **kwargs):
+        job = ':'.join([fn.__name__, *(str(value) for value in kwargs.values())])
+        started = time.perf_counter()
+        response = make_response(fn(*args, **kwargs))
+        if response.status_code != 403:
+            outcome = 'success' if response.status_code < 400 else 'failure'
+            CRON_JOB_DURATION.labels(job, outcome).observe(time.perf_counter() - started)
+            if outcome == 'success':
+                CRON_JOB_LAST_SUCCESS.labels(job).set(time.time())
+        return response
+    return wrapper
+
+
+# ──────────────────────────────────────────────────────────────
+# İstek süreleri ve bağlantı havuzu
+# ──────────────────────────────────────────────────────────────
+def _request_labels():
+    endpoint = request.url_rule.endpoint if request.url_rule else 'not_found'
+    return request.blueprint or 'app', endpoint, request.method
+
+
+def _start_request_timer():
+    g.metrics_started = time.perf_counter()
+
+
+def _observe_request(response):
+    started = g.pop('metrics_started', None)
+    if started is not None:
+        blueprint, endpoint, method = _request_labels()
+        HTTP_REQUEST_DURATION.labels(blueprint, endpoint, method).observe(time.perf_counter() - started)
+        HTTP_REQUESTS.labels(blueprint, endpoint, method, str(response.status_code)).inc()
+    return response
+
+
+@event.listens_for(Pool, 'checkout')
+def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+    DB_POOL_IN_USE.inc()
+
+
+@event.listens_for(Pool, 'checkin')
+def _on_checkin(dbapi_connection, connection_record):
+    DB_POOL_IN_USE.dec()
+
+
+# ──────────────────────────────────────────────────────────────
+# Kuyruk derinliği (okuma anında veritabanından)
+# ──────────────────────────────────────────────────────────────
+class _JobQueueCollector:
+    def describe(self):
+        return []
+
+    def collect(self):
+        # Bu modül bildirim/e-posta modüllerince import edildiği için döngü olmasın diye burada
+        from app.models import Dues, Notification
+        from app.notification_outbox import NOTIFICATION_PENDING, NOTIFICATION_SENDING
+        from app.receipt_processing import RECEIPT_PROCESSING, RECEIPT_QUEUED
+
+        depth = GaugeMetricFamily('ays_job_queue_depth', 'Bekleyen ve işlenen iş sayısı',
+                                  labels=['queue', 'status'])
+        for queue, column, statuses in (
+            ('notifications', Notification.status, (NOTIFICATION_PENDING, NOTIFICATION_SENDING)),
+            ('receipts', Dues.receipt_status, (RECEIPT_QUEUED, RECEIPT_PROCESSING)),
+        ):
+            counts = dict(db.session.query(column, func.count()).filter(column.in_(statuses)).group_by(column).all())
+            for status in statuses:
+                depth.add_metric([queue, status], counts.get(status, 0))
+        yield depth
+
+
+def _registries():
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        registry = CollectorRegistry()
+        MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    queues = CollectorRegistry()
+    queues.register(_JobQueueCollector())
+    return registry, queues
+
+
+def metrics_view():
+    if 'X-Appengine-Cron' not in request.headers:
+        current_app.logger.warning("Yetkisiz /metrics isteği engellendi.")
+        return "Forbidden", 403
+    body = b''.join(generate_latest(registry) for registry in _registries())
+    return body, 200, {'Content-Type': CONTENT_TYPE_LATEST}
+
+
+def init_metrics(app):
+    app.before_request(_start_request_timer)
+    app.after_request(_observe_request)
+    app.add_url_rule('/metrics', 'metrics', metrics_view)
@@ -4,6 +4,7 @@ from app.extensions import db
 from flask_login import UserMixin
 from datetime import datetime
 from sqlalchemy import UniqueConstraint, Table, Column, Integer, ForeignKey
+from sqlalchemy.dialects import mysql
 import enum
 
 
@@ -34,6 +35,27 @@ class User(UserMixin, db.Model):
     
     is_email_verified = db.Column(db.Boolean, default=False, nullable=False)
     is_active = db.Column(db.Boolean, default=False, nullable=False)
+    # Yetki özeti önbelleğindeki (app/principals.py) kaydın güncel olup olmadığı bununla
+    # denetlenir; rol, aktiflik, apartman, blok, ad veya apartman adı değiştiğinde artar
+    principal_version = db.Column(db.Integer, nullable=False, default=0, server_default='0')
+    # Bu andan (unix, milisaniye) önce üretilmiş tüm JWT'ler geçersizdir: tüm cihazlardan çıkış,
+    # hesap silme (bkz. app/auth_tokens.py)
+    tokens_valid_after = db.Column(db.BigInteger, nullable=True)
+
+    # Olay e-postaları: 'immediate' (her olayda), 'hourly' veya 'daily' (tek özet e-postası)
+    notification_digest = db.Column(db.String(10), nullable=False, default='immediate', server_default='immediate')
+    # Anlık e-postadan özete geçilen zaman; öncesindeki olaylar zaten tek tek e-postalanmıştır
+    notification_digest_since = db.Column(db.DateTime, nullable=True)
+
+    # Ad, e-posta, telefon ve daire no'nun Türkçe harfleri katlanmış küçük harf kopyası.
+    # Yönetici listelerindeki arama n-gram indeksi (MySQL ngram FULLTEXT / SQLite FTS5 trigram)
+    # bu sütun üzerindedir; bkz. app/search.py
+    search_text = db.Column(db.Text, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_user_search_text', 'search_text', mysql_prefix='FULLTEXT',
+                 mysql_with_parser='ngram').ddl_if(dialect='mysql'),
+    )
     
     # YENİ: User ve Apartment arasındaki ilişki
     apartment = db.relationship('Apartment', backref=db.backref('users', lazy='dynamic'))
@@ -116,6 +138,9 @@ class Dues(db.Model):
     receipt_filename = db.Column(db.String(255))
     payment_date = db.Column(db.DateTime)
     receipt_upload_date = db.Column(db.DateTime, nullable=True)
+    # Dekont doğrulama (OCR) durumu: queued / processing / auto_approved / needs_review
+    receipt_status = db.Column(db.String(20), nullable=True, index=True)
+    receipt_status_updated_at = db.Column(db.DateTime, nullable=True)
     
     user = db.relationship("User", backref=db.backref("dues", lazy=True))
     apartment = db.relationship('Apartment', backref=db.backref('dues', lazy=True))
@@ -188,8 +213,19 @@ class Request(db.Model):
     priority = db.Column(db.String(10), nullable=False, default="Orta")         # Düşük, Orta, Yüksek
     location = db.Column(db.String(100), nullable=True)                         # Asansör, Elektrik, ...; Diğer serbest metin
     attachment_url = db.Column(db.Text, nullable=True)                          # Yüklenen foto/pdf GCS URL'i
+    # Ek bir resimse arka planda üretilen EXIF'siz WebP varyantları (listelerde küçük olan kullanılır)
+    attachment_thumb_url = db.Column(db.Text, nullable=True)
+    attachment_medium_url = db.Column(db.Text, nullable=True)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     # -----------------------------------------
+
+    # Başlık + açıklamanın Türkçe harfleri katlanmış (ı→i, ş→s...) küçük harf kopyası.
+    # Arama indeksi (MySQL FULLTEXT / SQLite FTS5) bu sütun üzerindedir; bkz. app/search.py
+    search_text = db.Column(db.Text, nullable=True)
+
+    __table_args__ = (
+        db.Index('ix_request_search_text', 'search_text', mysql_prefix='FULLTEXT').ddl_if(dialect='mysql'),
+    )
     
 class Expense(db.Model):
     id = db.Column(db.Integer, primary_key=True)
@@ -387,6 +423,12 @@ class Post(db.Model):
     # SEO dostu URL'ler için (örn: /blog/apartman-yonetimi-ipuclari)
     slug = db.Column(db.String(255), unique=True, nullable=False)
     image_url = db.Column(db.String(512), nullable=True)
+    # Kapak resminin arka planda üretilen EXIF'siz WebP varyantları
+    image_thumb_url = db.Column(db.String(512), nullable=True)
+    image_medium_url = db.Column(db.String(512), nullable=True)
+    # Liste sayfaları için kayıt sırasında üretilen özet ve okuma süresi (bkz. app/posts.py)
+    excerpt = db.Column(db.String(300), nullable=True)
+    reading_minutes = db.Column(db.Integer, nullable=True)
     
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -404,6 +446,11 @@ class Post(db.Model):
     author = db.relationship('User', backref=db.backref('posts', lazy=True))
     apartment = db.relationship('Apartment', backref=db.backref('posts', lazy=True))
 
+    # Blog listesinin (yayınlanma tarihi, id) imleçli sayfalaması için
+    __table_args__ = (
+        db.Index('ix_post_published_created', 'is_published', 'created_at', 'id'),
+    )
+
     def __repr__(self):
         return f'<Post "{self.title}">'
 # ===== YENİ MODEL BİTİŞİ =====
@@ -510,3 +557,124 @@ class PushToken(db.Model):
 
     def __repr__(self):
         return f'<PushToken for User {self.user_id} ({self.service})>'
+
+
+# ===== İPTAL EDİLMİŞ JWT MODELİ =====
+class RevokedToken(db.Model):
+    """
+    Tek tek iptal edilmiş JWT'ler (çıkış, refresh rotasyonu; bkz. app/auth_tokens.py).
+    Token'ın süresi dolduktan sonra kayda gerek kalmaz; cron görevi ile silinir.
+    """
+    __tablename__ = 'revoked_token'
+    jti = db.Column(db.String(64), primary_key=True)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    def __repr__(self):
+        return f'<RevokedToken {self.jti}>'
+
+
+# ===== BİLDİRİM KUTUSU (OUTBOX) MODELİ =====
+class Notification(db.Model):
+    """
+    Bir kullanıcıya iletilecek tek bir olay bildirimi. Alan değişikliğiyle aynı
+    transaction'da yazılır ve app/notification_outbox.py tarafından gönderilir.
+    (user_id, event_key) benzersizdir; aynı olay bir kullanıcıya iki kez yazılmaz.
+    """
+    __tablename__ = 'notification'
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+
+    # Olayın kimliği (örn: 'announcement:12', 'request_reply:5:ab12cd34')
+    event_key = db.Column(db.String(120), nullable=False)
+
+    notification_type = db.Column(db.String(50), nullable=False)
+    item_id = db.Column(db.Integer, nullable=True)
+    title = db.Column(db.String(200), nullable=False)
+    body = db.Column(db.Text, nullable=False)
+
+    # pending → sending → sent | failed
+    status = db.Column(db.String(20), nullable=False, default='pending')
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    next_attempt_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    claim_token = db.Column(db.String(32), nullable=True, index=True)
+    claimed_at = db.Column(db.DateTime, nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    sent_at = db.Column(db.DateTime, nullable=True)
+    # Özet (digest) e-postasına eklendiği zaman; sadece özet tercih eden kullanıcılar için dolar
+    digested_at = db.Column(db.DateTime, nullable=True)
+
+    user = db.relationship('User', backref=db.backref('notifications', lazy='dynamic', cascade="all, delete-orphan"))
+
+    __table_args__ = (
+        UniqueConstraint('user_id', 'event_key', name='_user_event_uc'),
+        db.Index('ix_notification_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    def __repr__(self):
+        return f'<Notification {self.event_key} for User {self.user_id} ({self.status})>'
+
+
+# ===== AYLIK FİNANSAL ÖZET (ROLLUP) MODELİ =====
+class MonthlyFinancialSummary(db.Model):
+    """
+    Bir apartmanın bir aya ait gelir/gider toplamlarını ve açılış/kapanış
+    bakiyesini önceden hesaplanmış olarak tutar. Transaction yazıldıkça
+    app/financial_rollups.py tarafından artımlı olarak güncellenir.
+    """
+    __tablename__ = 'monthly_financial_summary'
+    id = db.Column(db.Integer, primary_key=True)
+    apartment_id = db.Column(db.Integer, db.ForeignKey('apartment.id'), nullable=False)
+
+    # Ayın ilk günü (örn: 2024-03-01)
+    period = db.Column(db.Date, nullable=False)
+
+    opening_balance = db.Column(db.Float, nullable=False, default=0.0)
+    closing_balance = db.Column(db.Float, nullable=False, default=0.0)
+    total_income = db.Column(db.Float, nullable=False, default=0.0)
+    total_expense = db.Column(db.Float, nullable=False, default=0.0)  # Pozitif olarak saklanır
+
+    # {"Aidat Gelirleri": 7500.0, ...} biçiminde kategori kırılımları
+    income_breakdown = db.Column(db.JSON, nullable=True)
+    expense_breakdown = db.Column(db.JSON, nullable=True)
+
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    apartment = db.relationship('Apartment', backref=db.backref('monthly_summaries', lazy='dynamic'))
+
+    __table_args__ = (UniqueConstraint('apartment_id', 'period', name='_apartment_period_uc'),)
+
+    def __repr__(self):
+        return f'<MonthlyFinancialSummary {self.apartment_id} {self.period:%Y-%m}>'
+
+
+# ===== PERFORMANS PROFİLİ MODELİ =====
+class PerformanceProfile(db.Model):
+    """
+    Yöneticinin çıkardığı tek istek profili veya örnekleyici sonucu (bkz. app/profiling.py).
+    Veritabanında tutulur; hangi işçi süreç üretirse üretsin tüm işçilerden listelenip indirilebilir.
+    """
+    __tablename__ = 'performance_profile'
+    id = db.Column(db.String(12), primary_key=True)
+    kind = db.Column(db.String(20), nullable=False)  # 'request' veya 'sampler'
+    owner_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
+    pid = db.Column(db.Integer, nullable=True)
+
+    method = db.Column(db.String(10), nullable=True)
+    path = db.Column(db.String(500), nullable=True)
+    endpoint = db.Column(db.String(120), nullable=True)
+    status = db.Column(db.Integer, nullable=True)
+    duration_ms = db.Column(db.Float, nullable=True)
+
+    # Özet metni (en pahalı fonksiyonlar / folded yığınlar) ve .prof (marshal edilmiş pstats) verisi.
+    # Gerçek bir isteğin dökümü 64 KB'ı kolayca aşar; MySQL'de LONGTEXT/LONGBLOB olarak oluşturulur.
+    text = db.Column(db.Text().with_variant(mysql.LONGTEXT(), 'mysql'), nullable=False)
+    data = db.Column(db.LargeBinary().with_variant(mysql.LONGBLOB(), 'mysql'), nullable=True)
+
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
+    owner = db.relationship('User', backref=db.backref('performance_profiles', lazy='dynamic', cascade="all, delete-orphan"))
+
+    def __repr__(self):
+        return f'<PerformanceProfile {self.id} ({self.kind})>'
@@ -0,0 +1,157 @@
+# app/notification_digest.py
+"""
+Olay e-postaları için özet (digest) tercihi.
+
+Kullanıcı User.notification_digest ile olay e-postalarını her olayda ('immediate'),
+saatlik ('hourly') veya günlük ('daily') tek bir özet olarak almayı seçer.
+Özet tercih eden kullanıcılar rotalardaki olay başına e-posta gönderiminden çıkarılır
+(immediate_email_users / wants_immediate_email). Özet e-postası, bildirim kutusundaki
+(Notification) henüz özetlenmemiş olaylardan cron görevi ile oluşturulur.
+
+Özet e-postası eşzamanlı gönderilir (send_email_now); olaylar sadece sağlayıcı
+e-postayı kabul ettikten sonra özetlenmiş sayılır, hata olursa bir sonraki
+çalışmada tekrar denenir. Anlık e-postadan özete yeni geçen kullanıcıya, geçişten
+önce zaten e-postayla bildirilmiş olaylar tekrar gönderilmez.
+"""
+
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+from flask import current_app, url_for
+from sqlalchemy import event, or_
+
+from app.email import send_email_now
+from app.extensions import db
+from app.models import Notification, User
+
+DIGEST_IMMEDIATE = 'immediate'
+DIGEST_HOURLY = 'hourly'
+DIGEST_DAILY = 'daily'
+
+NOTIFICATION_DIGEST_CHOICES = [
+    (DIGEST_IMMEDIATE, 'Her bildirimde hemen e-posta gönder'),
+    (DIGEST_HOURLY, 'Saatlik özet e-postası'),
+    (DIGEST_DAILY, 'Günlük özet e-postası'),
+]
+
+# Özete eklenecek olayların en eski zamanı: bir cron çalışması kaçsa bile olay kaybolmaz,
+# tercihini yeni değiştiren kullanıcıya da eski olaylar gönderilmez.
+DIGEST_LOOKBACK = {
+    DIGEST_HOURLY: timedelta(hours=2),
+    DIGEST_DAILY: timedelta(days=2),
+}
+
+DIGEST_PERIOD_LABELS = {
+    DIGEST_HOURLY: 'Son bir saatte',
+    DIGEST_DAILY: 'Son 24 saatte',
+}
+
+
+def wants_immediate_email(user):
+    """Kullanıcı olay e-postalarını her olayda mı almak istiyor?"""
+    return (user.notification_digest or DIGEST_IMMEDIATE) == DIGEST_IMMEDIATE
+
+
+def immediate_email_users(users):
+    """Toplu gönderimlerde sadece olay başına e-posta isteyen kullanıcıları döndürür."""
+    return [user for user in users if wants_immediate_email(user)]
+
+
+def _track_digest_switch(target, value, oldvalue, initiator):
+    # Anlık e-postadan özete geçişte zaman yazılır; özet bu zamandan önceki olayları almaz
+    previous = oldvalue if isinstance(oldvalue, str) else DIGEST_IMMEDIATE
+    if previous == DIGEST_IMMEDIATE and value != DIGEST_IMMEDIATE:
+        target.notification_digest_since = datetime.utcnow()
+
+
+# active_history: eski değer (anlık mı?) yüklenmemişse de karşılaştırılabilsin
+event.listen(User.notification_digest, 'set', _track_digest_switch, active_history=True)
+
+
+def _item_link(row):
+    """Bildirim türüne göre özet e-postasındaki bağlantıyı üretir."""
+    if row.notification_type == 'announcement':
+        return url_for('announcement.announcements', _external=True)
+    if row.notification_type == 'dues':
+        return url_for('resident.dues_list', _external=True)
+    if row.notification_type == 'poll_detail' and row.item_id:
+        return url_for('poll.poll_results', poll_id=row.item_id, _external=True)
+    if row.notification_type in ('polls', 'poll_detail'):
+        return url_for('poll.list_polls', _external=True)
+    if row.notification_type == 'request_detail' and row.item_id:
+        return url_for('resident.view_request', request_id=row.item_id, _external=True)
+    return url_for('resident.dashboard', _external=True)
+
+
+def send_digests(mode):
+    """
+    'hourly' veya 'daily' özet tercih eden her kullanıcıya, bekleyen olaylarını
+    tek bir e-postada gönderir. Olaylar e-posta sağlayıcıya teslim edildikten sonra
+    özetlenmiş kalır; gönderilemezse işaret geri alınır ve bir sonraki çalışmada tekrar
+    denenir (en az bir kez teslim). E-posta gönderilen kullanıcı sayısını döndürür.
+    """
+    if mode not in DIGEST_LOOKBACK:
+        raise ValueError(f"Geçersiz özet türü: {mode}")
+
+    # Bu çalışmanın işareti; saniyeye yuvarlanır ki kesirli saniye tutmayan DATETIME
+    # sütunlarında da (MySQL) `digested_at == now` ile bulunabilsin
+    now = datetime.utcnow().replace(microsecond=0)
+    rows = Notification.query.join(User, Notification.user_id == User.id).filter(
+        User.notification_digest == mode,
+        User.is_active == True,
+        Notification.digested_at.is_(None),
+        Notification.created_at >= now - DIGEST_LOOKBACK[mode],
+        or_(User.notification_digest_since.is_(None), Notification.created_at >= User.notification_digest_since)
+    ).order_by(Notification.user_id, Notification.created_at).all()
+
+    rows_by_user = defaultdict(list)
+    for row in rows:
+        rows_by_user[row.user_id].append(row)
+
+    sent = 0
+    for user_id, user_rows in rows_by_user.items():
+        # Olayları bu çalışma adına işaretle; aynı anda çalışan ikinci bir cron aynı olayları göndermez
+        claimed = Notification.query.filter(
+            Notification.id.in_([row.id for row in user_rows]),
+            Notification.digested_at.is_(None)
+        ).update({'digested_at': now}, synchronize_session=False)
+        db.session.commit()
+        if not claimed:
+            continue
+        if claimed != len(user_rows):
+            # Bazı olayları eşzamanlı çalışan başka bir cron aldı; bu çalışmanın aldıkları gönderilir
+            user_rows = Notification.query.filter(
+                Notification.id.in_([row.id for row in user_rows]),
+                Notification.digested_at == now
+            ).order_by(Notification.created_at).all()
+
+        user = user_rows[0].user
+        if not user.email:
+            continue
+        try:
+            items = [{
+                'title': row.title,
+                'body': row.body,
+                'link': _item_link(row),
+                'created_at': row.created_at,
+            } for row in user_rows]
+            send_email_now(
+                to=user.email,
+                subject=f"{len(items)} yeni bildiriminiz var",
+                template='email/notification_digest',
+                resident_name=user.name,
+                items=items,
+                period_label=DIGEST_PERIOD_LABELS[mode]
+            )
+            sent += 1
+        except Exception as e:
+            current_app.logger.error(f"Özet e-postası gönderilemedi (Kullanıcı: {user_id}): {e}")
+            # İşareti geri al; olaylar bir sonraki çalışmada (lookback süresi içinde) tekrar denenir
+            Notification.query.filter(
+                Notification.id.in_([row.id for row in user_rows]),
+                Notification.digested_at == now
+            ).update({'digested_at': None}, synchronize_session=False)
+            db.session.commit()
+
+    current_app.logger.info(f"{mode} özet: {len(rows)} olay, {sent} kullanıcıya e-posta gönderildi.")
+    return sent
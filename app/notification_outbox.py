@@ -0,0 +1,276 @@
+# app/notification_outbox.py
+"""
+Push bildirimleri için giden kutusu (outbox).
+
+Rotalar bildirimi doğrudan göndermez; enqueue_notification ile Notification
+satırlarını alan değişikliğiyle (duyuru, aidat, talep yanıtı...) AYNI
+transaction'a ekler ve commit'ten sonra start_notification_dispatch çağırır.
+Böylece kaydedilmeyen bir değişiklik için bildirim gitmez, kaydedilen her
+değişikliğin bildirimi de kaybolmaz.
+
+Gönderici (dispatch_pending_notifications) kutuyu parti parti boşaltır:
+  - Satırlar claim_token ile sahiplenilir; birden fazla işçi aynı satırı göndermez.
+  - Aynı kullanıcının bekleyen birden fazla bildirimi tek bir mesajda birleştirilir.
+  - Aynı mesajı alacak kullanıcıların token'ları tek bir toplu gönderimde toplanır.
+  - Gönderilemeyen satırlar artan beklemeyle yeniden denenir; yarıda kalanlar
+    cron görevi ile kuyruğa geri alınır (en az bir kez teslimat).
+"""
+
+import hashlib
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+from sqlalchemy import insert
+
+from app.extensions import db
+from app.models import Notification, PushToken
+from app.notifications import delete_push_tokens, send_push
+
+NOTIFICATION_PENDING = 'pending'
+NOTIFICATION_SENDING = 'sending'
+NOTIFICATION_SENT = 'sent'
+NOTIFICATION_FAILED = 'failed'
+
+# Bir kullanıcının farklı türdeki bildirimleri birleştirildiğinde kullanılan tür
+COALESCED_NOTIFICATION_TYPE = 'notifications'
+
+EVENT_KEY_MAX_LENGTH = 120
+
+# Tek işçi: aynı süreçte gönderimler sırayla yapılır, sonraki parti bir öncekini bekler
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='notification-outbox')
+
+
+# ──────────────────────────────────────────────────────────────
+# 1) Kuyruğa alma (rotalar)
+# ──────────────────────────────────────────────────────────────
+def make_event_key(kind, *parts):
+    """
+    Olay anahtarı üretir: make_event_key('announcement', 12) → 'announcement:12'.
+    Uzun parçalar (ör. açıklama metni) sütuna sığması için özetlenir.
+    """
+    key = ':'.join([kind] + [str(part) for part in parts])
+    if len(key) > EVENT_KEY_MAX_LENGTH:
+        digest = hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+        key = f"{kind}:{digest}"
+    return key
+
+
+def _insert_ignoring_duplicates(rows):
+    """(user_id, event_key) zaten varsa satırı sessizce atlayan toplu INSERT."""
+    dialect = db.session.get_bind().dialect.name
+    stmt = insert(Notification)
+    if dialect == 'mysql':
+        stmt = stmt.prefix_with('IGNORE')
+    elif dialect == 'sqlite':
+        stmt = stmt.prefix_with('OR IGNORE')
+    elif dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert as pg_insert
+        stmt = pg_insert(Notification).on_conflict_do_nothing(index_elements=['user_id', 'event_key'])
+    db.session.execute(stmt, rows)
+
+
+def enqueue_notification(user_ids, event_key, title, body, notification_type, item_id=None):
+    """
+    Verilen kullanıcılar için bildirimleri oturuma ekler. Commit çağıran tarafa aittir;
+    commit'ten sonra start_notification_dispatch çağrılmalıdır.
+    Aynı olay bir kullanıcıya daha önce yazılmışsa (ör. çift tıklama) tekrar yazılmaz.
+    """
+    user_ids = list(dict.fromkeys(uid for uid in user_ids if uid))
+    if not user_ids:
+        return
+    now = datetime.utcnow()
+    _insert_ignoring_duplicates([{
+        'user_id': user_id,
+        'event_key': event_key,
+        'notification_type': notification_type,
+        'item_id': item_id,
+        'title': title,
+        'body': body,
+        'status': NOTIFICATION_PENDING,
+        'attempts': 0,
+        'next_attempt_at': now,
+        'created_at': now,
+    } for user_id in user_ids])
+
+
+def start_notification_dispatch():
+    """
+    Bekleyen bildirimlerin gönderimini başlatır; rotayı bekletmez.
+    NOTIFICATION_DISPATCH_ASYNC kapalıysa (testler) aynı istekte gönderir.
+    """
+    app = current_app._get_current_object()
+    if app.config.get('NOTIFICATION_DISPATCH_ASYNC', True):
+        _executor.submit(_run_job, app)
+    else:
+        _run_job(app)
+
+
+def _run_job(app):
+    with app.app_context():
+        try:
+            dispatch_pending_notifications()
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Bildirim kutusu gönderimi başarısız: {e}", exc_info=True)
+        finally:
+            db.session.remove()
+
+
+# ──────────────────────────────────────────────────────────────
+# 2) Gönderim
+# ──────────────────────────────────────────────────────────────
+def _claim_batch(batch_size):
+    """Gönderim zamanı gelmiş en fazla batch_size satırı bu işçi adına sahiplenir."""
+    now = datetime.utcnow()
+    candidate_ids = [row_id for row_id, in db.session.query(Notification.id).filter(
+        Notification.status == NOTIFICATION_PENDING,
+        Notification.next_attempt_at <= now
+    ).order_by(Notification.id).limit(batch_size)]
+    if not candidate_ids:
+        return []
+
+    claim_token = uuid.uuid4().hex
+    Notification.query.filter(
+        Notification.id.in_(candidate_ids),
+        Notification.status == NOTIFICATION_PENDING
+    ).update({
+        'status': NOTIFICATION_SENDING,
+        'claim_token': claim_token,
+        'claimed_at': now,
+    }, synchronize_session=False)
+    db.session.commit()
+    return Notification.query.filter_by(claim_token=claim_token).order_by(Notification.id).all()
+
+
+def _coalesce(rows):
+    """Bir kullanıcının bekleyen bildirimlerinden tek bir mesaj (başlık, gövde, tür, id) üretir."""
+    if len(rows) == 1:
+        row = rows[0]
+        return row.title, row.body, row.notification_type, row.item_id
+
+    types = {row.notification_type for row in rows}
+    notification_type = types.pop() if len(types) == 1 else COALESCED_NOTIFICATION_TYPE
+    titles = [row.title for row in rows]
+    body = ", ".join(titles[:3]) + (f" ve {len(titles) - 3} bildirim daha" if len(titles) > 3 else "")
+    return f"{len(rows)} yeni bildiriminiz var", body, notification_type, None
+
+
+def _finish(rows, delivered):
+    now = datetime.utcnow()
+    max_attempts = current_app.config.get('NOTIFICATION_MAX_ATTEMPTS', 5)
+    for row in rows:
+        row.claim_token = None
+        if delivered:
+            row.status = NOTIFICATION_SENT
+            row.sent_at = now
+            continue
+        row.attempts += 1
+        if row.attempts >= max_attempts:
+            row.status = NOTIFICATION_FAILED
+        else:
+            row.status = NOTIFICATION_PENDING
+            # 2, 4, 8... dakika sonra tekrar dene
+            row.next_attempt_at = now + timedelta(minutes=2 ** row.attempts)
+
+
+def _send_batch(rows):
+    """Sahiplenilen satırları gönderir; (teslim edilen, yeniden denenecek) satır sayısını döndürür."""
+    rows_by_user = defaultdict(list)
+    for row in rows:
+        rows_by_user[row.user_id].append(row)
+
+    tokens_by_user = defaultdict(lambda: {'fcm': [], 'hms': []})
+    for push_token in PushToken.query.filter(PushToken.user_id.in_(list(rows_by_user))):
+        if push_token.service in ('fcm', 'hms'):
+            tokens_by_user[push_token.user_id][push_token.service].append(push_token.token)
+
+    # Aynı mesajı alacak kullanıcılar (ör. bir duyurunun tüm sakinleri) tek gönderimde toplanır
+    users_by_message = defaultdict(list)
+    for user_id, user_rows in rows_by_user.items():
+        users_by_message[_coalesce(user_rows)].append(user_id)
+
+    delivered, retried = 0, 0
+    dead_tokens_by_service = defaultdict(list)
+    for (title, body, notification_type, item_id), user_ids in users_by_message.items():
+        tokens_by_service = {
+            service: [t for uid in user_ids for t in tokens_by_user[uid][service]] for service in ('fcm', 'hms')
+        }
+        try:
+            failed_tokens, dead_tokens = send_push(tokens_by_service, title, body, notification_type, item_id)
+        except Exception as e:
+            current_app.logger.error(f"Bildirim gönderilirken hata oluştu ({notification_type}): {e}", exc_info=True)
+            failed_tokens, dead_tokens = {t for tokens in tokens_by_service.values() for t in tokens}, {}
+        for service, tokens in dead_tokens.items():
+            dead_tokens_by_service[service].extend(tokens)
+
+        # Sadece token'larından biri iletilemeyen kullanıcıların satırları tekrar denenir;
+        # diğerlerine aynı bildirim ikinci kez gitmez
+        delivered_rows, retry_rows = [], []
+        for uid in user_ids:
+            user_tokens = tokens_by_user[uid]['fcm'] + tokens_by_user[uid]['hms']
+            target = retry_rows if any(t in failed_tokens for t in user_tokens) else delivered_rows
+            target.extend(rows_by_user[uid])
+        _finish(delivered_rows, True)
+        _finish(retry_rows, False)
+        delivered += len(delivered_rows)
+        retried += len(retry_rows)
+
+    # Geçersiz token'lar satır durumlarıyla aynı işlemde silinir
+    delete_push_tokens(dead_tokens_by_service)
+    db.session.commit()
+    return delivered, retried
+
+
+def dispatch_pending_notifications(batch_size=None, max_batches=20):
+    """
+    Kutudaki gönderim zamanı gelmiş bildirimleri parti parti gönderir.
+    Teslim edilen bildirim sayısını döndürür.
+    """
+    batch_size = batch_size or current_app.config.get('NOTIFICATION_BATCH_SIZE', 500)
+    total_delivered = 0
+    for _ in range(max_batches):
+        rows = _claim_batch(batch_size)
+        if not rows:
+            break
+        delivered, retried = _send_batch(rows)
+        total_delivered += delivered
+        current_app.logger.info(
+            f"Bildirim kutusu: {len(rows)} bildirim işlendi ({delivered} teslim, {retried} yeniden denenecek)."
+        )
+    return total_delivered
+
+
+# ──────────────────────────────────────────────────────────────
+# 3) Bakım (cron)
+# ──────────────────────────────────────────────────────────────
+def requeue_stale_notifications():
+    """
+    Sunucu yeniden başladığı için 'sending' durumunda kalmış bildirimleri tekrar
+    kuyruğa alır (en az bir kez teslimat). Kuyruğa alınan satır sayısını döndürür.
+    """
+    stale_minutes = current_app.config.get('NOTIFICATION_STALE_MINUTES', 10)
+    cutoff = datetime.utcnow() - timedelta(minutes=stale_minutes)
+    requeued = Notification.query.filter(
+        Notification.status == NOTIFICATION_SENDING,
+        Notification.claimed_at < cutoff
+    ).update({
+        'status': NOTIFICATION_PENDING,
+        'claim_token': None,
+    }, synchronize_session=False)
+    db.session.commit()
+    return requeued
+
+
+def purge_old_notifications():
+    """Saklama süresini (NOTIFICATION_RETENTION_DAYS) doldurmuş gönderilmiş/başarısız satırları siler."""
+    retention_days = current_app.config.get('NOTIFICATION_RETENTION_DAYS', 90)
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    deleted = Notification.query.filter(
+        Notification.status.in_([NOTIFICATION_SENT, NOTIFICATION_FAILED]),
+        Notification.created_at < cutoff
+    ).delete(synchronize_session=False)
+    db.session.commit()
+    return deleted
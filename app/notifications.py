@@ -1,60 +1,96 @@
 # app/notifications.py
 
+import json
+
 import firebase_admin
 import requests
-import time
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from firebase_admin import credentials, messaging
+from firebase_admin import exceptions as firebase_exceptions
 from flask import current_app
+from requests.adapters import HTTPAdapter
 # DEĞİŞİKLİK: Artık sadece PushToken modelini import ediyoruz
 from .models import PushToken
+from .extensions import db
+from .cache import get_cache
+from .metrics import record_notifications
+
+# --- FCM ---
+# FCM tek bir multicast isteğinde en fazla 500 token kabul eder
+FCM_MULTICAST_LIMIT = 500
+# Uygulama kaldırılmış / token başka projeye ait: bu token'lara bir daha gönderilmez
+FCM_DEAD_TOKEN_ERRORS = (messaging.UnregisteredError, messaging.SenderIdMismatchError)
+# INVALID_ARGUMENT mesajın kendisinden de kaynaklanabilir (ör. çok büyük payload); sadece hata
+# metni token'ı işaret ediyorsa ("The registration token is not a valid FCM registration token") silinir
+FCM_INVALID_TOKEN_MESSAGE = 'registration token'
+
+# Büyük gönderimlerde parçaları eşzamanlı göndermek için ortak havuz
+_push_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='push')
 
-# --- Huawei için yardımcı fonksiyonlar ve değişkenler ---
-_hms_access_token = None
-_hms_token_expiration = 0
+# --- HMS (Huawei Push Kit) ---
 HMS_TOKEN_URL = "https://oauth-login.cloud.huawei.com/oauth2/v2/token"
 HMS_PUSH_URL_TEMPLATE = "https://push-api.cloud.huawei.com/v1/{app_id}/messages:send"
+# HMS tek bir istekte en fazla 1000 token kabul eder
+HMS_MULTICAST_LIMIT = 1000
+HMS_SUCCESS = '80000000'
+HMS_PARTIAL_SUCCESS = '80100000'      # bazı token'lar geçersiz; 'msg' içinde illegal_tokens listesi
+HMS_ALL_TOKENS_INVALID = '80300007'
+HMS_OAUTH_TOKEN_EXPIRED = '80200003'
 # -------------------------------------------------------------
 
 
-def _get_hms_access_token():
-    """Huawei Push Kit için geçerli bir Access Token alır."""
-    global _hms_access_token, _hms_token_expiration
-    if _hms_access_token and time.time() < _hms_token_expiration:
-        return _hms_access_token
+# --- Teslimat metrikleri (süreç içi sayaçlar) ---
+_push_metrics = Counter()
+_push_metrics_lock = threading.Lock()
 
-    app_id = current_app.config.get("HMS_APP_ID")
-    app_secret = current_app.config.get("HMS_APP_SECRET")
-    # --- YENİ EKLENEN KONTROL KODU ---
-    print(f"!!! KONTROL: app/notifications.py içindeki HMS_APP_ID: {app_id}")
-    if app_secret:
-        print(f"!!! KONTROL: app/notifications.py içindeki HMS_APP_SECRET (ilk 5 karakter): {app_secret[:5]}...")
-    else:
-        print(f"!!! KONTROL: app/notifications.py içindeki HMS_APP_SECRET: {app_secret}")
-    # --- KONTROL KODU SONU ---
-    if not app_id or not app_secret:
-        current_app.logger.error("HMS_APP_ID veya HMS_APP_SECRET yapılandırılmamış.")
-        return None
 
-    payload = {'grant_type': 'client_credentials', 'client_id': app_id, 'client_secret': app_secret}
-    try:
-        response = requests.post(HMS_TOKEN_URL, data=payload, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        _hms_access_token = data['access_token']
-        _hms_token_expiration = time.time() + int(data['expires_in']) - 60
-        current_app.logger.info("Yeni HMS Access Token başarıyla alındı.")
-        return _hms_access_token
-    except requests.exceptions.RequestException as e:
-        current_app.logger.error(f"HMS Access Token alınırken hata oluştu: {e}")
-        return None
+def _record_push_metrics(provider, **counts):
+    with _push_metrics_lock:
+        for name, value in counts.items():
+            _push_metrics[f"{provider}_{name}"] += value
+    record_notifications(provider, **counts)
 
 
-def _send_to_fcm(tokens, title, body, notification_type, item_id):
-    """Belirtilen FCM token listesine bildirim gönderir."""
-    if not tokens:
-        return
-    data_payload = {"type": notification_type, "id": str(item_id) if item_id is not None else ""}
-    message = messaging.MulticastMessage(
+def get_push_metrics():
+    """Süreç başladığından beri toplanan push teslimat sayaçlarını döndürür."""
+    with _push_metrics_lock:
+        return dict(_push_metrics)
+
+
+def _chunks(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def delete_push_tokens(dead_tokens_by_service):
+    """
+    Sağlayıcının kalıcı olarak geçersiz dediği token'ları ({'fcm': [...], 'hms': [...]})
+    çağıranın oturumunda siler; commit çağırana aittir. Silme bir savepoint içinde yapılır,
+    hata olursa sadece loglanır ve çağıranın işlemi bozulmaz. Silinen token sayısını döndürür.
+    """
+    total = 0
+    for service, tokens in dead_tokens_by_service.items():
+        if not tokens:
+            continue
+        try:
+            with db.session.begin_nested():
+                deleted = PushToken.query.filter(
+                    PushToken.service == service,
+                    PushToken.token.in_(tokens)
+                ).delete(synchronize_session=False)
+        except Exception as e:
+            current_app.logger.error(f"Geçersiz push token'ları silinemedi: {e}")
+            continue
+        _record_push_metrics(service, pruned=deleted)
+        current_app.logger.info(f"{deleted} adet geçersiz {service.upper()} token'ı silindi.")
+        total += deleted
+    return total
+
+
+def _build_fcm_message(tokens, title, body, data_payload):
+    return messaging.MulticastMessage(
         tokens=tokens,
         data=data_payload,
         notification=messaging.Notification(
@@ -77,86 +113,294 @@ def _send_to_fcm(tokens, title, body, notification_type, item_id):
             )
         )
     )
+
+
+def _send_fcm_chunk(tokens, title, body, data_payload):
+    """
+    Tek bir parçayı (en fazla FCM_MULTICAST_LIMIT token) gönderir.
+    (başarılı, başarısız, silinecek token'lar, tekrar denenecek token'lar, hata) döndürür.
+    Uygulama bağlamı gerektirmez.
+    """
+    message = _build_fcm_message(tokens, title, body, data_payload)
     try:
         # DEĞİŞİKLİK: send_multicast -> send_each_for_multicast (HTTP v1 uyumlu)
         response = messaging.send_each_for_multicast(message)
-        current_app.logger.info(f"{response.success_count} adet FCM bildirimi başarıyla gönderildi.")
     except Exception as e:
-        current_app.logger.error(f"FCM bildirimi gönderilirken hata oluştu: {e}")
+        return 0, len(tokens), [], list(tokens), e
 
+    dead_tokens, retry_tokens = [], []
+    for token, result in zip(tokens, response.responses):
+        if result.success:
+            continue
+        error = result.exception
+        if isinstance(error, FCM_DEAD_TOKEN_ERRORS):
+            dead_tokens.append(token)
+        elif isinstance(error, firebase_exceptions.InvalidArgumentError):
+            # Mesajdan kaynaklanan INVALID_ARGUMENT tekrar denense de düzelmez; token silinmez
+            if FCM_INVALID_TOKEN_MESSAGE in str(error).lower():
+                dead_tokens.append(token)
+        else:
+            # UNAVAILABLE, INTERNAL, kota aşımı...: geçici hata, tekrar denenebilir
+            retry_tokens.append(token)
 
-def _send_to_hms(tokens, title, body, notification_type, item_id):
-    """Belirtilen HMS token listesine bildirim gönderir."""
+    return response.success_count, response.failure_count, dead_tokens, retry_tokens, None
+
+
+def _send_to_fcm(tokens, title, body, notification_type, item_id):
+    """
+    Belirtilen FCM token listesine bildirim gönderir.
+    Liste FCM_MULTICAST_LIMIT'lik parçalara bölünür ve parçalar eşzamanlı gönderilir;
+    (iletilemeyen token'lar, kalıcı olarak geçersiz token'lar) döndürür. İletilemeyenler
+    parçası gönderilemeyen veya geçici hata alan token'lardır; geçersizler silinmek üzere
+    çağırana bırakılır (bkz. delete_push_tokens).
+    """
+    tokens = list(dict.fromkeys(tokens))  # aynı token iki kez kayıtlıysa bir kez gönder
     if not tokens:
-        return
-    access_token = _get_hms_access_token()
-    if not access_token:
-        return
-
-    app_id = current_app.config.get("HMS_APP_ID")
-    push_url = HMS_PUSH_URL_TEMPLATE.format(app_id=app_id)
-    headers = {'Authorization': f'Bearer {access_token}', 'Content-Type': 'application/json'}
-    payload = {
-        "validate_only": False,
-        "message": {
-            "notification": {"title": title, "body": body},
-            "android": {
-                "urgency": "HIGH",  # <-- YENİ EKLENEN "UYANDIRMA" AYARI
-                "notification": {
-                    "click_action": {"type": 3},
-                    "sound": "/raw/default"
-                }
-            },
-            "data": f'{{"type":"{notification_type}", "id":"{str(item_id) if item_id is not None else ""}"}}',
-            "token": tokens
-        }
-    }
-    try:
-        response = requests.post(push_url, headers=headers, json=payload, timeout=10)
-        response.raise_for_status()
-        current_app.logger.info(f"HMS bildirimi başarıyla gönderildi. Yanıt: {response.json()}")
-    except requests.exceptions.RequestException as e:
-        current_app.logger.error(f"HMS bildirimi gönderilirken hata oluştu: {e}")
+        return set(), []
+    data_payload = {"type": notification_type, "id": str(item_id) if item_id is not None else ""}
 
+    chunks = list(_chunks(tokens, FCM_MULTICAST_LIMIT))
+    if len(chunks) == 1:
+        results = [_send_fcm_chunk(chunks[0], title, body, data_payload)]
+    else:
+        futures = [_push_executor.submit(_send_fcm_chunk, chunk, title, body, data_payload) for chunk in chunks]
+        results = [future.result() for future in futures]
 
-def send_push_notification(user_id, title, body, notification_type, item_id=None):
+    success_count, failure_count, dead_tokens, failed_tokens = 0, 0, [], set()
+    for success, failure, dead, retry, error in results:
+        success_count += success
+        failure_count += failure
+        dead_tokens.extend(dead)
+        failed_tokens.update(retry)
+        if error:
+            current_app.logger.error(f"FCM bildirimi gönderilirken hata oluştu: {error}")
+
+    _record_push_metrics('fcm', requests=len(chunks), sent=len(tokens), delivered=success_count,
+                         failed=failure_count)
+    current_app.logger.info(
+        f"{success_count}/{len(tokens)} adet FCM bildirimi başarıyla gönderildi "
+        f"({len(chunks)} parça, {failure_count} hata, {len(dead_tokens)} geçersiz token)."
+    )
+    return failed_tokens, dead_tokens
+
+
+class HMSTokenExpired(Exception):
+    """HMS, gönderimde kullanılan OAuth token'ının süresinin dolduğunu bildirdi."""
+
+
+class HMSClient:
     """
-    [TEK KULLANICI] Belirtilen kullanıcıya, cihazının türüne göre bildirim gönderir.
-    (Talep yanıtlama, makbuz onayı gibi tekil durumlar için kullanılır)
+    Huawei Push Kit istemcisi.
+
+    Tüm gönderimler bağlantı havuzlu tek bir requests.Session üzerinden yapılır.
+    OAuth erişim token'ı uygulama önbelleğinde (get_cache) saklanır; CACHE_REDIS_URL
+    ayarlıysa tüm işçi süreçleri aynı token'ı kullanır. Süreç içinde token'ı aynı
+    anda yalnızca bir thread yeniler.
     """
-    user_tokens = PushToken.query.filter_by(user_id=user_id).all()
-    if not user_tokens:
-        current_app.logger.warning(f"Kullanıcının (ID: {user_id}) push token'ı yok.")
-        return
 
-    fcm_tokens = [pt.token for pt in user_tokens if pt.service == 'fcm']
-    hms_tokens = [pt.token for pt in user_tokens if pt.service == 'hms']
-    
-    _send_to_fcm(fcm_tokens, title, body, notification_type, item_id)
-    _send_to_hms(hms_tokens, title, body, notification_type, item_id)
+    def __init__(self, app_id, app_secret, cache, pool_size=4, timeout=10):
+        self.app_id = app_id
+        self._app_secret = app_secret
+        self._cache = cache
+        self._cache_key = f"hms:access_token:{app_id}"
+        self._lock = threading.Lock()
+        self.timeout = timeout
+        self.push_url = HMS_PUSH_URL_TEMPLATE.format(app_id=app_id)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+
+    def get_access_token(self, expired_token=None):
+        """
+        Geçerli erişim token'ını döndürür; önbellekte yoksa (veya önbellekteki
+        token 'expired_token' ise) yenisini alır. Alınamazsa RequestException fırlatır.
+        """
+        token = self._cache.get(self._cache_key)
+        if token and token != expired_token:
+            return token
+
+        with self._lock:
+            # Kilidi beklerken başka bir thread/süreç token'ı yenilemiş olabilir
+            token = self._cache.get(self._cache_key)
+            if token and token != expired_token:
+                return token
+
+            response = self.session.post(HMS_TOKEN_URL, data={
+                'grant_type': 'client_credentials',
+                'client_id': self.app_id,
+                'client_secret': self._app_secret,
+            }, timeout=self.timeout)
+            response.raise_for_status()
+            data = response.json()
+            token = data['access_token']
+            self._cache.set(self._cache_key, token, ttl=max(int(data['expires_in']) - 60, 1))
+            current_app.logger.info("Yeni HMS Access Token başarıyla alındı.")
+            return token
+
+    def send_chunk(self, access_token, tokens, message):
+        """
+        Tek bir parçayı (en fazla HMS_MULTICAST_LIMIT token) gönderir.
+        (başarılı, başarısız, silinecek token'lar) döndürür. Uygulama bağlamı gerektirmez.
+        OAuth token'ının süresi dolmuşsa HMSTokenExpired fırlatır.
+        """
+        payload = {"validate_only": False, "message": dict(message, token=tokens)}
+        headers = {'Authorization': f'Bearer {access_token}', 'Content-Type': 'application/json'}
+        response = self.session.post(self.push_url, headers=headers, json=payload, timeout=self.timeout)
+        if response.status_code == 401:
+            raise HMSTokenExpired()
+        response.raise_for_status()
+
+        result = response.json()
+        code = result.get('code')
+        if code == HMS_SUCCESS:
+            return len(tokens), 0, []
+        if code == HMS_OAUTH_TOKEN_EXPIRED:
+            raise HMSTokenExpired()
+        if code == HMS_ALL_TOKENS_INVALID:
+            return 0, len(tokens), list(tokens)
+        if code == HMS_PARTIAL_SUCCESS:
+            try:
+                details = json.loads(result.get('msg') or '{}')
+            except ValueError:
+                details = {}
+            illegal_tokens = [t for t in details.get('illegal_tokens', []) if t in tokens]
+            failure = int(details.get('failure', len(illegal_tokens)))
+            return len(tokens) - failure, failure, illegal_tokens
+        raise requests.exceptions.RequestException(f"HMS hata kodu {code}: {result.get('msg')}")
+
+    def _send_chunk_safe(self, access_token, tokens, message):
+        try:
+            return self.send_chunk(access_token, tokens, message) + (None,)
+        except HMSTokenExpired as e:
+            return 0, 0, [], e
+        except requests.exceptions.RequestException as e:
+            return 0, len(tokens), [], e
+
+    def send(self, tokens, message):
+        """
+        Token listesini HMS_MULTICAST_LIMIT'lik parçalar halinde gönderir.
+        Süresi dolmuş OAuth token'ı bir kez yenilenip ilgili parçalar tekrar gönderilir.
+        (parça sayısı, başarılı, başarısız, silinecek token'lar, iletilemeyen token'lar, hatalar) döndürür.
+        """
+        access_token = self.get_access_token()
+        pending = list(_chunks(tokens, HMS_MULTICAST_LIMIT))
+        request_count, success_count, failure_count = 0, 0, 0
+        dead_tokens, failed_tokens, errors = [], [], []
+
+        for attempt in range(2):
+            request_count += len(pending)
+            if len(pending) == 1:
+                results = [self._send_chunk_safe(access_token, pending[0], message)]
+            else:
+                futures = [_push_executor.submit(self._send_chunk_safe, access_token, chunk, message)
+                           for chunk in pending]
+                results = [future.result() for future in futures]
+
+            expired_chunks = []
+            for chunk, (success, failure, dead, error) in zip(pending, results):
+                if isinstance(error, HMSTokenExpired):
+                    expired_chunks.append(chunk)
+                    continue
+                success_count += success
+                failure_count += failure
+                dead_tokens.extend(dead)
+                if error:
+                    failed_tokens.extend(chunk)
+                    errors.append(error)
 
+            if not expired_chunks:
+                break
+            if attempt == 0:
+                access_token = self.get_access_token(expired_token=access_token)
+                pending = expired_chunks
+            else:
+                failure_count += sum(len(chunk) for chunk in expired_chunks)
+                failed_tokens.extend(token for chunk in expired_chunks for token in chunk)
+                errors.append(HMSTokenExpired("HMS erişim token'ı yenilendikten sonra da reddedildi."))
 
-# ===== YENİ EKlenen OPTİMİZE EDİLMİŞ FONKSİYON =====
-def send_notification_to_users(users, title, body, notification_type, item_id=None):
+        return request_count, success_count, failure_count, dead_tokens, failed_tokens, errors
+
+
+def get_hms_client():
+    """Uygulamanın HMS istemcisini döndürür; HMS ayarlı değilse None."""
+    app = current_app._get_current_object()
+    client = app.extensions.get('hms_client')
+    if client is None:
+        app_id = app.config.get("HMS_APP_ID")
+        app_secret = app.config.get("HMS_APP_SECRET")
+        if not app_id or not app_secret:
+            app.logger.error("HMS_APP_ID veya HMS_APP_SECRET yapılandırılmamış.")
+            return None
+        client = HMSClient(app_id, app_secret, get_cache(), pool_size=app.config.get('HMS_HTTP_POOL_SIZE', 4))
+        app.extensions['hms_client'] = client
+    return client
+
+
+def _build_hms_message(title, body, data_payload):
+    return {
+        "notification": {"title": title, "body": body},
+        "android": {
+            "urgency": "HIGH",  # <-- YENİ EKLENEN "UYANDIRMA" AYARI
+            "notification": {
+                "click_action": {"type": 3},
+                "sound": "/raw/default"
+            }
+        },
+        # HMS 'data' alanını JSON metni olarak bekler
+        "data": json.dumps(data_payload),
+    }
+
+
+def _send_to_hms(tokens, title, body, notification_type, item_id):
     """
-    [ÇOKLU KULLANICI] Verilen kullanıcı listesine tek seferde bildirim gönderir.
-    (Duyuru, anket gibi toplu durumlar için kullanılır)
+    Belirtilen HMS token listesine bildirim gönderir.
+    Liste HMS_MULTICAST_LIMIT'lik parçalara bölünür. (iletilemeyen token'lar, HMS'in
+    geçersiz dediği token'lar) döndürür. HMS ayarlı değilse token'lar atlanır (tekrar
+    denemek sonucu değiştirmez) ve iletilemeyen sayılmaz.
     """
-    if not users:
-        return
+    tokens = list(dict.fromkeys(tokens))
+    if not tokens:
+        return set(), []
+    client = get_hms_client()
+    if client is None:
+        current_app.logger.warning(f"HMS ayarlı olmadığı için {len(tokens)} HMS token'ına gönderilmedi.")
+        _record_push_metrics('hms', skipped=len(tokens))
+        return set(), []
 
-    user_ids = [user.id for user in users]
-    all_tokens = PushToken.query.filter(PushToken.user_id.in_(user_ids)).all()
+    data_payload = {"type": notification_type, "id": str(item_id) if item_id is not None else ""}
+    try:
+        request_count, success_count, failure_count, dead_tokens, failed_tokens, errors = client.send(
+            tokens, _build_hms_message(title, body, data_payload)
+        )
+    except requests.exceptions.RequestException as e:
+        current_app.logger.error(f"HMS Access Token alınırken hata oluştu: {e}")
+        _record_push_metrics('hms', sent=len(tokens), failed=len(tokens))
+        return set(tokens), []
 
-    if not all_tokens:
-        current_app.logger.warning("Toplu bildirim için hiçbir kullanıcıda push token'ı bulunamadı.")
-        return
+    for error in errors:
+        current_app.logger.error(f"HMS bildirimi gönderilirken hata oluştu: {error}")
 
-    fcm_tokens = [pt.token for pt in all_tokens if pt.service == 'fcm']
-    hms_tokens = [pt.token for pt in all_tokens if pt.service == 'hms']
+    _record_push_metrics('hms', requests=request_count, sent=len(tokens), delivered=success_count,
+                         failed=failure_count)
+    current_app.logger.info(
+        f"{success_count}/{len(tokens)} adet HMS bildirimi başarıyla gönderildi "
+        f"({request_count} istek, {failure_count} hata, {len(dead_tokens)} geçersiz token)."
+    )
+    return set(failed_tokens), dead_tokens
 
-    current_app.logger.info(f"Toplu bildirim gönderiliyor: {len(fcm_tokens)} FCM, {len(hms_tokens)} HMS alıcısı.")
 
-    _send_to_fcm(fcm_tokens, title, body, notification_type, item_id)
-    _send_to_hms(hms_tokens, title, body, notification_type, item_id)
-# ===== YENİ FONKSİYON SONU =====
+def send_push(tokens_by_service, title, body, notification_type, item_id=None):
+    """
+    Bildirimi servis başına token listelerine ({'fcm': [...], 'hms': [...]}) gönderir.
+    (iletilemeyen token'lar, servis başına geçersiz token'lar) döndürür. İletilemeyenler tekrar
+    denenmelidir; kalıcı olarak geçersiz token'lar ve ayarlı olmayan servise ait token'lar bu
+    kümede yer almaz. Geçersiz token'lar veritabanına dokunulmadan döndürülür; çağıran kendi
+    işleminde delete_push_tokens ile siler.
+    """
+    failed_tokens, dead_tokens_by_service = set(), {}
+    for service, send in (('fcm', _send_to_fcm), ('hms', _send_to_hms)):
+        failed, dead = send(tokens_by_service.get(service, []), title, body, notification_type, item_id)
+        failed_tokens |= failed
+        dead_tokens_by_service[service] = dead
+    return failed_tokens, dead_tokens_by_service
@@ -0,0 +1,173 @@
+# app/page_cache.py
+"""
+Giriş yapmamış ziyaretçiler için tam sayfa önbelleği.
+
+Ana sayfa, blog ve yasal metin sayfaları arama motoru botları ve pazarlama
+trafiği tarafından çok okunur, içerikleri ise nadiren değişir. cache_page ile
+işaretlenen bir view'ın anonim GET cevabı (host + yol + sorgu anahtarıyla)
+önbelleğe (get_cache) yazılır; sonraki isabetlerde view, veritabanı sorguları ve
+Jinja hiç çalışmaz.
+
+Geçersiz kılma vekil anahtarlarla (surrogate key) yapılır: her sayfa 'blog',
+'post:<slug>' gibi anahtarlarla etiketlenir ve kaydedildiği andaki anahtar
+sürümlerini saklar. Bir blog yazısı eklenip/düzenlenip/silindiğinde commit'ten
+sonra ilgili anahtarların sürümü değişir; eski sürümle kaydedilmiş sayfalar bir
+sonraki istekte yeniden üretilir.
+
+Önbellek süreç içi bellekse sürümleri sadece commit eden işçi değiştirir. Bu
+yüzden veritabanından türeyen sayfalar bir damgayla (stamp) işaretlenir: blog
+sayfaları için yayınlanmış yazıların sayısı ve en yeni updated_at değeri (tek bir
+toplama sorgusu, bkz. app/sitemap.py). Damga her isabette okunur ve sayfanın
+kaydedildiği andaki değerle karşılaştırılır; farklıysa sayfa yeniden üretilir.
+Böylece diğer işçiler eski veya silinmiş yazıları sunmaz.
+"""
+
+import hashlib
+import threading
+import uuid
+from collections import Counter
+from functools import wraps
+
+from flask import current_app, has_app_context, request, session
+from flask_login import current_user
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.cache import get_cache
+from app.metrics import record_cache
+from app.models import Post
+
+# Commit'i bekleyen, sürümü değiştirilecek vekil anahtarlar (session.info içinde)
+_PENDING_PURGES = 'ays_page_cache_purges'
+
+# Önbellekten dönen cevaba taşınan başlıklar (Set-Cookie gibi oturuma özgü başlıklar asla saklanmaz)
+CACHED_HEADERS = ('Content-Type', 'Content-Language')
+
+_page_cache_metrics = Counter()
+_page_cache_metrics_lock = threading.Lock()
+
+
+def _record(name):
+    with _page_cache_metrics_lock:
+        _page_cache_metrics[name] += 1
+    record_cache('page', name)
+
+
+def get_page_cache_metrics():
+    """Süreç başladığından beri sayfa önbelleği isabet/ıskalama sayaçları."""
+    with _page_cache_metrics_lock:
+        return dict(_page_cache_metrics)
+
+
+def _version_key(surrogate_key):
+    return f"page_version:{surrogate_key}"
+
+
+def _page_key():
+    raw = f"{request.host}{request.full_path}"
+    return f"page:{hashlib.sha1(raw.encode('utf-8')).hexdigest()}"
+
+
+def _is_cacheable_request():
+    return (
+        current_app.config.get('PAGE_CACHE_ENABLED', True)
+        and request.method in ('GET', 'HEAD')
+        and not current_user.is_authenticated
+        # Bekleyen flash mesajı olan ziyaretçiye başkasının sayfası gösterilmez
+        and '_flashes' not in session
+    )
+
+
+def _is_cacheable_response(response):
+    return (
+        response.status_code == 200
+        and response.mimetype == 'text/html'
+        and not response.direct_passthrough
+        and not response.is_streamed
+        and 'Set-Cookie' not in response.headers
+    )
+
+
+def cache_page(*surrogate_keys, ttl=None, stamp=None):
+    """
+    View'ın anonim GET cevabını önbelleğe alır. Vekil anahtarlar sabit metin veya
+    view argümanlarından anahtar üreten bir fonksiyon olabilir:
+
+        @cache_page(lambda slug: f"post:{slug}", stamp=published_posts_stamp)
+
+    stamp, sayfanın dayandığı verinin veritabanındaki damgasını döndüren bir
+    fonksiyondur; damga değişmişse önbellekteki sayfa kullanılmaz.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if not _is_cacheable_request():
+                return view(*args, **kwargs)
+
+            keys = [key(**kwargs) if callable(key) else key for key in surrogate_keys]
+            cache = get_cache()
+            page_key = _page_key()
+            versions = {key: cache.get(_version_key(key)) for key in keys}
+            data_stamp = stamp() if stamp is not None else None
+
+            entry = cache.get(page_key)
+            if entry is not None and entry['versions'] == versions and entry.get('stamp') == data_stamp:
+                _record('hit')
+                response = current_app.response_class(entry['body'], status=entry['status'], headers=entry['headers'])
+                response.headers['X-Cache'] = 'HIT'
+                return response
+
+            _record('miss')
+            response = current_app.make_response(view(*args, **kwargs))
+            if _is_cacheable_response(response):
+                cache.set(page_key, {
+                    'body': response.get_data(as_text=True),
+                    'status': response.status_code,
+                    'headers': {name: response.headers[name] for name in CACHED_HEADERS if name in response.headers},
+                    'versions': versions,
+                    'stamp': data_stamp,
+                }, ttl=ttl or current_app.config.get('PAGE_CACHE_TTL', 600))
+                response.headers['X-Cache'] = 'MISS'
+            return response
+        return wrapper
+    return decorator
+
+
+def purge_pages(*surrogate_keys):
+    """Vekil anahtarlarla etiketlenmiş tüm önbellekli sayfaları geçersiz kılar."""
+    cache = get_cache()
+    for key in surrogate_keys:
+        # Sürüm anahtarları süresizdir; süresi dolup None'a dönen bir sürüm eski sayfayı geri getirmesin
+        cache.set(_version_key(key), uuid.uuid4().hex)
+
+
+# ──────────────────────────────────────────────────────────────
+# ORM olayları: blog yazısı değiştiğinde ilgili sayfalar commit'ten sonra geçersiz olur
+# ──────────────────────────────────────────────────────────────
+@event.listens_for(Post, 'after_insert')
+@event.listens_for(Post, 'after_update')
+@event.listens_for(Post, 'after_delete')
+def _collect_post_keys(mapper, connection, target):
+    session = object_session(target)
+    if session is None:
+        return
+    keys = {'blog', f"post:{target.slug}"}
+    # Slug değiştiyse eski adresteki sayfa da düşer
+    keys.update(f"post:{slug}" for slug in inspect(target).attrs.slug.history.deleted if slug)
+    session.info.setdefault(_PENDING_PURGES, set()).update(keys)
+
+
+@event.listens_for(Session, 'after_commit')
+def _purge_after_commit(session):
+    keys = session.info.pop(_PENDING_PURGES, None)
+    if not keys or not has_app_context():
+        return
+    try:
+        purge_pages(*keys)
+    except Exception as e:
+        current_app.logger.error(f"Sayfa önbelleği temizlenemedi ({', '.join(sorted(keys))}): {e}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_PURGES, None)
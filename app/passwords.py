@@ -0,0 +1,174 @@
+# app/passwords.py
+"""
+Giriş sırasında şifre doğrulaması.
+
+Şifre özetini (scrypt/pbkdf2) doğrulamak kasıtlı olarak pahalıdır. Sabah
+saatlerinde mobil uygulamadan gelen toplu girişler tüm işçileri bu işle meşgul
+edip diğer endpoint'leri bekletmesin diye doğrulama, boyutu sınırlı bir thread
+havuzunda yapılır (hashlib bu sırada GIL'i bırakır):
+
+  - Aynı anda en fazla PASSWORD_HASH_WORKERS doğrulama çalışır, en fazla
+    PASSWORD_HASH_MAX_PENDING istek sıra bekler. Sıra doluysa istek beklemeden
+    PasswordCheckOverloaded ile reddedilir (rotalar 503 döner).
+  - Yeni şifreler PASSWORD_HASH_METHOD ile özetlenir. Eski yöntem veya iş
+    yüküyle kaydedilmiş bir şifre, başarılı girişte yeni ayarla yeniden özetlenir.
+  - Giriş süreleri (sıra beklemesi dahil) get_login_metrics ile p50/p99 olarak alınır.
+"""
+
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from functools import lru_cache
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+from app.extensions import db
+from app.metrics import record_login
+
+_init_lock = threading.Lock()
+
+# Süreç başından beri giriş sonuçları ve son girişlerin süreleri (saniye)
+_login_metrics = Counter()
+_login_durations = deque(maxlen=2048)
+_login_metrics_lock = threading.Lock()
+
+
+class PasswordCheckOverloaded(Exception):
+    """Şifre doğrulama sırası dolu veya zaman aşımı; istek hemen reddedilir."""
+
+
+class PasswordHashPool:
+    """Sınırlı sayıda işçi ve sınırlı bekleme sırası olan şifre özeti havuzu."""
+
+    def __init__(self, workers, max_pending, timeout):
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+        self._slots = threading.BoundedSemaphore(workers + max_pending)
+        self._timeout = timeout
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self):
+        """Çalışan ve sırada bekleyen doğrulama sayısı."""
+        return self._in_flight
+
+    def _release(self, _future):
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def run(self, fn, *args):
+        if not self._slots.acquire(blocking=False):
+            raise PasswordCheckOverloaded()
+        with self._lock:
+            self._in_flight += 1
+        try:
+            future = self._executor.submit(fn, *args)
+        except Exception:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        try:
+            return future.result(timeout=self._timeout)
+        except FutureTimeoutError:
+            raise PasswordCheckOverloaded()
+
+
+def get_password_pool():
+    """Uygulamanın şifre havuzunu döndürür (uygulama başına bir kez oluşturulur)."""
+    app = current_app._get_current_object()
+    pool = app.extensions.get('password_hash_pool')
+    if pool is None:
+        with _init_lock:
+            pool = app.extensions.get('password_hash_pool')
+            if pool is None:
+                pool = PasswordHashPool(
+                    workers=app.config.get('PASSWORD_HASH_WORKERS', 2),
+                    max_pending=app.config.get('PASSWORD_HASH_MAX_PENDING', 16),
+                    timeout=app.config.get('PASSWORD_HASH_TIMEOUT', 10),
+                )
+                app.extensions['password_hash_pool'] = pool
+    return pool
+
+
+@lru_cache(maxsize=8)
+def _method_prefix(method):
+    """Yöntemin kayıtlı özetlerdeki tam hali (ör. 'scrypt' → 'scrypt:32768:8:1')."""
+    return generate_password_hash('', method=method).split('$', 1)[0]
+
+
+def hash_password(password):
+    """Yeni bir şifreyi PASSWORD_HASH_METHOD ile özetler."""
+    return generate_password_hash(password, method=current_app.config['PASSWORD_HASH_METHOD'])
+
+
+def needs_rehash(password_hash):
+    """Kayıtlı özet, ayarlı yöntem ve iş yüküyle üretilmemişse True döner."""
+    method = current_app.config['PASSWORD_HASH_METHOD']
+    return password_hash.split('$', 1)[0] != _method_prefix(method)
+
+
+def _record_login(outcome, duration=None):
+    with _login_metrics_lock:
+        _login_metrics[outcome] += 1
+        if duration is not None:
+            _login_durations.append(duration)
+    record_login(outcome, duration)
+
+
+def authenticate(user, password):
+    """
+    Şifreyi havuzda doğrular; gerekiyorsa yeni ayarla yeniden özetleyip kaydeder.
+    Kullanıcı yoksa veya şifre yanlışsa False döner. Havuz doluysa
+    PasswordCheckOverloaded fırlatır.
+    """
+    started = time.perf_counter()
+    outcome = 'failure'
+    try:
+        if user is None:
+            return False
+        pool = get_password_pool()
+        if not pool.run(check_password_hash, user.password, password):
+            return False
+        outcome = 'success'
+
+        if needs_rehash(user.password):
+            try:
+                user.password = pool.run(
+                    generate_password_hash, password, current_app.config['PASSWORD_HASH_METHOD']
+                )
+                db.session.commit()
+                _record_login('rehashed')
+            except PasswordCheckOverloaded:
+                # Giriş engellenmez; yeniden özetleme sonraki girişe kalır
+                pass
+            except Exception as e:
+                db.session.rollback()
+                current_app.logger.error(f"Şifre yeniden özetlenemedi (Kullanıcı: {user.id}): {e}")
+        return True
+    except PasswordCheckOverloaded:
+        outcome = 'rejected'
+        raise
+    finally:
+        # Reddedilen istekler süre dağılımına katılmaz (beklemeden döndükleri için)
+        _record_login(outcome, None if outcome == 'rejected' else time.perf_counter() - started)
+
+
+def _percentile(sorted_values, percentile):
+    index = min(len(sorted_values) - 1, int(round(percentile / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def get_login_metrics():
+    """Giriş sayaçları ve son girişlerin p50/p99 süreleri (ms)."""
+    with _login_metrics_lock:
+        metrics = dict(_login_metrics)
+        durations = sorted(_login_durations)
+    if durations:
+        metrics['latency_p50_ms'] = round(_percentile(durations, 50) * 1000, 1)
+        metrics['latency_p99_ms'] = round(_percentile(durations, 99) * 1000, 1)
+    pool = current_app.extensions.get('password_hash_pool')
+    metrics['in_flight'] = pool.in_flight if pool else 0
+    return metrics
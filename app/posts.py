@@ -0,0 +1,123 @@
+# app/posts.py
+"""
+Blog yazıları için kayıt anında üretilen özet alanları ve imleçli (keyset) sayfalama.
+
+Blog listesi her kart için yazının tamamını okuyup HTML'den arındırmak yerine,
+yazı kaydedilirken (admin.add_post/edit_post) üretilen excerpt ve
+reading_minutes sütunlarını kullanır; liste sorgusu content sütununu hiç okumaz.
+
+Liste sayfaları OFFSET yerine (created_at, id) imleciyle ilerler: her sayfa
+ix_post_published_created indeksinde bir önceki sayfanın son yazısından devam
+eder, sayfa numarası büyüdükçe sorgu yavaşlamaz.
+"""
+
+import base64
+import binascii
+import math
+import re
+from datetime import datetime
+
+import click
+from flask.cli import with_appcontext
+from markupsafe import Markup
+from sqlalchemy import event, inspect, tuple_, update
+from sqlalchemy.orm import load_only
+
+from app.extensions import db
+from app.models import Post
+from app.page_cache import purge_pages
+from app.sitemap import rebuild_sitemap
+
+EXCERPT_LENGTH = 150
+# Ortalama Türkçe okuma hızı (kelime/dakika)
+WORDS_PER_MINUTE = 200
+
+
+def post_excerpt(content, length=EXCERPT_LENGTH):
+    """HTML içerikten, kelime sınırında kesilmiş düz metin özet üretir."""
+    text = ' '.join(Markup(content or '').striptags().split())
+    if len(text) <= length:
+        return text
+    cut = text[:length - 3].rsplit(' ', 1)[0]
+    return f"{cut}..."
+
+
+def post_reading_minutes(content):
+    words = len(re.findall(r'\w+', Markup(content or '').striptags()))
+    return max(1, math.ceil(words / WORDS_PER_MINUTE))
+
+
+def summarize_post(post):
+    post.excerpt = post_excerpt(post.content)
+    post.reading_minutes = post_reading_minutes(post.content)
+
+
+@event.listens_for(Post, 'before_insert')
+@event.listens_for(Post, 'before_update')
+def _summarize_on_save(mapper, connection, target):
+    # Sadece içerik değiştiğinde (veya özet hiç üretilmemişse) yeniden hesaplanır
+    if target.excerpt is None or inspect(target).attrs.content.history.has_changes():
+        summarize_post(target)
+
+
+# ──────────────────────────────────────────────────────────────
+# İmleçli sayfalama
+# ──────────────────────────────────────────────────────────────
+# Liste kartlarında kullanılan alanlar (content okunmaz)
+LIST_COLUMNS = (
+    Post.id, Post.title, Post.slug, Post.image_url, Post.image_thumb_url,
+    Post.excerpt, Post.reading_minutes, Post.created_at,
+)
+
+
+def encode_cursor(post):
+    raw = f"{post.created_at.isoformat()}|{post.id}"
+    return base64.urlsafe_b64encode(raw.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor):
+    """İmleci (created_at, id) çiftine çevirir; geçersizse ValueError fırlatır."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode('utf-8')
+        created_at, post_id = raw.rsplit('|', 1)
+        return datetime.fromisoformat(created_at), int(post_id)
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(str(e))
+
+
+def published_posts_page(cursor=None, per_page=12):
+    """
+    Yayınlanmış yazıların en yeniden eskiye bir sayfasını döndürür: (yazılar, sonraki imleç).
+    Son sayfada sonraki imleç None'dır.
+    """
+    query = Post.query.options(load_only(*LIST_COLUMNS)).filter(Post.is_published.is_(True))
+    if cursor:
+        created_at, post_id = decode_cursor(cursor)
+        query = query.filter(tuple_(Post.created_at, Post.id) < (created_at, post_id))
+    posts = query.order_by(Post.created_at.desc(), Post.id.desc()).limit(per_page + 1).all()
+
+    next_cursor = encode_cursor(posts[per_page - 1]) if len(posts) > per_page else None
+    return posts[:per_page], next_cursor
+
+
+# ──────────────────────────────────────────────────────────────
+# Mevcut yazılar için özet (flask rebuild-blog)
+# ──────────────────────────────────────────────────────────────
+@click.command('rebuild-blog')
+@with_appcontext
+def rebuild_blog_command():
+    """Yazıların özet/okuma süresini yeniden üretir ve sitemap.xml'i baştan oluşturur."""
+    posts = Post.query.options(load_only(Post.id, Post.slug, Post.content, Post.updated_at)).all()
+    if posts:
+        # updated_at aynen yazılır; özet yenilemesi yazıyı (ve sitemap lastmod'unu) "güncellenmiş" göstermez
+        db.session.execute(update(Post), [{
+            'id': post.id,
+            'excerpt': post_excerpt(post.content),
+            'reading_minutes': post_reading_minutes(post.content),
+            'updated_at': post.updated_at,
+        } for post in posts])
+        db.session.commit()
+        # Toplu UPDATE ORM olaylarını tetiklemez; önbellekteki sayfalar burada düşürülür
+        purge_pages('blog', *(f"post:{post.slug}" for post in posts))
+    rebuild_sitemap()
+    click.echo(f"{len(posts)} yazının özeti güncellendi, sitemap.xml yeniden oluşturuldu.")
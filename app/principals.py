@@ -0,0 +1,229 @@
+# app/principals.py
+"""
+Yetkilendirme için kullanıcı özeti (principal) önbelleği.
+
+API'de (JWT) ve web oturumlarında (Flask-Login) her istekte kullanıcıyı veritabanından
+okumak yerine, yetki kararları ve menüler için gereken alanlar (id, rol, apartman,
+blok, aktiflik, ad) önbellekte tutulur (get_cache: varsayılan olarak süreç içi
+bellek, CACHE_REDIS_URL ayarlıysa Redis). Kayıt PRINCIPAL_CACHE_TTL saniye sonra düşer.
+
+Önbellek süreç içi bellekte olduğunda her işçinin kendi kopyası vardır; bu yüzden
+kayıt, kullanıcının principal_version sütunuyla birlikte saklanır ve her kullanımda
+tek satırlık bir sorguyla (birincil anahtar üzerinden tek sütun) doğrulanır. Rol,
+aktiflik, apartman, blok, ad veya apartman adı değiştiğinde sürüm artar; diğer
+işçiler de bir sonraki istekte güncel veriyi okur. Silinen kullanıcının sürümü
+bulunamadığından kaydı da kullanılmaz.
+
+Ayrıca commit'ten SONRA ilgili kayıt önbellekten silinir (Redis'te tüm işçiler
+için, bellekte sadece commit eden işçi için). Toplu UPDATE sorguları (Query.update)
+ORM olaylarını tetiklemez; bu durumda principal_version elle artırılmalıdır.
+"""
+
+from flask import current_app, g, has_app_context
+from sqlalchemy import event, inspect, select, update
+from sqlalchemy.orm import Session, object_session
+
+from app.extensions import db
+from app.cache import get_cache
+from app.metrics import record_cache
+from app.models import Apartment, User
+
+# Commit'i bekleyen, önbellekten silinecek kullanıcı id'leri (session.info içinde)
+_PENDING_INVALIDATIONS = 'ays_principal_invalidations'
+
+# Değiştiğinde önbellekteki özeti geçersiz kılan kullanıcı alanları
+_PRINCIPAL_COLUMNS = ('role', 'apartment_id', 'block_id', 'is_active', 'name')
+
+# İstek boyunca okunmuş principal_version değerleri (flask.g içinde)
+_VERSIONS = 'ays_principal_versions'
+
+
+class Principal:
+    """Kimliği doğrulanmış kullanıcının yetki kararları için gereken alanları."""
+
+    __slots__ = ('id', 'role', 'apartment_id', 'block_id', 'is_active', 'name', 'apartment_name')
+
+    def __init__(self, id, role, apartment_id, block_id, is_active, name=None, apartment_name=None):
+        self.id = id
+        self.role = role
+        self.apartment_id = apartment_id
+        self.block_id = block_id
+        self.is_active = is_active
+        self.name = name
+        self.apartment_name = apartment_name
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(
+            id=user.id,
+            role=user.role,
+            apartment_id=user.apartment_id,
+            block_id=user.block_id,
+            is_active=bool(user.is_active),
+            name=user.name,
+            apartment_name=user.apartment.name if user.apartment else None,
+        )
+
+    def to_dict(self):
+        return {field: getattr(self, field) for field in self.__slots__}
+
+    def __repr__(self):
+        return f"<Principal {self.id} {self.role}>"
+
+
+class SessionUser(Principal):
+    """
+    Web oturumundaki current_user. Özet alanları önbellekten gelir; diğer alanlar
+    (ör. phone_number, read_announcements) ilk erişimde tam kullanıcı kaydından okunur.
+    Atamalar tam kayda yazılır, commit çağıran view'a aittir.
+    """
+
+    __slots__ = ('_user', '_ready')
+
+    is_authenticated = True
+    is_anonymous = False
+
+    def __init__(self, **fields):
+        object.__setattr__(self, '_user', None)
+        object.__setattr__(self, '_ready', False)
+        super().__init__(**fields)
+        object.__setattr__(self, '_ready', True)
+
+    def get_id(self):
+        return str(self.id)
+
+    @property
+    def user(self):
+        """Tam kullanıcı kaydı (istek başına en fazla bir sorgu)."""
+        if self._user is None:
+            object.__setattr__(self, '_user', User.query.get(self.id))
+        return self._user
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return getattr(self.user, name)
+
+    def __setattr__(self, name, value):
+        if self._ready:
+            setattr(self.user, name, value)
+        if name in Principal.__slots__:
+            object.__setattr__(self, name, value)
+
+
+def _cache_key(user_id):
+    return f"principal:{user_id}"
+
+
+def get_principal(user_id):
+    """
+    Kullanıcının yetki özetini döndürür; önbellekte yoksa veritabanından okuyup yazar.
+    Kullanıcı yoksa None döner.
+    """
+    data = _get_principal_data(user_id)
+    return Principal(**data) if data is not None else None
+
+
+def load_session_user(user_id):
+    """Flask-Login user_loader: aktif kullanıcı için SessionUser, aksi halde None."""
+    data = _get_principal_data(user_id)
+    if data is None or not data['is_active']:
+        return None
+    return SessionUser(**data)
+
+
+def remember_principal_version(user_id, version):
+    """
+    Aynı istekte kullanıcı satırını zaten okuyan kod (ör. JWT iptal kontrolü) sürümü
+    buraya bırakır; özet doğrulanırken ikinci bir sorgu atılmaz.
+    """
+    g.setdefault(_VERSIONS, {})[int(user_id)] = version
+
+
+def _current_version(user_id):
+    """Kullanıcının veritabanındaki principal_version değeri; kullanıcı yoksa None."""
+    versions = g.setdefault(_VERSIONS, {})
+    if user_id not in versions:
+        versions[user_id] = db.session.scalar(select(User.principal_version).where(User.id == user_id))
+    return versions[user_id]
+
+
+def _get_principal_data(user_id):
+    try:
+        user_id = int(user_id)
+    except (TypeError, ValueError):
+        return None
+
+    cache = get_cache()
+    entry = cache.get(_cache_key(user_id))
+    if entry is not None and entry.get('version') == _current_version(user_id):
+        record_cache('principal', 'hit')
+        return entry['principal']
+
+    # Kayıt yok ya da başka bir işçide değişmiş (veya kullanıcı silinmiş)
+    record_cache('principal', 'miss')
+    user = User.query.get(user_id)
+    if user is None:
+        if entry is not None:
+            cache.delete(_cache_key(user_id))
+        return None
+    data = Principal.from_user(user).to_dict()
+    cache.set(_cache_key(user_id), {'version': user.principal_version, 'principal': data},
+              ttl=current_app.config.get('PRINCIPAL_CACHE_TTL', 300))
+    return data
+
+
+def invalidate_principal(user_id):
+    """Kullanıcının önbellekteki yetki özetini siler; sonraki istek veritabanından okur."""
+    get_cache().delete(_cache_key(user_id))
+
+
+# ──────────────────────────────────────────────────────────────
+# ORM olayları: özet alanları değişince sürüm artar; güncellenen/silinen
+# kullanıcılar commit'ten sonra önbellekten düşer
+# ──────────────────────────────────────────────────────────────
+@event.listens_for(User, 'before_update')
+def _bump_principal_version(mapper, connection, target):
+    state = inspect(target)
+    if any(state.attrs[column].history.has_changes() for column in _PRINCIPAL_COLUMNS):
+        # Bellekteki eski değer yerine veritabanında artırılır (eş zamanlı güncellemeler kaybolmaz)
+        target.principal_version = User.principal_version + 1
+
+
+@event.listens_for(User, 'after_update')
+@event.listens_for(User, 'after_delete')
+def _collect_changed_user(mapper, connection, target):
+    session = object_session(target)
+    if session is not None and target.id is not None:
+        session.info.setdefault(_PENDING_INVALIDATIONS, set()).add(target.id)
+
+
+@event.listens_for(Apartment, 'after_update')
+def _collect_apartment_members(mapper, connection, target):
+    """Apartman adı özet kayıtlarında tutulduğu için apartmandaki kullanıcıların kayıtları da düşer."""
+    session = object_session(target)
+    if session is None or not inspect(target).attrs.name.history.has_changes():
+        return
+    connection.execute(
+        update(User).where(User.apartment_id == target.id)
+        .values(principal_version=User.principal_version + 1)
+    )
+    member_ids = connection.execute(select(User.id).where(User.apartment_id == target.id)).scalars()
+    session.info.setdefault(_PENDING_INVALIDATIONS, set()).update(member_ids)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate_after_commit(session):
+    user_ids = session.info.pop(_PENDING_INVALIDATIONS, None)
+    if not user_ids or not has_app_context():
+        return
+    for user_id in user_ids:
+        try:
+            invalidate_principal(user_id)
+        except Exception as e:
+            current_app.logger.error(f"Kullanıcı önbelleği temizlenemedi (Kullanıcı: {user_id}): {e}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_INVALIDATIONS, None)
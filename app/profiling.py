@@ -0,0 +1,229 @@
+# app/profiling.py
+"""
+Canlı ortamda yavaş sayfaları incelemek için profil araçları.
+
+1) Tek istek profili: Yönetici (admin/superadmin) bir isteğe `?_profile=1`
+   parametresi veya `X-Profile: 1` başlığı eklediğinde o istek cProfile ile
+   çalıştırılır. Sonuç (en pahalı fonksiyonlar ve snakeviz/pstats ile açılabilen
+   .prof dosyası) veritabanında (PerformanceProfile) PROFILE_TTL saniye saklanır;
+   cevaba X-Profile-Id başlığı eklenir ve /profiling sayfasında listelenir. Kayıt
+   veritabanında olduğu için hangi işçi süreç açarsa açsın görünür. Diğer istekler
+   etkilenmez.
+
+2) İstatistiksel örnekleyici (sampler): superadmin, isteği karşılayan işçi
+   süreçte belirli bir süre için (en fazla SAMPLER_MAX_SECONDS) açar. Ayrı bir
+   iş parçacığı SAMPLER_INTERVAL_MS aralıkla tüm iş parçacıklarının yığınlarını
+   okur; profil kurulmadığı için istekleri yavaşlatmaz. Sonuç flamegraph.pl,
+   speedscope veya inferno ile açılabilen "folded stacks" biçimindedir.
+"""
+
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timedelta
+
+from flask import current_app, g, request
+from flask_jwt_extended import get_current_user, verify_jwt_in_request
+from flask_login import current_user
+from sqlalchemy import delete, insert
+from sqlalchemy.orm import defer
+
+from app.extensions import db
+from app.models import PerformanceProfile
+
+PROFILER_ROLES = ('admin', 'superadmin')
+
+# Profil listesinde tutulan en fazla kayıt
+MAX_PROFILE_INDEX = 50
+
+# Yığının en üstündeki bu dosyalarda bekleyen iş parçacıkları boşta sayılır (örneklenmez)
+IDLE_FILES = ('threading.py', 'selectors.py', 'queue.py', 'socketserver.py', 'socket.py', 'thread.py')
+
+_init_lock = threading.Lock()
+
+
+def store_profile(kind, owner_id, text, data, **meta):
+    """
+    Profili veritabanına yazar ve süresi dolmuş kayıtları temizler; profil id'sini döndürür.
+    İsteğin kendi oturumuna dokunmamak için ayrı bir bağlantıda kendi işlemiyle yazılır.
+    """
+    profile_id = uuid.uuid4().hex[:12]
+    now = datetime.utcnow()
+    table = PerformanceProfile.__table__
+    with db.engine.begin() as connection:
+        connection.execute(delete(table).where(table.c.expires_at < now))
+        connection.execute(insert(table).values(
+            id=profile_id, kind=kind, owner_id=owner_id, pid=os.getpid(), text=text, data=data,
+            created_at=now, expires_at=now + timedelta(seconds=current_app.config.get('PROFILE_TTL', 3600)),
+            **meta,
+        ))
+    return profile_id
+
+
+def get_profile(profile_id):
+    return PerformanceProfile.query.filter(
+        PerformanceProfile.id == profile_id,
+        PerformanceProfile.expires_at > datetime.utcnow()
+    ).first()
+
+
+def list_profiles(owner_id=None):
+    """Süresi dolmamış son profiller (owner_id verilirse sadece o kullanıcınınkiler)."""
+    query = PerformanceProfile.query.options(
+        defer(PerformanceProfile.text), defer(PerformanceProfile.data)
+    ).filter(PerformanceProfile.expires_at > datetime.utcnow())
+    if owner_id is not None:
+        query = query.filter(PerformanceProfile.owner_id == owner_id)
+    return query.order_by(PerformanceProfile.created_at.desc()).limit(MAX_PROFILE_INDEX).all()
+
+
+# ──────────────────────────────────────────────────────────────
+# 1) Tek istek profili
+# ──────────────────────────────────────────────────────────────
+def _profile_requested():
+    return request.args.get('_profile') == '1' or request.headers.get('X-Profile') == '1'
+
+
+def _profiling_user():
+    """Profil isteyen yönetici (web oturumu veya API token'ı); yetkisi yoksa None."""
+    if current_user.is_authenticated:
+        user = current_user
+    else:
+        try:
+            verify_jwt_in_request(optional=True)
+            user = get_current_user()
+        except Exception:
+            return None
+    return user if user is not None and user.role in PROFILER_ROLES else None
+
+
+def _start_request_profile():
+    if not current_app.config.get('PROFILING_ENABLED', True) or not _profile_requested():
+        return
+    if request.blueprint == 'profiling':
+        return
+    user = _profiling_user()
+    if user is None:
+        return
+    profiler = cProfile.Profile()
+    g.profiler = (profiler, user.id, time.perf_counter())
+    profiler.enable()
+
+
+def _finish_request_profile(response):
+    state = g.pop('profiler', None)
+    if state is None:
+        return response
+    profiler, user_id, started = state
+    profiler.disable()
+    duration_ms = round((time.perf_counter() - started) * 1000, 1)
+
+    stats = pstats.Stats(profiler)
+    data = marshal.dumps(stats.stats)
+    text = io.StringIO()
+    pstats.Stats(profiler, stream=text).strip_dirs().sort_stats('cumulative').print_stats(
+        current_app.config.get('PROFILE_TOP_N', 60)
+    )
+    profile_id = store_profile(
+        'request', user_id, text.getvalue(), data,
+        method=request.method, path=request.full_path.rstrip('?'),
+        endpoint=request.endpoint, status=response.status_code, duration_ms=duration_ms,
+    )
+    response.headers['X-Profile-Id'] = profile_id
+    current_app.logger.info(f"İstek profili kaydedildi ({profile_id}, {request.endpoint}, {duration_ms} ms)")
+    return response
+
+
+# ──────────────────────────────────────────────────────────────
+# 2) İstatistiksel örnekleyici
+# ──────────────────────────────────────────────────────────────
+class StackSampler:
+    """İşçi süreçteki tüm iş parçacıklarının yığınlarını belirli aralıklarla sayar."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self.ends_at = None
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, app, seconds, interval, owner_id):
+        """Örneklemeyi başlatır; bu süreçte zaten çalışıyorsa False döner."""
+        with self._lock:
+            if self.running:
+                return False
+            self.ends_at = time.time() + seconds
+            self._thread = threading.Thread(
+                target=self._run, args=(app, seconds, interval, owner_id),
+                name='stack-sampler', daemon=True,
+            )
+            self._thread.start()
+            return True
+
+    @staticmethod
+    def _folded(frame):
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+            frame = frame.f_back
+        return ';'.join(reversed(stack))
+
+    def _run(self, app, seconds, interval, owner_id):
+        own_id = threading.get_ident()
+        counts = Counter()
+        samples = 0
+        deadline = time.monotonic() + seconds
+        while time.monotonic() < deadline:
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id or os.path.basename(frame.f_code.co_filename) in IDLE_FILES:
+                    continue
+                counts[self._folded(frame)] += 1
+            samples += 1
+            time.sleep(interval)
+
+        folded = '\n'.join(f"{stack} {count}" for stack, count in counts.most_common())
+        with app.app_context():
+            try:
+                profile_id = store_profile(
+                    'sampler', owner_id, folded, None,
+                    path=f"{seconds} sn, {samples} örnek", duration_ms=seconds * 1000,
+                )
+                app.logger.info(f"Örnekleyici tamamlandı ({profile_id}, {samples} örnek, {len(counts)} farklı yığın)")
+            except Exception as e:
+                app.logger.error(f"Örnekleyici sonucu kaydedilemedi: {e}")
+
+
+def get_stack_sampler():
+    """Bu işçi sürecin örnekleyicisi (uygulama başına bir kez oluşturulur)."""
+    app = current_app._get_current_object()
+    sampler = app.extensions.get('stack_sampler')
+    if sampler is None:
+        with _init_lock:
+            sampler = app.extensions.get('stack_sampler')
+            if sampler is None:
+                sampler = StackSampler()
+                app.extensions['stack_sampler'] = sampler
+    return sampler
+
+
+def start_sampler(seconds, owner_id):
+    config = current_app.config
+    seconds = max(1, min(int(seconds), config.get('SAMPLER_MAX_SECONDS', 300)))
+    interval = config.get('SAMPLER_INTERVAL_MS', 10) / 1000
+    started = get_stack_sampler().start(current_app._get_current_object(), seconds, interval, owner_id)
+    return started, seconds
+
+
+def init_profiling(app):
+    app.before_request(_start_request_profile)
+    app.after_request(_finish_request_profile)
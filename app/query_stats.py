@@ -0,0 +1,142 @@
+# app/query_stats.py
+"""
+İstek başına SQL sorgu sayacı ve yavaş sorgu günlüğü.
+
+SQLAlchemy motor olaylarıyla (before/after_cursor_execute) her istekte
+çalışan sorgu sayısı ve toplam veritabanı süresi tutulur:
+
+  - Cevaba Server-Timing başlığı eklenir (db: sorgu sayısı ve süresi, app:
+    isteğin toplam süresi); tarayıcının geliştirici araçlarında görünür.
+  - SLOW_QUERY_THRESHOLD_MS'den uzun süren her sorgu, rota ve parametrelerin
+    yapısıyla (değerler değil, tipleri; kişisel veri günlüğe düşmez) uyarı
+    olarak günlüğe yazılır.
+  - assert_max_queries, testlerde bir endpoint'in en fazla kaç sorgu
+    çalıştırabileceğini denetler (N+1 geri dönüşlerini yakalamak için);
+    capture_queries aynı sayımı sınır koymadan yapar (bench/load.py).
+"""
+
+import threading
+import time
+from contextlib import contextmanager
+
+from flask import current_app, g, has_app_context, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Günlükte gösterilen en fazla SQL uzunluğu
+MAX_LOGGED_STATEMENT = 500
+
+# capture_queries/assert_max_queries ile açılmış sayaçlar (iş parçacığı başına)
+_local = threading.local()
+
+
+def _parameters_shape(parameters, executemany):
+    """Parametre değerlerini değil yapısını (tip adlarını) özetler."""
+    if executemany and parameters:
+        return f"{len(parameters)} x {_parameters_shape(parameters[0], False)}"
+    if isinstance(parameters, dict):
+        return '{' + ', '.join(f"{key}: {type(value).__name__}" for key, value in parameters.items()) + '}'
+    if isinstance(parameters, (list, tuple)):
+        return '(' + ', '.join(type(value).__name__ for value in parameters) + ')'
+    return type(parameters).__name__
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # Başlangıç zamanı ifadenin kendi yürütme bağlamında tutulur; ifade hata verirse
+    # bağlamla birlikte atılır, bağlantıda birikmez.
+    if context is not None:
+        context.query_started = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, 'query_started', None)
+    if started is None:
+        return
+    duration = time.perf_counter() - started
+
+    for statements in getattr(_local, 'counters', ()):
+        statements.append(statement)
+
+    if not has_app_context():
+        return
+    if has_request_context():
+        g.query_count = g.get('query_count', 0) + 1
+        g.query_time = g.get('query_time', 0.0) + duration
+
+    threshold = current_app.config.get('SLOW_QUERY_THRESHOLD_MS')
+    if threshold is not None and duration * 1000 >= threshold:
+        route = f"{request.method} {request.endpoint or request.path}" if has_request_context() else 'komut/iş'
+        current_app.logger.warning(
+            f"Yavaş sorgu ({duration * 1000:.1f} ms, {route}): "
+            f"{' '.join(statement.split())[:MAX_LOGGED_STATEMENT]} "
+            f"| parametreler: {_parameters_shape(parameters, executemany)}"
+        )
+
+
+def _start_timer():
+    g.request_started = time.perf_counter()
+    g.query_count = 0
+    g.query_time = 0.0
+
+
+def _add_server_timing(response):
+    if not current_app.config.get('SERVER_TIMING_ENABLED', True):
+        return response
+    metrics = [f'db;dur={g.get("query_time", 0.0) * 1000:.1f};desc="{g.get("query_count", 0)} sorgu"']
+    if 'request_started' in g:
+        metrics.append(f"app;dur={(time.perf_counter() - g.request_started) * 1000:.1f}")
+    response.headers.add('Server-Timing', ', '.join(metrics))
+    return response
+
+
+def init_query_stats(app):
+    app.before_request(_start_timer)
+    app.after_request(_add_server_timing)
+
+
+def get_request_query_stats():
+    """Geçerli istekte şimdiye kadar çalışan sorgu sayısı ve toplam süresi (ms)."""
+    return {
+        'query_count': g.get('query_count', 0),
+        'query_time_ms': round(g.get('query_time', 0.0) * 1000, 1),
+    }
+
+
+@contextmanager
+def capture_queries():
+    """
+    Blok içinde bu iş parçacığında çalışan SQL ifadelerini listeye toplar
+    (testler ve bench/ betikleri için):
+
+        with capture_queries() as statements:
+            client.get('/api/v1/dues', headers=auth)
+        print(len(statements))
+    """
+    statements = []
+    counters = getattr(_local, 'counters', None)
+    if counters is None:
+        counters = _local.counters = []
+    counters.append(statements)
+    try:
+        yield statements
+    finally:
+        counters.remove(statements)
+
+
+@contextmanager
+def assert_max_queries(max_queries):
+    """
+    Blok içinde en fazla max_queries sorgu çalışmasını şart koşar (testler için):
+
+        with assert_max_queries(5):
+            client.get('/api/v1/polls', headers=auth)
+
+    Fazlası çalışırsa sorgular listelenerek AssertionError fırlatılır.
+    """
+    with capture_queries() as statements:
+        yield statements
+    if len(statements) > max_queries:
+        listing = '\n'.join(f"  {i}. {' '.join(s.split())[:200]}" for i, s in enumerate(statements, 1))
+        raise AssertionError(f"En fazla {max_queries} sorgu beklenirken {len(statements)} sorgu çalıştı:\n{listing}")
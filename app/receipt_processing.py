@@ -0,0 +1,219 @@
+# app/receipt_processing.py
+"""
+Aidat dekontlarının arka planda doğrulanması (OCR + otomatik onay).
+
+Yükleme isteği dekontu GCS'e koyup aidatı 'queued' durumuna alır ve hemen döner.
+Doğrulama, bir iş parçacığı havuzunda uygulama bağlamı içinde çalışır:
+
+    queued → processing → auto_approved | needs_review
+
+Sonuç hem Dues üzerinde saklanır (istemciler sorgulayabilir) hem de bildirim
+kutusu üzerinden sakine push bildirimi olarak iletilir. Yarıda kalan işler cron görevi ile yeniden kuyruğa alınır.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from flask import current_app
+
+from app.document_ai_helper import extract_receipt_data
+from app.extensions import db
+from app.gcs_utils import gcs_uri_from_url
+from app.models import Dues, Transaction
+from app.notification_outbox import enqueue_notification, make_event_key, start_notification_dispatch
+
+RECEIPT_QUEUED = 'queued'
+RECEIPT_PROCESSING = 'processing'
+RECEIPT_AUTO_APPROVED = 'auto_approved'
+RECEIPT_NEEDS_REVIEW = 'needs_review'
+
+RECEIPT_STATUS_LABELS = {
+    RECEIPT_QUEUED: 'Sırada',
+    RECEIPT_PROCESSING: 'Doğrulanıyor',
+    RECEIPT_AUTO_APPROVED: 'Otomatik Onaylandı',
+    RECEIPT_NEEDS_REVIEW: 'Yönetici Onayında',
+}
+
+# Tutar kontrolünde izin verilen fark (kuruş yuvarlamaları için 1 TL)
+AMOUNT_TOLERANCE = 1.0
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix='receipt-ocr')
+
+
+def serialize_receipt_status(dues):
+    """Web ve mobil sorgulama uçları için ortak durum sözlüğü."""
+    return {
+        "dues_id": dues.id,
+        "is_paid": bool(dues.is_paid),
+        "receipt_status": dues.receipt_status,
+        "receipt_status_label": RECEIPT_STATUS_LABELS.get(dues.receipt_status),
+        "is_final": dues.is_paid or dues.receipt_status in (RECEIPT_AUTO_APPROVED, RECEIPT_NEEDS_REVIEW),
+        "receipt_url": dues.receipt_filename,
+        "upload_date": dues.receipt_upload_date.isoformat() if dues.receipt_upload_date else None,
+        "updated_at": dues.receipt_status_updated_at.isoformat() if dues.receipt_status_updated_at else None,
+    }
+
+
+# ──────────────────────────────────────────────────────────────
+# 1) Kuyruğa alma
+# ──────────────────────────────────────────────────────────────
+def queue_receipt(dues, receipt_ref):
+    """
+    Yüklenen dekontu aidata bağlar ve doğrulama kuyruğuna alır.
+    Commit çağıran tarafa aittir; commit'ten sonra start_receipt_verification çağrılmalıdır.
+    """
+    now = datetime.utcnow()
+    dues.receipt_filename = receipt_ref
+    dues.receipt_upload_date = now
+    dues.receipt_status = RECEIPT_QUEUED
+    dues.receipt_status_updated_at = now
+
+
+def start_receipt_verification(dues_id):
+    """
+    Doğrulama işini başlatır. RECEIPT_OCR_ASYNC kapalıysa (testler) aynı istekte çalıştırır.
+    """
+    app = current_app._get_current_object()
+    if app.config.get('RECEIPT_OCR_ASYNC', True):
+        _executor.submit(_run_job, app, dues_id)
+    else:
+        _run_job(app, dues_id)
+
+
+def _run_job(app, dues_id):
+    with app.app_context():
+        try:
+            verify_receipt(dues_id)
+        except Exception as e:
+            db.session.rollback()
+            app.logger.error(f"Dekont doğrulama işi başarısız (Aidat ID: {dues_id}): {e}", exc_info=True)
+        finally:
+            db.session.remove()
+
+
+# ──────────────────────────────────────────────────────────────
+# 2) Doğrulama
+# ──────────────────────────────────────────────────────────────
+def _is_match(dues, extracted_data):
+    """Çıkarılan verinin aidat tutarı ve apartman adıyla uyuşup uyuşmadığını kontrol eder."""
+    if not extracted_data or 'amount' not in extracted_data:
+        return False
+
+    is_amount_ok = abs(extracted_data['amount'] - float(dues.amount)) < AMOUNT_TOLERANCE
+
+    # Alıcı kontrolü (Apartman adının dekontta geçip geçmediği)
+    supplier_name = (extracted_data.get('supplier') or '').lower()
+    apartment = dues.apartment
+    official_name_to_check = getattr(apartment, 'bank_account_name', None) or apartment.name
+    check_word = official_name_to_check.split()[0].lower()
+    is_recipient_ok = check_word in supplier_name if supplier_name else False
+
+    return is_amount_ok and is_recipient_ok
+
+
+def _set_status(dues_id, status, expected):
+    """Durumu sadece beklenen durumdaysa değiştirir (aynı anda çalışan işlere karşı)."""
+    return Dues.query.filter(
+        Dues.id == dues_id,
+        Dues.receipt_status == expected
+    ).update({
+        'receipt_status': status,
+        'receipt_status_updated_at': datetime.utcnow(),
+    }, synchronize_session=False)
+
+
+def verify_receipt(dues_id):
+    """
+    Kuyruktaki bir dekontu işler ve nihai durumu döndürür.
+    İş başka bir işçi tarafından alınmışsa None döner.
+    """
+    if not _set_status(dues_id, RECEIPT_PROCESSING, expected=RECEIPT_QUEUED):
+        db.session.rollback()
+        return None
+    db.session.commit()
+
+    dues = Dues.query.get(dues_id)
+    # Yerel depolama arka ucunda gs:// URI'ı yoktur; OCR arka ucuna dosya URL'i verilir
+    receipt_ref = gcs_uri_from_url(dues.receipt_filename) or dues.receipt_filename
+    extracted_data = extract_receipt_data(receipt_ref) if receipt_ref else None
+
+    status = RECEIPT_NEEDS_REVIEW
+    if not dues.is_paid and _is_match(dues, extracted_data):
+        now = datetime.utcnow()
+        # Yönetici aynı anda elle onaylamışsa ikinci bir gelir kaydı oluşmasın
+        approved = Dues.query.filter_by(id=dues.id, is_paid=False).update({
+            'is_paid': True,
+            'payment_date': now,
+        }, synchronize_session=False)
+        if approved:
+            db.session.add(Transaction(
+                amount=dues.amount,
+                description=f"Aidat Ödemesi (Otomatik Onay): {dues.user.name} - {dues.description}",
+                transaction_date=now,
+                source_type='dues', source_id=dues.id,
+                user_id=dues.user_id, apartment_id=dues.apartment_id
+            ))
+            status = RECEIPT_AUTO_APPROVED
+
+    if not _set_status(dues_id, status, expected=RECEIPT_PROCESSING):
+        # Bu sırada yeni bir dekont yüklendi; bu işin sonucu artık geçersiz
+        db.session.rollback()
+        return None
+    # Sonuç bildirimi durumla aynı transaction'da kutuya yazılır
+    _notify_result(dues, status)
+    db.session.commit()
+    current_app.logger.info(f"Dekont doğrulandı (Aidat ID: {dues_id}): {status}")
+
+    start_notification_dispatch()
+    return status
+
+
+def _notify_result(dues, status):
+    if status == RECEIPT_AUTO_APPROVED:
+        title = "Ödemeniz Onaylandı"
+        body = f"'{dues.description}' için yüklediğiniz dekont otomatik olarak doğrulandı."
+    else:
+        title = "Dekontunuz Yönetici Onayında"
+        body = f"'{dues.description}' için yüklediğiniz dekont yönetici onayına gönderildi."
+    # Aynı dekontun sonucu bir kez; yeniden yüklenen dekontun sonucu ayrıca bildirilir
+    upload_stamp = dues.receipt_upload_date.isoformat() if dues.receipt_upload_date else ''
+    enqueue_notification(
+        [dues.user_id],
+        make_event_key('receipt', dues.id, status, upload_stamp),
+        title=title,
+        body=body,
+        notification_type="dues",
+        item_id=dues.id
+    )
+
+
+# ──────────────────────────────────────────────────────────────
+# 3) Yarıda kalan işler
+# ──────────────────────────────────────────────────────────────
+def requeue_stale_receipts(limit=50):
+    """
+    Süreç yeniden başladığı için yarıda kalmış (uzun süredir 'queued'/'processing')
+    dekontları tekrar kuyruğa alıp işler. İşlenen aidat sayısını döndürür.
+    """
+    stale_minutes = current_app.config.get('RECEIPT_OCR_STALE_MINUTES', 15)
+    cutoff = datetime.utcnow() - timedelta(minutes=stale_minutes)
+
+    stale = Dues.query.filter(
+        Dues.is_paid == False,
+        Dues.receipt_status.in_([RECEIPT_QUEUED, RECEIPT_PROCESSING]),
+        Dues.receipt_status_updated_at < cutoff
+    ).order_by(Dues.receipt_status_updated_at).limit(limit).all()
+
+    dues_ids = [d.id for d in stale]
+    for d in stale:
+        d.receipt_status = RECEIPT_QUEUED
+        d.receipt_status_updated_at = datetime.utcnow()
+    db.session.commit()
+
+    for dues_id in dues_ids:
+        try:
+            verify_receipt(dues_id)
+        except Exception as e:
+            db.session.rollback()
+            current_app.logger.error(f"Yarıda kalan dekont işlenemedi (Aidat ID: {dues_id}): {e}", exc_info=True)
+    return len(dues_ids)
@@ -7,6 +7,7 @@ from .announcement import announcement_bp
 from .request_routes import request_bp
 from .expense_routes import expense_bp # YENİ: Yeni blueprint'i import ediyoruz
 from .poll_routes import poll_bp
+from .profiling import profiling_bp
 
 all_blueprints = [
     auth_bp,
@@ -17,5 +18,6 @@ all_blueprints = [
     announcement_bp,
     request_bp,
     expense_bp,
-    poll_bp
+    poll_bp,
+    profiling_bp
 ]
\ No newline at end of file
@@ -8,16 +8,16 @@ from app.forms.dues_forms import DuesForm
 from datetime import datetime, time
 from app.forms.poll_forms import PollCreateForm
 from app.models import Poll, PollOption, Vote
-from app.email import send_email
+from app.email import send_email, send_bulk_email
+from app.notification_digest import immediate_email_users, send_digests, wants_immediate_email
+from app.search import apply_request_search, apply_user_search, highlight_snippet
 from app.forms.admin_forms import CSRFProtectForm, UpdateRequestStatusForm, ExpenseForm, ManualTransactionForm, FinancialReportForm
 from dateutil.relativedelta import relativedelta
 from app.forms.admin_forms import CraftsmanForm
-from app.notifications import send_push_notification, send_notification_to_users
 from app.models import DynamicContent
 from app.forms.admin_forms import DynamicContentForm
 from app.models import Craftsman
 from app.models import Block
-from sqlalchemy import or_
 from app.extensions import db
 from sqlalchemy import func
 from sqlalchemy.orm import joinedload
@@ -32,6 +32,14 @@ import os
 import uuid
 from app.forms.admin_forms import RecurringExpenseForm 
 from app.models import RecurringExpense
+from app.receipt_processing import requeue_stale_receipts
+from app.notification_outbox import (
+    dispatch_pending_notifications, enqueue_notification, make_event_key,
+    purge_old_notifications, requeue_stale_notifications, start_notification_dispatch
+)
+from app.image_variants import reset_variants, start_image_processing
+from app.metrics import cron_job
+from app.auth_tokens import purge_expired_revocations
 
 admin_bp = Blueprint("admin", __name__, url_prefix="/admin")
 
@@ -197,7 +205,7 @@ def financial_report():
         total_income=total_income,
         total_expense=abs(total_expense),
         ending_balance=ending_balance,
-        apartment_name=current_user.apartment.name,
+        apartment_name=current_user.apartment_name,
         generation_date=datetime.utcnow(),
         chart_data=chart_data  # <-- YENİ EKLENEN GRAFİK VERİSİ
     )
@@ -213,6 +221,7 @@ def list_residents():
     admin_apartment_id = current_user.apartment_id
     search_query = request.args.get('search_query', '').strip()
     block_filter = request.args.get('block_filter', '')
+    page = request.args.get('page', 1, type=int)
 
     # 2. Temel veritabanı sorgusunu oluştur (sadece yöneticinin apartmanındaki sakinler).
     base_query = User.query.filter_by(
@@ -221,15 +230,15 @@ def list_residents():
     )
 
     # 3. Gelen parametrelere göre sorguyu dinamik olarak daha da filtrele.
-    if search_query:
-        search_term = f"%{search_query}%"
-        base_query = base_query.filter(or_(User.name.ilike(search_term), User.email.ilike(search_term)))
+    # Arama ad, e-posta, telefon ve daire no üzerindeki n-gram indeksiyle yapılır (bkz. app/search.py)
+    base_query, _ = apply_user_search(base_query, search_query)
 
     if block_filter:
         base_query = base_query.filter(User.block_id == int(block_filter))
 
-    # 4. Sonuçları isme göre sırala ve tümünü çek.
-    residents = base_query.order_by(User.name).all()
+    # 4. Sonuçları isme göre sırala ve sayfala.
+    pagination = base_query.order_by(User.name).paginate(page=page, per_page=50, error_out=False)
+    residents = pagination.items
     
     # 5. Filtre dropdown menüsünü doldurmak için bu apartmana ait blokları çek.
     blocks_for_filter = Block.query.filter_by(apartment_id=admin_apartment_id).order_by(Block.name).all()
@@ -240,6 +249,7 @@ def list_residents():
     return render_template(
         "admin/resident_list.html", 
         residents=residents, 
+        pagination=pagination,
         title="Apartman Sakinleri",
         blocks=blocks_for_filter,      # <-- YENİ EKLENDİ
         search_args=search_args        # <-- YENİ EKLENDİ
@@ -345,7 +355,9 @@ def add_dues():
                 is_active=True # Sadece aktif sakinlere gönderelim
             ).all()
             
-            # 1. Adım: Aidat borçlarını ve e-postaları döngü içinde oluştur
+            # 1. Adım: Aidat borçlarını döngü içinde oluştur
+            assigned_residents = []
+            new_due = None
             for resident in residents:
                 # Bu aidat bu kullanıcı için daha önce oluşturulmuş mu diye kontrol et
                 existing_due = Dues.query.filter_by(user_id=resident.id, description=form.description.data).first()
@@ -358,34 +370,33 @@ def add_dues():
                         apartment_id=resident.apartment_id
                     )
                     db.session.add(new_due)
-                    
-                    # E-posta bildirimi gönder (e-posta tek tek gitmek zorunda)
-                    try:
-                        send_email(
-                            to=resident.email,
-                            subject=f"Yeni Aidat Bildirimi: {new_due.description}",
-                            template='email/new_dues_notification',
-                            resident_name=resident.name,
-                            dues=new_due
-                        )
-                    except Exception as e:
-                        current_app.logger.error(f"Aidat e-postası gönderilemedi (Kullanıcı: {resident.id}): {e}")
-
-            # 2. Adım: Oluşturulan tüm aidatları veritabanına kaydet
+                    assigned_residents.append(resident)
+
+            # 2. Adım: Push bildirimlerini kutuya yaz ve aidatlarla birlikte TEK SEFERDE kaydet
+            enqueue_notification(
+                [resident.id for resident in assigned_residents],
+                make_event_key('dues_assigned', form.description.data),
+                title="Yeni Aidat Borcu",
+                body=f"{form.description.data} dönemi aidat borcunuz tanımlanmıştır.",
+                notification_type="dues",
+                item_id=None
+            )
             db.session.commit()
+            start_notification_dispatch()
 
-            # 3. Adım: Döngü bittikten sonra TEK SEFERDE toplu push bildirimi gönder
-            if residents:
+            # 3. Adım: E-postaları toplu gönder (aidatların tutarı, açıklaması ve vadesi aynıdır)
+            email_residents = immediate_email_users(assigned_residents)
+            if new_due and email_residents:
                 try:
-                    send_notification_to_users(
-                        users=residents,
-                        title="Yeni Aidat Borcu",
-                        body=f"{form.description.data} dönemi aidat borcunuz tanımlanmıştır.",
-                        notification_type="dues", 
-                        item_id=None
+                    send_bulk_email(
+                        [resident.email for resident in email_residents],
+                        subject=f"Yeni Aidat Bildirimi: {new_due.description}",
+                        template='email/new_dues_notification',
+                        per_recipient_ctx={r.email: {'resident_name': r.name} for r in email_residents if r.email},
+                        dues=new_due
                     )
                 except Exception as e:
-                    current_app.logger.error(f"Toplu aidat push bildirimi gönderilemedi: {e}")
+                    current_app.logger.error(f"Toplu aidat e-postası gönderilemedi: {e}")
 
             flash(f"{len(residents)} sakine aidat başarıyla tanımlandı ve bildirim gönderildi.", "success")
             return redirect(url_for("admin.all_dues"))
@@ -409,32 +420,30 @@ def add_dues():
                 apartment_id=selected_user.apartment_id
             )
             db.session.add(new_due)
+            enqueue_notification(
+                [selected_user.id],
+                make_event_key('dues_assigned', new_due.description),
+                title="Yeni Aidat Borcu",
+                body=f"{new_due.description} dönemi aidat borcunuz tanımlanmıştır.",
+                notification_type="dues",
+                item_id=None
+            )
             db.session.commit()
+            start_notification_dispatch()
             
-            # E-posta bildirimi gönder
+            # E-posta bildirimi gönder (özet tercih eden sakin olayı özet e-postasında görür)
             try:
-                send_email(
-                    to=selected_user.email,
-                    subject=f"Yeni Aidat Bildirimi: {new_due.description}",
-                    template='email/new_dues_notification',
-                    resident_name=selected_user.name,
-                    dues=new_due
-                )
+                if wants_immediate_email(selected_user):
+                    send_email(
+                        to=selected_user.email,
+                        subject=f"Yeni Aidat Bildirimi: {new_due.description}",
+                        template='email/new_dues_notification',
+                        resident_name=selected_user.name,
+                        dues=new_due
+                    )
             except Exception as e:
                 current_app.logger.error(f"Aidat e-postası gönderilemedi (Kullanıcı: {selected_user.id}): {e}")
 
-            # Push bildirimi gönder
-            try:
-                send_push_notification(
-                    user_id=selected_user.id,
-                    title="Yeni Aidat Borcu",
-                    body=f"{new_due.description} dönemi aidat borcunuz tanımlanmıştır.",
-                    notification_type="dues", 
-                    item_id=None
-                )
-            except Exception as e:
-                current_app.logger.error(f"Aidat push bildirimi gönderilemedi (Kullanıcı: {selected_user.id}): {e}")
-
             flash("Aidat başarıyla eklendi ve sakine bildirim gönderildi.", "success")
             return redirect(url_for("admin.add_dues"))
 
@@ -470,33 +479,30 @@ def approve_receipt(dues_id):
         apartment_id=dues.apartment_id
     )
     db.session.add(income_transaction)
-    
+
+    enqueue_notification(
+        [dues.user_id],
+        make_event_key('dues_approved', dues.id),
+        title="Ödemeniz Onaylandı",
+        body=f'"{dues.description}" için yaptığınız ödeme yönetici tarafından onaylanmıştır.',
+        notification_type="dues",
+        item_id=None
+    )
     db.session.commit()
+    start_notification_dispatch()
 
     # E-posta bildirimi gönder
     try:
-        send_email(
-            to=dues.user.email,
-            subject=f"Ödemeniz Onaylandı: {dues.description}",
-            template='email/payment_approved_notification',
-            resident_name=dues.user.name,
-            dues_description=dues.description
-        )
+        if wants_immediate_email(dues.user):
+            send_email(
+                to=dues.user.email,
+                subject=f"Ödemeniz Onaylandı: {dues.description}",
+                template='email/payment_approved_notification',
+                resident_name=dues.user.name,
+                dues_description=dues.description
+            )
     except Exception as e:
         current_app.logger.error(f"Ödeme onayı e-postası gönderilemedi (Kullanıcı: {dues.user.id}): {e}")
-
-    # <-- YENİ EKLENEN PUSH BİLDİRİMİ KODU
-    try:
-        send_push_notification(
-            user_id=dues.user.id,
-            title="Ödemeniz Onaylandı",
-            body=f'"{dues.description}" için yaptığınız ödeme yönetici tarafından onaylanmıştır.',
-            notification_type="dues",
-            item_id=None
-        )
-    except Exception as e:
-        current_app.logger.error(f"Ödeme onayı push bildirimi gönderilemedi (Kullanıcı: {dues.user.id}): {e}")
-    # --- EKLEME SONU ---
     
     flash("Ödeme başarıyla onaylandı ve sakine bildirim gönderildi.", "success")
     return redirect(url_for("admin.receipt_review"))
@@ -623,20 +629,21 @@ def all_requests():
         if status_enum:
             query = query.filter(RequestModel.status == status_enum)
 
-    # YENİ EKLENDİ: Eğer arama kutusu doluysa sorguya yeni bir filtre ekliyoruz.
-    if content_search:
-        search_term = f"%{content_search}%"
-        query = query.filter(
-            or_(
-                RequestModel.title.ilike(search_term),
-                RequestModel.description.ilike(search_term)
-            )
-        )
+    # Arama: tam metin indeksi üzerinden, alaka düzeyine göre sıralı (bkz. app/search.py)
+    query, search_terms = apply_request_search(query, content_search)
 
     # Sayfalama
     pagination = query.paginate(page=page, per_page=per_page, error_out=False)
     requests_paginated = pagination.items
 
+    # Arama yapıldıysa eşleşen kelimeler işaretlenmiş başlık ve açıklama alıntıları
+    snippets = {
+        req.id: {
+            'title': highlight_snippet(req.title, search_terms, width=150),
+            'description': highlight_snippet(req.description, search_terms),
+        } for req in requests_paginated
+    } if search_terms else {}
+
     # Not: pagination linklerinin de arama parametresini taşıması için
     # request.args'ı template'e göndermek en temiz yoldur.
     # Bu, request_list_admin.html dosyanızda zaten pagination linklerini
@@ -644,7 +651,8 @@ def all_requests():
     return render_template(
         'admin/request_list_admin.html',
         requests=requests_paginated,
-        pagination=pagination
+        pagination=pagination,
+        snippets=snippets
     )
 
 
@@ -671,34 +679,33 @@ def reply_request(request_id):
         req.reply = reply_form.reply.data
         req.status = RequestStatus.ISLEMDE
         req.updated_at = datetime.utcnow()
+        # Aynı yanıt iki kez gönderilirse (çift tıklama) bildirim tekrar gitmez
+        enqueue_notification(
+            [req.user_id],
+            make_event_key('request_reply', req.id, req.reply),
+            title="Talebinize Yanıt Verildi",
+            body=f'"{req.title}" başlıklı talebinize yönetici tarafından bir yanıt gönderildi.',
+            notification_type="request_detail",
+            item_id=req.id
+        )
         db.session.commit()
+        start_notification_dispatch()
         
         # E-posta bildirimi gönder
         try:
-            send_email(
-                to=req.user.email,
-                subject=f"Talebinize Yanıt Verildi: {req.title}",
-                template='email/request_reply_notification',
-                resident_name=req.user.name,
-                request_title=req.title,
-                request_reply=req.reply,
-                request_id=req.id 
-            )
+            if wants_immediate_email(req.user):
+                send_email(
+                    to=req.user.email,
+                    subject=f"Talebinize Yanıt Verildi: {req.title}",
+                    template='email/request_reply_notification',
+                    resident_name=req.user.name,
+                    request_title=req.title,
+                    request_reply=req.reply,
+                    request_id=req.id
+                )
         except Exception as e:
             current_app.logger.error(f"Talep yanıtı e-postası gönderilemedi: {e}")
             
-        # <-- YENİ EKLENEN PUSH BİLDİRİMİ KODU
-        try:
-            send_push_notification(
-                user_id=req.user.id,
-                title="Talebinize Yanıt Verildi",
-                body=f'"{req.title}" başlıklı talebinize yönetici tarafından bir yanıt gönderildi.',
-                notification_type="request_detail",
-                item_id=req.id
-            )
-        except Exception as e:
-            current_app.logger.error(f"Talep yanıtı push bildirimi gönderilemedi: {e}")
-        # --- EKLEME SONU ---
             
         flash("Talebe yanıt gönderildi.", "success")
         return redirect(url_for('admin.all_requests'))
@@ -799,36 +806,33 @@ def create_poll():
                 "vote_link": url_for('poll.view_poll', poll_id=new_poll.id, _external=True)
             }
 
-            # 4. Her bir sakine döngü ile e-posta gönder
-            for resident in residents:
-                if resident.email:
-                    try:
-                        send_email(
-                            to=resident.email,
-                            subject=f"Yeni Anket: {new_poll.question[:45]}...",
-                            template='email/new_poll_notification',
-                            resident_name=resident.name,
-                            poll=poll_data,
-                            current_year=datetime.utcnow().year
-                        )
-                    except Exception as e:
-                        current_app.logger.error(f"Anket e-postası gönderilemedi (Kullanıcı: {resident.id}): {e}")
-
-            # Şimdi tek seferde toplu push bildirimi gönder
+            # Push bildirimlerini anketle aynı transaction'da kutuya yaz
+            enqueue_notification(
+                [resident.id for resident in residents],
+                make_event_key('poll', new_poll.id),
+                title="Yeni Anket Yayında",
+                body=f'"{new_poll.question}" sorulu yeni bir anket oylamaya açılmıştır.',
+                notification_type="polls", # 'poll_detail' -> 'polls' olarak değiştirildi
+                item_id=None # Anket ID'si kaldırıldı, çünkü ana listeye gidiyor
+            )
+
+            db.session.commit()
+            start_notification_dispatch()
+
+            # 4. E-postayı toplu gönder (özet tercih edenler anketi özet e-postasında görür)
+            email_residents = immediate_email_users(residents)
             try:
-                # <<< GÜNCELLEME BURADA BAŞLIYOR >>>
-                send_notification_to_users(
-                    users=residents,
-                    title="Yeni Anket Yayında",
-                    body=f'"{new_poll.question}" sorulu yeni bir anket oylamaya açılmıştır.',
-                    notification_type="polls", # 'poll_detail' -> 'polls' olarak değiştirildi
-                    item_id=None # Anket ID'si kaldırıldı, çünkü ana listeye gidiyor
+                send_bulk_email(
+                    [resident.email for resident in email_residents],
+                    subject=f"Yeni Anket: {new_poll.question[:45]}...",
+                    template='email/new_poll_notification',
+                    per_recipient_ctx={r.email: {'resident_name': r.name} for r in email_residents if r.email},
+                    poll=poll_data,
+                    current_year=datetime.utcnow().year
                 )
-                # <<< GÜNCELLEME BİTTİ >>>
             except Exception as e:
-                current_app.logger.error(f"Toplu anket push bildirimi gönderilemedi: {e}")
+                current_app.logger.error(f"Toplu anket e-postası gönderilemedi: {e}")
 
-            db.session.commit()
             flash(f"Anket oluşturuldu ve {len(residents)} sakine bildirim gönderildi.", "success")
             return redirect(url_for('admin.dashboard'))
 
@@ -1080,6 +1084,8 @@ def add_post():
             )
             db.session.add(new_post)
             db.session.commit()
+            if image_url:
+                start_image_processing('post', new_post.id)
             flash("Yeni blog yazısı başarıyla kaydedildi.", "success")
             return redirect(url_for('admin.list_posts'))
         except Exception as e:
@@ -1102,6 +1108,7 @@ def edit_post(post_id):
     if form.validate_on_submit():
         try:
             # 1. Formdan YENİ bir resim dosyası gelip gelmediğini kontrol et
+            image_changed = False
             if form.image.data:
                 image_file = form.image.data
                 # 2. Yeni resmi Google Cloud Storage'a yükle
@@ -1109,6 +1116,8 @@ def edit_post(post_id):
                 if new_image_url:
                     # Sadece yükleme başarılı olursa mevcut resim URL'sini güncelle
                     post.image_url = new_image_url
+                    reset_variants(post, 'post')
+                    image_changed = True
                 else:
                     flash("Yeni resim yüklenirken bir hata oluştu. Resim güncellenmedi.", "warning")
             
@@ -1117,6 +1126,8 @@ def edit_post(post_id):
             post.slug = form.slug.data.lower().replace(" ", "-")
             post.is_published = form.is_published.data
             db.session.commit()
+            if image_changed:
+                start_image_processing('post', post.id)
             flash("Yazı başarıyla güncellendi.", "success")
             return redirect(url_for('admin.list_posts'))
         except Exception as e:
@@ -1180,6 +1191,7 @@ def manage_recurring_expenses():
                            rules=rules)
 
 @admin_bp.route('/tasks/generate-recurring-dues')
+@cron_job
 def generate_recurring_dues():
     """
     App Engine Cron Job tarafından her gün tetiklenmek üzere tasarlanmıştır.
@@ -1198,50 +1210,70 @@ def generate_recurring_dues():
     
     current_app.logger.info(f"Cron job çalıştı. Bugünün günü: {today_day_number}. Çalıştırılacak kural sayısı: {len(rules_to_run)}")
 
+    start_of_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    created = []  # (kural id, örnek aidat, {e-posta: ad}) — e-posta adresleri commit'ten önce toplanır
     for rule in rules_to_run:
         # Kuralın ait olduğu apartmandaki tüm aktif sakinleri bul
         residents = User.query.filter_by(apartment_id=rule.apartment_id, role='resident', is_active=True).all()
-        
+
+        assigned_residents = []
+        new_due = None
         for resident in residents:
             # EN ÖNEMLİ KONTROL: Mükerrer kaydı önle!
             # Bu ay için bu kuraldan bu sakine daha önce bir aidat oluşturulmuş mu?
-            start_of_month = datetime.utcnow().replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-            
+            # Dues'ta created_at yok; otomatik aidatın due_date'i oluşturulduğu gündür
             existing_due = Dues.query.filter(
                 Dues.user_id == resident.id,
                 Dues.description == rule.description,
-                Dues.created_at >= start_of_month 
+                Dues.due_date >= start_of_month.date()
             ).first()
 
             # Eğer bu ay içinde bu aidat daha önce oluşturulmadıysa, şimdi oluştur.
             if not existing_due:
-                try:
-                    # Yeni aidat borcunu oluştur
-                    new_due = Dues(
-                        user_id=resident.id,
-                        apartment_id=resident.apartment_id,
-                        amount=rule.amount,
-                        description=rule.description,
-                        due_date=datetime.utcnow().date(), # Son ödeme tarihini istediğiniz gibi ayarlayabilirsiniz
-                        created_at=datetime.utcnow() # Mükerrer kontrol için bu tarih önemli
-                    )
-                    db.session.add(new_due)
-                    
-                    # Sakine e-posta gönder
-                    send_email(
-                        to=resident.email,
-                        subject=f"Yeni Aidat Bildirimi: {new_due.description}",
-                        template='email/new_dues_notification',
-                        resident_name=resident.name,
-                        dues=new_due
-                    )
-                    current_app.logger.info(f"Aidat oluşturuldu: Kullanıcı {resident.id}, Kural {rule.id}")
-                except Exception as e:
-                    current_app.logger.error(f"Otomatik aidat oluşturulurken hata: {e}")
-    
+                new_due = Dues(
+                    user_id=resident.id,
+                    apartment_id=resident.apartment_id,
+                    amount=rule.amount,
+                    description=rule.description,
+                    due_date=datetime.utcnow().date() # Mükerrer kontrol bu tarihe bakar
+                )
+                db.session.add(new_due)
+                assigned_residents.append(resident)
+                current_app.logger.info(f"Aidat oluşturuldu: Kullanıcı {resident.id}, Kural {rule.id}")
+
+        if not assigned_residents:
+            continue
+        # Push bildirimlerini kutuya yaz (aidatlarla aynı transaction'da)
+        enqueue_notification(
+            [resident.id for resident in assigned_residents],
+            make_event_key('dues_recurring', rule.id, f"{start_of_month:%Y-%m}"),
+            title="Yeni Aidat Borcu",
+            body=f"{rule.description} dönemi aidat borcunuz tanımlanmıştır.",
+            notification_type="dues",
+            item_id=None
+        )
+        email_residents = immediate_email_users(assigned_residents)
+        created.append((rule.id, new_due, {r.email: r.name for r in email_residents if r.email}))
+
     # Tüm işlemler bittikten sonra veritabanına kaydet
     db.session.commit()
-    
+    start_notification_dispatch()
+
+    # E-postaları kural başına toplu gönder (özet tercih eden sakinler olayı özet e-postasında görür)
+    for rule_id, new_due, recipients in created:
+        if not recipients:
+            continue
+        try:
+            send_bulk_email(
+                list(recipients),
+                subject=f"Yeni Aidat Bildirimi: {new_due.description}",
+                template='email/new_dues_notification',
+                per_recipient_ctx={email: {'resident_name': name} for email, name in recipients.items()},
+                dues=new_due
+            )
+        except Exception as e:
+            current_app.logger.error(f"Otomatik aidat e-postası gönderilemedi (Kural: {rule_id}): {e}")
+
     # Cron servisine işlemin başarılı olduğunu bildir
     return "OK", 200
 
@@ -1284,6 +1316,7 @@ def edit_content(key):
                            title=f"İçeriği Düzenle: {content_obj.title}")
 
 @admin_bp.route('/tasks/check-expired-polls')
+@cron_job
 def check_expired_polls():
     """
     App Engine Cron Job tarafından her gün tetiklenmek üzere tasarlanmıştır.
@@ -1316,27 +1349,22 @@ def check_expired_polls():
             
             current_app.logger.info(f"Anket #{poll.id} için {len(user_ids_to_notify)} katılımcıya bildirim gönderilecek.")
 
-            # 2. Eğer oy veren varsa, bu kullanıcıların User nesnelerini tek bir sorgu ile çek
-            if user_ids_to_notify:
-                users_to_notify = User.query.filter(User.id.in_(user_ids_to_notify)).all()
-                
-                # 3. Tek seferde toplu push bildirimi gönder
-                try:
-                    send_notification_to_users(
-                        users=users_to_notify,
-                        title="Anket Sonuçlandı",
-                        body=f'"{poll.question}" sorulu anketin oylaması tamamlandı. Sonuçları görmek için tıklayın.',
-                        notification_type="poll_detail",
-                        item_id=poll.id
-                    )
-                except Exception as e:
-                    current_app.logger.error(f"Toplu anket sonucu push bildirimi gönderilemedi (Anket ID: {poll.id}): {e}")
+            # 2-3. Bildirimleri kutuya yaz (gönderim commit'ten sonra toplu yapılır)
+            enqueue_notification(
+                user_ids_to_notify,
+                make_event_key('poll_result', poll.id),
+                title="Anket Sonuçlandı",
+                body=f'"{poll.question}" sorulu anketin oylaması tamamlandı. Sonuçları görmek için tıklayın.',
+                notification_type="poll_detail",
+                item_id=poll.id
+            )
             
-            # 4. Bildirimler gönderildikten sonra anketi "gönderildi" olarak işaretle
+            # 4. Anketi "gönderildi" olarak işaretle (bildirimlerle aynı transaction'da)
             poll.result_notification_sent = True
         
         # 5. Tüm değişiklikleri veritabanına kaydet
         db.session.commit()
+        start_notification_dispatch()
         
         return f"Processed {len(expired_polls)} polls.", 200
 
@@ -1344,3 +1372,77 @@ def check_expired_polls():
         db.session.rollback()
         current_app.logger.error(f"Anket sonuçları cron job çalışırken hata oluştu: {e}")
         return "An error occurred.", 500
+
+@admin_bp.route('/tasks/process-pending-receipts')
+@cron_job
+def process_pending_receipts():
+    """
+    App Engine Cron Job tarafından birkaç dakikada bir tetiklenmek üzere tasarlanmıştır.
+    Sunucu yeniden başladığı için arka plandaki doğrulaması yarıda kalan dekontları
+    yeniden kuyruğa alır ve işler.
+    """
+    # GÜVENLİK: Bu isteğin sadece Google App Engine Cron servisinden geldiğini doğrula.
+    if 'X-Appengine-Cron' not in request.headers:
+        current_app.logger.warning("Yetkisiz dekont doğrulama cron job denemesi engellendi.")
+        return "Forbidden", 403
+
+    try:
+        processed = requeue_stale_receipts()
+        current_app.logger.info(f"Dekont doğrulama cron job çalıştı. {processed} adet yarıda kalmış dekont işlendi.")
+        return f"Processed {processed} receipts.", 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Dekont doğrulama cron job çalışırken hata oluştu: {e}")
+        return "An error occurred.", 500
+
+
+@admin_bp.route('/tasks/dispatch-notifications')
+@cron_job
+def dispatch_notifications():
+    """
+    App Engine Cron Job tarafından birkaç dakikada bir tetiklenmek üzere tasarlanmıştır.
+    Yarıda kalan bildirimleri kuyruğa geri alır, zamanı gelen yeniden denemeleri
+    gönderir ve saklama süresi dolmuş bildirim kayıtlarını ve süresi geçmiş token
+    iptal kayıtlarını siler.
+    """
+    # GÜVENLİK: Bu isteğin sadece Google App Engine Cron servisinden geldiğini doğrula.
+    if 'X-Appengine-Cron' not in request.headers:
+        current_app.logger.warning("Yetkisiz bildirim gönderimi cron job denemesi engellendi.")
+        return "Forbidden", 403
+
+    try:
+        requeued = requeue_stale_notifications()
+        delivered = dispatch_pending_notifications()
+        purged = purge_old_notifications()
+        purged_revocations = purge_expired_revocations()
+        current_app.logger.info(
+            f"Bildirim cron job çalıştı. {requeued} bildirim kuyruğa geri alındı, "
+            f"{delivered} bildirim teslim edildi, {purged} eski kayıt ve "
+            f"{purged_revocations} süresi geçmiş token iptali silindi."
+        )
+        return f"Delivered {delivered} notifications.", 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Bildirim cron job çalışırken hata oluştu: {e}")
+        return "An error occurred.", 500
+
+
+@admin_bp.route('/tasks/send-digests/<any(hourly, daily):mode>')
+@cron_job
+def send_notification_digests(mode):
+    """
+    App Engine Cron Job tarafından saatlik (/hourly) ve günlük (/daily) tetiklenmek üzere
+    tasarlanmıştır. Özet tercih eden kullanıcılara bekleyen olaylarını tek e-postada gönderir.
+    """
+    # GÜVENLİK: Bu isteğin sadece Google App Engine Cron servisinden geldiğini doğrula.
+    if 'X-Appengine-Cron' not in request.headers:
+        current_app.logger.warning("Yetkisiz özet e-postası cron job denemesi engellendi.")
+        return "Forbidden", 403
+
+    try:
+        sent = send_digests(mode)
+        return f"Sent {sent} {mode} digests.", 200
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Özet e-postası cron job çalışırken hata oluştu: {e}")
+        return "An error occurred.", 500
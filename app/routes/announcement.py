@@ -5,8 +5,9 @@ from app.models import db, Announcement
 from app.forms.admin_forms import CSRFProtectForm 
 from datetime import datetime
 from app.models import User
-from app.email import send_email
-from app.notifications import send_push_notification, send_notification_to_users
+from app.email import send_bulk_email
+from app.notification_digest import immediate_email_users
+from app.notification_outbox import enqueue_notification, make_event_key, start_notification_dispatch
 import firebase_admin
 from firebase_admin import messaging
 
@@ -78,7 +79,7 @@ def create_announcement():
                 apartment_id=current_user.apartment_id
             )
             db.session.add(new_announcement)
-            db.session.commit()
+            db.session.flush()
 
             # 2. Apartmandaki tüm aktif sakinleri bul
             residents = User.query.filter_by(
@@ -87,31 +88,30 @@ def create_announcement():
                 is_active=True
             ).all()
 
-            # 3. Her bir sakine döngü ile e-posta ve push bildirimi gönder
-            for resident in residents:
-                if resident.email:
-                    try:
-                        send_email(
-                            to=resident.email,
-                            subject=f"Yeni Duyuru: {new_announcement.title}",
-                            template='email/new_announcement_notification',
-                            announcement=new_announcement,
-                            resident_name=resident.name
-                        )
-                    except Exception as e:
-                        current_app.logger.error(f"Duyuru e-postası gönderilemedi (Kullanıcı: {resident.id}): {e}")
-
-            # Şimdi tek seferde toplu push bildirimi gönder
+            # Push bildirimleri duyuruyla aynı transaction'da kutuya yazılır
+            enqueue_notification(
+                [resident.id for resident in residents],
+                make_event_key('announcement', new_announcement.id),
+                title=new_announcement.title,
+                body="Yeni bir duyuru yayınlandı. Detaylar için uygulamayı kontrol edebilirsiniz.",
+                notification_type="announcement",
+                item_id=new_announcement.id
+            )
+            db.session.commit()
+            start_notification_dispatch()
+
+            # 3. E-postayı toplu gönder (özet tercih edenler duyuruyu özet e-postasında görür)
+            email_residents = immediate_email_users(residents)
             try:
-                send_notification_to_users(
-                    users=residents,
-                    title=new_announcement.title,
-                    body="Yeni bir duyuru yayınlandı. Detaylar için uygulamayı kontrol edebilirsiniz.",
-                    notification_type="announcement",
-                    item_id=new_announcement.id
+                send_bulk_email(
+                    [resident.email for resident in email_residents],
+                    subject=f"Yeni Duyuru: {new_announcement.title}",
+                    template='email/new_announcement_notification',
+                    per_recipient_ctx={r.email: {'resident_name': r.name} for r in email_residents if r.email},
+                    announcement=new_announcement
                 )
             except Exception as e:
-                current_app.logger.error(f"Toplu duyuru push bildirimi gönderilemedi: {e}")
+                current_app.logger.error(f"Toplu duyuru e-postası gönderilemedi: {e}")
 
             flash(f"Duyuru başarıyla yayınlandı ve {len(residents)} sakine bildirim gönderildi.", 'success')
 
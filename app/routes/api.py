@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify, url_for, send_from_directory, current_app, redirect
 from datetime import datetime
+from functools import wraps
 import uuid
 import os
 import re
@@ -17,15 +18,27 @@ from sqlalchemy import func
 from werkzeug.datastructures import MultiDict
 from werkzeug.utils import secure_filename
 from werkzeug.security import check_password_hash, generate_password_hash
-from flask_jwt_extended import create_access_token, jwt_required, get_jwt_identity
+from flask_jwt_extended import jwt_required, get_current_user, get_jwt
 from app.models import Apartment, Block
 from app.models import DynamicContent
 from bs4 import BeautifulSoup
+from app.financial_rollups import get_monthly_history, month_start, add_months
+from app.receipt_processing import queue_receipt, start_receipt_verification, serialize_receipt_status
+from app.direct_uploads import create_upload, complete_upload, DirectUploadError
+from app.storage import get_storage, verify_local_upload_token
+from app.image_variants import start_image_processing
+from app.notification_digest import NOTIFICATION_DIGEST_CHOICES
+from app.auth_tokens import issue_tokens, revoke_token, revoke_encoded_token, revoke_all_user_tokens
+from app.passwords import authenticate, hash_password, PasswordCheckOverloaded
+from app.formatters import format_date, format_tl
 
 
 # API için yeni bir Blueprint oluşturuyoruz.
 api_bp = Blueprint("api", __name__)
 
+# /financials/history ile tek istekte dönebilecek en fazla ay sayısı
+FINANCIAL_HISTORY_MAX_MONTHS = 60
+
 
 # === GÜNCELLENMİŞ YARDIMCI FONKSİYONLAR ===
 def api_success(data, msg="İşlem başarılı.", status_code=200):
@@ -47,23 +60,29 @@ def api_error(message, status_code):
         "errorMessage": message,
         "data": None
     }), status_code
-# =================================
-
-def format_tl(value):
-    # 7500.5 -> ₺7.500,50
-    try:
-        v = float(value)
-    except (TypeError, ValueError):
-        v = 0.0
-    return f"₺{v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
 
 
+def jwt_user_required(fn):
+    """
+    jwt_required() ile aynı; ek olarak token sahibinin aktif olduğunu denetler.
+    Kullanıcı, yetki özeti önbelleğinden çözülür (app/principals.py), yaygın durumda
+    veritabanına gidilmez. View içinde get_current_user() ile Principal olarak alınır.
+    """
+    @wraps(fn)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        if not get_current_user().is_active:
+            return api_error("Hesabınız henüz onaylanmamış veya pasif durumdadır", 403)
+        return fn(*args, **kwargs)
+    return wrapper
+# =================================
 
 @api_bp.route('/login', methods=['POST'])
 def api_login():
     """Kullanıcı Girişi ve JWT Oluşturma
     Bu endpoint, kullanıcının e-posta ve şifresini alarak kimliğini doğrular.
-    Başarılı olursa, API'nin diğer endpoint'lerine erişim için kullanılacak bir JWT (access_token) döndürür.
+    Başarılı olursa, API'nin diğer endpoint'lerine erişim için kullanılacak kısa ömürlü bir JWT
+    (access_token, ömrü expires_in saniye) ve yenisini almak için bir refresh_token döndürür.
     ---
     tags:
       - Kimlik Doğrulama (Authentication)
@@ -87,13 +106,15 @@ def api_login():
               example: "123456"
     responses:
       200:
-        description: Giriş başarılı. Token ve kullanıcı bilgileri döndürülür.
+        description: Giriş başarılı. Token'lar (access_token, refresh_token, expires_in) ve kullanıcı bilgileri döndürülür.
       400:
         description: Eksik JSON verisi veya eksik e-posta/şifre.
       401:
         description: Hatalı e-posta veya şifre.
       403:
         description: Kullanıcı hesabı henüz onaylanmamış veya pasif durumdadır.
+      503:
+        description: Giriş istekleri çok yoğun; Retry-After saniye sonra tekrar denenmelidir.
     """
     
     data = request.get_json()
@@ -108,15 +129,21 @@ def api_login():
 
     user = User.query.filter_by(email=email).first()
 
-    if not user or not check_password_hash(user.password, password):
+    try:
+        authenticated = authenticate(user, password)
+    except PasswordCheckOverloaded:
+        response, status_code = api_error("Sunucu şu anda yoğun. Lütfen birkaç saniye sonra tekrar deneyin.", 503)
+        response.headers['Retry-After'] = '5'
+        return response, status_code
+
+    if not authenticated:
         return api_error("Hatalı e-posta veya şifre", 401)
     
     if not user.is_active:
         return api_error("Hesabınız henüz onaylanmamış veya pasif durumdadır", 403)
 
-    # access_token = create_access_token(identity=user.id)
-    access_token = create_access_token(identity=str(user.id))
-    
+    tokens = issue_tokens(user.id)
+
     # Mobil uygulamaya gönderilecek zenginleştirilmiş kullanıcı verisi
     user_data = {
         "id": user.id,
@@ -138,10 +165,82 @@ def api_login():
     
     # Başarılı cevap olarak token'ı ve kullanıcı bilgilerini döndür.
     return api_success({
-        "access_token": access_token,
+        **tokens,
         "user": user_data
     })
 
+
+@api_bp.route('/token/refresh', methods=['POST'])
+@jwt_required(refresh=True)
+def refresh_tokens():
+    """Token Yenileme
+    Süresi dolan erişim token'ı yerine yeni bir token çifti üretir.
+    Authorization başlığında refresh_token gönderilmelidir. Kullanılan refresh token
+    iptal edilir (rotasyon); aynı refresh token ikinci kez kullanılamaz.
+    ---
+    tags:
+      - Kimlik Doğrulama (Authentication)
+    security:
+      - bearerAuth: []
+    responses:
+      200:
+        description: Yeni access_token, refresh_token ve expires_in döndürülür.
+      401:
+        description: Refresh token geçersiz, süresi dolmuş veya daha önce kullanılmış.
+      403:
+        description: Kullanıcı hesabı pasif durumdadır.
+    """
+    user = get_current_user()
+    if not user.is_active:
+        return api_error("Hesabınız henüz onaylanmamış veya pasif durumdadır", 403)
+
+    # Aynı refresh token ile eş zamanlı iki istekten sadece biri yeni çift alır
+    if not revoke_token(get_jwt()):
+        return api_error("Oturumunuz sonlandırılmış. Lütfen tekrar giriş yapın.", 401)
+
+    return api_success(issue_tokens(user.id), "Oturum yenilendi.")
+
+
+@api_bp.route('/logout', methods=['POST'])
+@jwt_required()
+def api_logout():
+    """Çıkış
+    Kullanılan erişim token'ını ve (gönderildiyse) refresh token'ı iptal eder.
+    all_devices true gönderilirse kullanıcının tüm cihazlardaki oturumları kapatılır.
+    ---
+    tags:
+      - Kimlik Doğrulama (Authentication)
+    security:
+      - bearerAuth: []
+    parameters:
+      - in: body
+        name: body
+        required: false
+        schema:
+          properties:
+            refresh_token:
+              type: string
+              description: Bu cihazın refresh token'ı.
+            all_devices:
+              type: boolean
+              description: true ise tüm cihazlardaki oturumlar kapatılır.
+    responses:
+      200:
+        description: Çıkış yapıldı.
+      401:
+        description: Geçerli bir JWT (access_token) sağlanmadı.
+    """
+    user = get_current_user()
+    data = request.get_json(silent=True) or {}
+
+    revoke_token(get_jwt())
+    if data.get('refresh_token'):
+        revoke_encoded_token(data['refresh_token'], user.id)
+    if data.get('all_devices'):
+        revoke_all_user_tokens(user.id)
+
+    return api_success(None, "Çıkış yapıldı.")
+
 # =================================================================
 # YENİ: KAYIT EKRANI İÇİN APARTMANLARI LİSTELEYEN ENDPOINT
 # =================================================================
@@ -254,7 +353,7 @@ def get_blocks_for_apartment(apartment_id):
 
 
 @api_bp.route('/announcements', methods=['GET'])
-@jwt_required()
+@jwt_user_required
 def get_announcements():
     """Apartmana Ait Duyuruları Listeler
     Giriş yapmış kullanıcının apartmanına ait olan tüm duyuruları, en yeniden
@@ -319,10 +418,7 @@ def get_announcements():
         description: Token'a ait kullanıcı bulunamadı.
     """
     
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    if not user:
-        return api_error("Kullanıcı bulunamadı", 404)
+    user = get_current_user()
 
     # 1. URL'den sayfa numarasını al
     page = request.args.get('page', 1, type=int)
@@ -346,7 +442,7 @@ def get_announcements():
             "content": ann.content,
             "creator_name": ann.creator.name,
             "created_at": ann.created_at.isoformat(), # Bu satır ham data olarak kalmalı
-            "created_at_display": ann.created_at.strftime('%d %B %Y, %H:%M') # YENİ EKLENEN FORMATLI ALAN
+            "created_at_display": format_date(ann.created_at) # YENİ EKLENEN FORMATLI ALAN
         })
         
     # 4. Yanıtı, hem duyuru listesini hem de sayfalama bilgilerini içerecek şekilde oluştur
@@ -365,7 +461,7 @@ def get_announcements():
 
 
 @api_bp.route('/dues', methods=['GET'])
-@jwt_required()
+@jwt_user_required
 def get_dues():
     """Kullanıcının Aidatlarını Listeler
     Giriş yapmış kullanıcının kendisine atanmış tüm aidat borçlarını, en yeniden
@@ -436,17 +532,14 @@ def get_dues():
         description: Token'a ait kullanıcı bulunamadı.
     """
     
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    if not user:
-        return api_error("Kullanıcı bulunamadı", 404)
+    user = get_current_user()
 
     # 1. URL'den sayfa numarasını al (?page=2 gibi). Varsayılan: 1. sayfa.
     page = request.args.get('page', 1, type=int)
     per_page = 15 # Mobil uygulama için sayfa başına 15-20 öğe daha uygun olabilir
 
     # 2. .all() yerine .paginate() kullanarak sadece ilgili sayfadaki aidatları çek.
-    pagination = Dues.query.filter_by(user_id=current_user_id) \
+    pagination = Dues.query.filter_by(user_id=user.id) \
         .order_by(Dues.due_date.desc()) \
         .paginate(page=page, per_page=per_page, error_out=False)
     
@@ -465,13 +558,13 @@ def get_dues():
             "amount": due.amount,
             "due_date": due.due_date.isoformat(),
             "status": status,
-            "period": due.due_date.strftime("%B %Y"),  # Dönem bilgisi
+            "period": format_date(due.due_date, "%B %Y"),  # Dönem bilgisi
             "amount_display": format_tl(due.amount)
         })
 
     # Toplam borç hesaplaması aynı kalıyor.
     total_debt_query = db.session.query(func.sum(Dues.amount)).filter(
-        Dues.user_id == current_user_id,
+        Dues.user_id == user.id,
         Dues.is_paid == False
     ).scalar()
     total_debt = total_debt_query or 0.0
@@ -496,12 +589,14 @@ def get_dues():
 # YENİ: MOBİL İÇİN AİDAT DEKONTU YÜKLEME ENDPOINT'İ
 # =================================================================
 @api_bp.route('/dues/<int:dues_id>/receipt', methods=['POST'])
-@jwt_required()
+@jwt_user_required
 def upload_dues_receipt(dues_id):
     """Bir Aidat İçin Dekont Yükler
     URL'de belirtilen aidat borcu için bir dekont dosyası (resim veya PDF) yükler.
     İstek 'multipart/form-data' formatında olmalıdır. Dosya 'file' anahtarıyla
-    gönderilmelidir. Yüklenen dekont yönetici onayına düşer.
+    gönderilmelidir. İstek dekontu kaydedip hemen döner; doğrulama (OCR ve
+    otomatik onay) arka planda yapılır. Sonuç GET /dues/{dues_id}/receipt ile
+    sorgulanabilir ve ayrıca push bildirimi olarak gönderilir.
     ---
     tags:
       - Aidat İşlemleri (Dues)
@@ -522,7 +617,7 @@ def upload_dues_receipt(dues_id):
         description: Yüklenecek dekont dosyası (jpg, png, pdf vb.).
     responses:
       200:
-        description: Dekont başarıyla yüklendi ve yönetici onayına gönderildi.
+        description: Dekont yüklendi ve doğrulama kuyruğuna alındı.
         schema:
           type: object
           properties:
@@ -538,6 +633,9 @@ def upload_dues_receipt(dues_id):
                 upload_date:
                   type: string
                   format: date-time
+                receipt_status:
+                  type: string
+                  description: "queued, processing, auto_approved veya needs_review"
       400:
         description: İstekte dosya bulunamadı veya dosya seçilmedi.
       401:
@@ -549,10 +647,7 @@ def upload_dues_receipt(dues_id):
       500:
         description: Dosya GCS'e yüklenirken bir sunucu hatası oluştu.
     """
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    if not user:
-        return api_error("Kullanıcı bulunamadı", 404)
+    user = get_current_user()
 
     # 1. İlgili aidat borcunu bul
     dues = Dues.query.get_or_404(dues_id)
@@ -574,24 +669,86 @@ def upload_dues_receipt(dues_id):
     if not file_url:
         return api_error("Dekont yüklenirken bir sunucu hatası oluştu.", 500)
 
-    # 5. Veritabanındaki ilgili aidat kaydını güncelle
-    dues.receipt_filename = file_url
-    dues.receipt_upload_date = datetime.utcnow()
-    # Not: Otomatik onaylama mantığı (Document AI) şu an için sadece web'de.
-    # Burada sadece yükleyip yönetici onayına düşürüyoruz.
+    # 5. Aidatı doğrulama kuyruğuna al; OCR ve otomatik onay arka planda çalışır
+    queue_receipt(dues, file_url)
     db.session.commit()
+    start_receipt_verification(dues.id)
 
     # 6. Başarılı olduğuna dair JSON yanıtı dön
     response_data = {
         "dues_id": dues.id,
         "receipt_url": dues.receipt_filename,
-        "upload_date": dues.receipt_upload_date.isoformat()
+        "upload_date": dues.receipt_upload_date.isoformat(),
+        "receipt_status": dues.receipt_status
     }
     
-    return api_success(response_data, "Dekont başarıyla yüklendi ve yönetici onayına gönderildi.", 200)
+    return api_success(response_data, "Dekont yüklendi ve doğrulanıyor. Sonuç bildirim olarak iletilecek.", 200)
+
+
+@api_bp.route('/dues/<int:dues_id>/receipt', methods=['GET'])
+@jwt_user_required
+def get_dues_receipt_status(dues_id):
+    """Dekont Doğrulama Durumunu Getirir
+    Yüklenen dekontun arka plandaki doğrulama durumunu döndürür. İstemci,
+    'is_final' true olana kadar bu ucu aralıklarla sorgulayabilir.
+    ---
+    tags:
+      - Aidat İşlemleri (Dues)
+    security:
+      - bearerAuth: []
+    parameters:
+      - name: dues_id
+        in: path
+        type: integer
+        required: true
+        description: Aidat borcunun ID'si.
+    responses:
+      200:
+        description: Dekont durumu başarıyla getirildi.
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+            data:
+              type: object
+              properties:
+                dues_id:
+                  type: integer
+                is_paid:
+                  type: boolean
+                receipt_status:
+                  type: string
+                  description: "queued, processing, auto_approved, needs_review veya null (dekont yok)"
+                receipt_status_label:
+                  type: string
+                is_final:
+                  type: boolean
+                receipt_url:
+                  type: string
+                upload_date:
+                  type: string
+                  format: date-time
+                updated_at:
+                  type: string
+                  format: date-time
+      401:
+        description: Geçerli bir JWT (access_token) sağlanmadı.
+      403:
+        description: Kullanıcının bu aidat borcuna erişim yetkisi yok.
+      404:
+        description: Token'a ait kullanıcı veya belirtilen aidat borcu bulunamadı.
+    """
+    user = get_current_user()
+
+    dues = Dues.query.get_or_404(dues_id)
+    if dues.user_id != user.id:
+        return api_error("Bu aidat borcuna erişim veya işlem yapma yetkiniz yok.", 403)
+
+    return api_success(serialize_receipt_status(dues), "Dekont durumu getirildi.")
 # === YENİ EKLENEN FONKSİYON ===
 @api_bp.route('/requests', methods=['GET'])
-@jwt_required()
+@jwt_user_required
 def get_requests():
     """Kullanıcının Taleplerini Listeler
     Giriş yapmış kullanıcının kendi oluşturduğu tüm talepleri (istek/şikayet)
@@ -650,6 +807,15 @@ def get_requests():
                       attachment_url:
                         type: string
                         nullable: true
+                        description: Orijinal (tam boyut) ek.
+                      attachment_thumbnail_url:
+                        type: string
+                        nullable: true
+                        description: Listeler için küçük WebP varyant (yoksa orijinal).
+                      attachment_medium_url:
+                        type: string
+                        nullable: true
+                        description: Detay görünümü için küçültülmüş WebP varyant (yoksa orijinal).
                       status_display:
                         type: object
                         properties:
@@ -679,12 +845,7 @@ def get_requests():
         # '+00:00' yerine 'Z'
         return dt.isoformat().replace("+00:00", "Z")
 
-    # Kimliği güvenli şekilde int'e çevir
-    raw_identity = get_jwt_identity()
-    try:
-        current_user_id = int(raw_identity)
-    except (TypeError, ValueError):
-        return api_error("Geçersiz kimlik.", 401)
+    current_user_id = get_current_user().id
 
     # Sayfalama
     page = request.args.get('page', 1, type=int)
@@ -741,10 +902,13 @@ def get_requests():
             "priority": req.priority,
             "location": req.location,
             "attachment_url": req.attachment_url,
+            # Listelerde küçük varyant kullanılmalı; henüz üretilmediyse (veya ek PDF ise) orijinal döner
+            "attachment_thumbnail_url": req.attachment_thumb_url or req.attachment_url,
+            "attachment_medium_url": req.attachment_medium_url or req.attachment_url,
 
             # Legacy (görsel için server-side format). Mobilin bunları kullanmasına gerek yok.
-            "created_at_display": req.created_at.strftime('%d %B %Y, %H:%M'),
-            "updated_at_display": updated_dt.strftime('%d %B %Y, %H:%M'),
+            "created_at_display": format_date(req.created_at),
+            "updated_at_display": format_date(updated_dt),
 
             "status_display": status_display
         })
@@ -764,7 +928,7 @@ def get_requests():
 
 
 @api_bp.route('/requests/options', methods=['GET'])
-@jwt_required()
+@jwt_user_required
 def get_request_options():
     """Yeni Talep İçin Seçenekleri Getirir
     Mobil uygulamanın 'Yeni Talep Oluştur' ekranındaki Kategori, Öncelik ve Konum
@@ -831,7 +995,7 @@ def get_request_options():
 # api.py dosyanızdaki mevcut create_request fonksiyonunu bununla değiştirin
 
 @api_bp.route('/requests', methods=['POST'])
-@jwt_required()
+@jwt_user_required
 def create_request():
     """Yeni Talep (İstek/Şikayet) Oluşturur
     Mobil uygulamadan gelen verilerle yeni bir talep oluşturur. Bu endpoint
@@ -893,10 +1057,7 @@ def create_request():
       500:
         description: Dosya yüklenirken veya veritabanına kayıt sırasında sunucu hatası oluştu.
     """
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    if not user:
-        return api_error("Kullanıcı bulunamadı", 404)
+    user = get_current_user()
 
     if not request.form:
         return api_error("İstek 'multipart/form-data' formatında olmalıdır.", 415)
@@ -957,7 +1118,7 @@ def create_request():
             priority=priority_label,
             location=location_value,
             attachment_url=attachment_url,
-            user_id=current_user_id,
+            user_id=user.id,
             apartment_id=user.apartment_id
         )
         db.session.add(new_request)
@@ -967,6 +1128,10 @@ def create_request():
         current_app.logger.error(f"API - Talep oluşturma hatası: {e}")
         return api_error("Talep oluşturulurken veritabanı hatası oluştu.", 500)
 
+    # Ek bir resimse küçük resim ve küçültülmüş varyantlar arka planda üretilir
+    if attachment_url:
+        start_image_processing('request', new_request.id)
+
     # Yanıt hazırlama
     response_data = {
         "request": {
@@ -986,7 +1151,7 @@ def create_request():
 
 
 @api_bp.route('/documents', methods=['GET'])
-@jwt_required()
+@jwt_user_required
 def get_documents():
     """Kullanıcının Belgelerini Listeler
     Giriş yapmış kullanıcının sisteme yüklediği tüm kişisel belgeleri
@@ -1027,10 +1192,8 @@ def get_documents():
       401:
         description: Geçerli bir JWT (access_token) sağlanmadı."""
     
-    current_user_id = get_jwt_identity()
-    
     user_documents = Document.query.filter_by(
-        user_id=current_user_id
+        user_id=get_current_user().id
     ).order_by(Document.upload_date.desc()).all()
     
     results = []
@@ -1048,7 +1211,7 @@ def get_documents():
 
 
 @api_bp.route('/documents/<int:document_id>/download', methods=['GET'])
-@jwt_required()
+@jwt_user_required
 def download_document(document_id):
     """Belge İndirme Linki Alır
     Belirtilen ID'ye sahip belge için Google Cloud Storage üzerinde bulunan asıl dosya
@@ -1076,12 +1239,11 @@ def download_document(document_id):
       404:
         description: Belirtilen ID ile bir belge bulunamadı.
     """
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = get_current_user()
     doc = Document.query.get_or_404(document_id)
 
     # Yetki kontrolü: Belge kullanıcıya ait mi VEYA kullanıcı admin mi?
-    if doc.user_id != current_user_id and user.role != 'admin':
+    if doc.user_id != user.id and user.role != 'admin':
         return api_error("Bu belgeye erişim yetkiniz yok", 403)
 
     # Veritabanından GCS URL'ini al ve kullanıcıyı o adrese yönlendir.
@@ -1091,7 +1253,7 @@ def download_document(document_id):
 
 
 @api_bp.route('/documents', methods=['POST'])
-@jwt_required()
+@jwt_user_required
 def upload_document():
     """Yeni Belge Yükler
     Kullanıcının yeni bir kişisel belge (kira kontratı, ikametgah vb.) yüklemesini sağlar.
@@ -1148,10 +1310,7 @@ def upload_document():
       500:
         description: Dosya GCS'e yüklenirken bir sunucu hatası oluştu."""
     
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    if not user:
-        return api_error("Kullanıcı bulunamadı", 404)
+    user = get_current_user()
 
     if 'file' not in request.files:
         return api_error("İstekte dosya bulunamadı", 400)
@@ -1174,7 +1333,7 @@ def upload_document():
     new_document = Document(
         filename=file_url, # Veritabanına artık dosya adı yerine GCS URL'ini kaydediyoruz.
         doc_type=doc_type,
-        user_id=current_user_id,
+        user_id=user.id,
         apartment_id=user.apartment_id
     )
     db.session.add(new_document)
@@ -1192,8 +1351,190 @@ def upload_document():
     }
     return api_success(response_data, 201)
 
+
+# =================================================================
+# DOĞRUDAN DEPOLAMAYA YÜKLEME (İMZALI URL)
+# =================================================================
+@api_bp.route('/uploads', methods=['POST'])
+@jwt_user_required
+def create_direct_upload():
+    """İmzalı Yükleme URL'i Oluşturur
+    Dosyanın uygulama sunucusundan geçmeden doğrudan depolamaya yüklenmesi için
+    kısa ömürlü bir imzalı PUT URL'i üretir. İstemci dosyayı dönen 'upload_url'e,
+    'headers' içindeki başlıklarla PUT eder ve ardından POST /uploads/complete
+    ucunu 'upload_token' ile çağırır.
+    ---
+    tags:
+      - Dosya Yükleme (Uploads)
+    security:
+      - bearerAuth: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - purpose
+            - filename
+            - content_type
+          properties:
+            purpose:
+              type: string
+              enum: [receipt, document, request, invoice]
+              description: "Yüklemenin amacı. receipt: aidat dekontu, document: kişisel belge, request: talep eki, invoice: gider faturası (sadece yönetici)."
+            filename:
+              type: string
+              example: "dekont.pdf"
+            content_type:
+              type: string
+              enum: [application/pdf, image/png, image/jpeg]
+            size:
+              type: integer
+              description: Dosya boyutu (byte). Verilirse sınır baştan kontrol edilir.
+            target_id:
+              type: integer
+              description: "Dosyanın bağlanacağı kayıt (receipt: aidat ID, request: talep ID, invoice: gider ID). document için gerekmez."
+    responses:
+      200:
+        description: İmzalı URL oluşturuldu.
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+            data:
+              type: object
+              properties:
+                upload_url:
+                  type: string
+                method:
+                  type: string
+                  example: PUT
+                headers:
+                  type: object
+                  description: PUT isteğinde aynen gönderilmesi gereken başlıklar.
+                object_key:
+                  type: string
+                upload_token:
+                  type: string
+                expires_at:
+                  type: string
+                  format: date-time
+      400:
+        description: Geçersiz yükleme türü, dosya türü veya boyutu.
+      401:
+        description: Geçerli bir JWT (access_token) sağlanmadı.
+      403:
+        description: Kullanıcının hedef kayda dosya ekleme yetkisi yok.
+      404:
+        description: Kullanıcı veya hedef kayıt bulunamadı.
+    """
+    user = get_current_user()
+
+    data = request.get_json(silent=True) or {}
+    try:
+        upload = create_upload(
+            user,
+            data.get('purpose'),
+            data.get('filename'),
+            data.get('content_type'),
+            target_id=data.get('target_id'),
+            size=data.get('size')
+        )
+    except DirectUploadError as e:
+        return api_error(e.message, e.status_code)
+    except Exception as e:
+        current_app.logger.error(f"API - İmzalı yükleme URL'i oluşturulamadı: {e}", exc_info=True)
+        return api_error("Yükleme başlatılırken bir sunucu hatası oluştu.", 500)
+
+    return api_success(upload, "Yükleme URL'i oluşturuldu.")
+
+
+@api_bp.route('/uploads/complete', methods=['POST'])
+@jwt_user_required
+def complete_direct_upload():
+    """Doğrudan Yüklemeyi Tamamlar
+    İmzalı URL ile depolamaya yüklenen dosyayı ilgili kayda işler ve sonraki
+    adımları tetikler (ör. dekont için arka planda OCR doğrulaması).
+    ---
+    tags:
+      - Dosya Yükleme (Uploads)
+    security:
+      - bearerAuth: []
+    parameters:
+      - in: body
+        name: body
+        required: true
+        schema:
+          type: object
+          required:
+            - upload_token
+          properties:
+            upload_token:
+              type: string
+              description: POST /uploads yanıtındaki token.
+            doc_type:
+              type: string
+              description: Sadece 'document' yüklemeleri için belge türü.
+    responses:
+      200:
+        description: Dosya ilgili kayda işlendi. 'data' alanı yükleme türüne göre değişir.
+      400:
+        description: Token geçersiz/süresi dolmuş, dosya depolamada yok veya boyut sınırı aşıldı.
+      401:
+        description: Geçerli bir JWT (access_token) sağlanmadı.
+      403:
+        description: Yükleme bu kullanıcıya ait değil.
+      404:
+        description: Kullanıcı veya hedef kayıt bulunamadı.
+    """
+    user = get_current_user()
+
+    data = request.get_json(silent=True) or {}
+    try:
+        msg, response_data = complete_upload(user, data.get('upload_token'), data)
+    except DirectUploadError as e:
+        return api_error(e.message, e.status_code)
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"API - Doğrudan yükleme tamamlanamadı: {e}", exc_info=True)
+        return api_error("Yükleme tamamlanırken bir sunucu hatası oluştu.", 500)
+
+    return api_success(response_data, msg)
+
+
+@api_bp.route('/uploads/local/<token>', methods=['PUT'])
+def local_direct_upload(token):
+    """Yerel depolama arka ucunda imzalı URL'lerin karşılığı olan PUT ucu (geliştirme/test).
+    ---
+    tags:
+      - Dosya Yükleme (Uploads)
+    responses:
+      200:
+        description: Dosya kaydedildi.
+      403:
+        description: Token geçersiz veya süresi dolmuş.
+      404:
+        description: Yerel depolama arka ucu etkin değil.
+    """
+    storage = get_storage()
+    if storage.name != 'local':
+        return api_error("Bulunamadı", 404)
+
+    verified = verify_local_upload_token(token, current_app.config.get('DIRECT_UPLOAD_URL_EXPIRES', 900))
+    if not verified:
+        return api_error("Yükleme URL'i geçersiz veya süresi dolmuş.", 403)
+    key, content_type = verified
+    if request.mimetype != content_type:
+        return api_error("Content-Type imzalı URL ile uyuşmuyor.", 400)
+
+    # MAX_CONTENT_LENGTH sınırı request.stream okunurken Werkzeug tarafından uygulanır
+    storage.write(key, request.stream)
+    return api_success({"object_key": key}, "Dosya kaydedildi.")
+
 @api_bp.route('/polls', methods=['GET'])
-@jwt_required()
+@jwt_user_required
 def get_polls():
     """Apartmana Ait Anketleri Listeler
     Giriş yapmış kullanıcının apartmanına ait olan tüm aktif anketleri,
@@ -1257,10 +1598,7 @@ def get_polls():
       404:
         description: Token'a ait kullanıcı bulunamadı.
     """
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    if not user:
-        return api_error("Kullanıcı bulunamadı", 404)
+    user = get_current_user()
 
     page = request.args.get('page', 1, type=int)
     per_page = 15
@@ -1274,7 +1612,7 @@ def get_polls():
     
     polls_on_page = pagination.items
     
-    voted_poll_ids = {vote.poll_id for vote in Vote.query.filter_by(user_id=current_user_id).all()}
+    voted_poll_ids = {vote.poll_id for vote in Vote.query.filter_by(user_id=user.id).all()}
     
     results = []
     for poll in polls_on_page:
@@ -1290,7 +1628,7 @@ def get_polls():
             "id": poll.id,
             "question": poll.question,
             "created_at": poll.created_at.isoformat(),
-            "created_at_display": poll.created_at.strftime('%d %B %Y, %H:%M'), # <-- YENİ EKLENDİ
+            "created_at_display": format_date(poll.created_at), # <-- YENİ EKLENDİ
             "has_voted": poll.id in voted_poll_ids,
             "options": options_list
         })
@@ -1310,7 +1648,7 @@ def get_polls():
 
 
 @api_bp.route('/polls/<int:poll_id>', methods=['GET'])
-@jwt_required()
+@jwt_user_required
 def get_poll_details(poll_id):
     """Tek Bir Anketin Detaylarını Getirir
     Oy kullanma ekranı için, URL'de belirtilen ID'ye sahip anketin sorusunu
@@ -1358,11 +1696,7 @@ def get_poll_details(poll_id):
       404:
         description: Token'a ait kullanıcı veya belirtilen ID'ye sahip anket bulunamadı."""
     
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    if not user:
-        # GÜNCELLENDİ
-        return api_error("Kullanıcı bulunamadı", 404)
+    user = get_current_user()
 
     poll = Poll.query.get_or_404(poll_id)
 
@@ -1387,7 +1721,7 @@ def get_poll_details(poll_id):
 
 
 @api_bp.route('/polls/<int:poll_id>/vote', methods=['POST'])
-@jwt_required()
+@jwt_user_required
 def submit_vote(poll_id):
     """Bir Ankete Oy Verir
     Belirtilen ankete, gönderilen seçenek ID'si ile oy verilmesini sağlar.
@@ -1429,11 +1763,7 @@ def submit_vote(poll_id):
       409:
         description: Kullanıcı bu ankete daha önce oy kullanmış."""
     
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    if not user:
-        # GÜNCELLENDİ
-        return api_error("Kullanıcı bulunamadı", 404)
+    user = get_current_user()
 
     poll = Poll.query.get_or_404(poll_id)
 
@@ -1449,7 +1779,7 @@ def submit_vote(poll_id):
     if getattr(poll, "expiration_date", None) and datetime.utcnow() > poll.expiration_date:
         return api_error("Bu anketin oylama süresi dolmuştur.", 400)
     
-    existing_vote = Vote.query.filter_by(user_id=current_user_id, poll_id=poll_id).first()
+    existing_vote = Vote.query.filter_by(user_id=user.id, poll_id=poll_id).first()
     if existing_vote:
         # GÜNCELLENDİ
         return api_error("Bu ankete daha önce oy kullandınız.", 409)
@@ -1471,7 +1801,7 @@ def submit_vote(poll_id):
         return api_error("Geçersiz seçenek ID'si", 404)
 
     new_vote = Vote(
-        user_id=current_user_id,
+        user_id=user.id,
         poll_id=poll_id,
         option_id=option_id
     )
@@ -1482,7 +1812,7 @@ def submit_vote(poll_id):
     return api_success({"msg": "Oyunuz başarıyla kaydedildi."}, 201)
 
 @api_bp.route('/polls/<int:poll_id>/results', methods=['GET'])
-@jwt_required()
+@jwt_user_required
 def get_poll_results(poll_id):
     """Bir Anketin Sonuçlarını Getirir
     Belirtilen ID'ye sahip anketin o anki sonuçlarını, her bir seçeneğin aldığı
@@ -1536,11 +1866,7 @@ def get_poll_results(poll_id):
       404:
         description: Token'a ait kullanıcı veya belirtilen ID'ye sahip anket bulunamadı."""
     
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    if not user:
-        # GÜNCELLENDİ
-        return api_error("Kullanıcı bulunamadı", 404)
+    user = get_current_user()
 
     poll = Poll.query.get_or_404(poll_id)
 
@@ -1572,7 +1898,7 @@ def get_poll_results(poll_id):
 
 
 @api_bp.route('/craftsmen', methods=['GET'])
-@jwt_required()
+@jwt_user_required
 def get_craftsmen():
     """Anlaşmalı Ustaları Listeler
     Yönetici tarafından sisteme eklenmiş ve sakinin apartmanına ait olan
@@ -1614,10 +1940,7 @@ def get_craftsmen():
       404:
         description: Token'a ait kullanıcı bulunamadı."""
     
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    if not user:
-        return api_error("Kullanıcı bulunamadı", 404)
+    user = get_current_user()
 
     craftsmen_list = Craftsman.query.filter_by(
         apartment_id=user.apartment_id
@@ -1635,7 +1958,7 @@ def get_craftsmen():
 
 
 @api_bp.route('/craftsmen/<int:craftsman_id>/request', methods=['POST'])
-@jwt_required()
+@jwt_user_required
 def request_craftsman_contact(craftsman_id):
     """Bir Ustanın İletişim Bilgisini Talep Eder
     Belirtilen ID'ye sahip ustanın iletişim bilgisinin görüntülenmesi için
@@ -1689,10 +2012,7 @@ def request_craftsman_contact(craftsman_id):
       500:
         description: Talep loglanırken bir sunucu hatası oluştu.
     """
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    if not user:
-        return api_error("Kullanıcı bulunamadı", 404)
+    user = get_current_user()
 
     # Talep edilen ustanın varlığını ve yetkisini kontrol et
     craftsman_requested = Craftsman.query.get_or_404(craftsman_id)
@@ -1736,7 +2056,7 @@ def request_craftsman_contact(craftsman_id):
     return api_success(results, msg="Talep oluşturuldu. Usta ile iletişime geçebilirsiniz.")
 
 @api_bp.route('/financials/monthly_summary', methods=['GET'])
-@jwt_required()
+@jwt_user_required
 def get_monthly_summary_for_resident():
     """Aylık Finansal Özeti Getirir
     Giriş yapmış kullanıcının apartmanına ait, içinde bulunulan ayın gelir ve
@@ -1806,10 +2126,7 @@ def get_monthly_summary_for_resident():
       500:
         description: Veriler alınırken bir sunucu hatası oluştu.
     """
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    if not user:
-        return api_error("Kullanıcı bulunamadı", 404)
+    user = get_current_user()
 
     apartment_id = user.apartment_id
     if not apartment_id:
@@ -1838,7 +2155,7 @@ def get_monthly_summary_for_resident():
                 "id": t.id,
                 "description": t.description,
                 "amount": t.amount,
-                "date_display": t.transaction_date.strftime('%d.%m.%Y'),
+                "date_display": format_date(t.transaction_date, '%d.%m.%Y'),
                 "amount_display": format_tl(t.amount)
             }
             if t.amount > 0:
@@ -1881,6 +2198,128 @@ def get_monthly_summary_for_resident():
         return api_error("Aylık özet verileri alınırken bir sunucu hatası oluştu.", 500)
 
 
+@api_bp.route('/financials/history', methods=['GET'])
+@jwt_user_required
+def get_financial_history():
+    """Çok Aylık Finansal Geçmişi Getirir
+    Giriş yapmış kullanıcının apartmanına ait, belirtilen ay aralığındaki her ay
+    için gelir/gider toplamlarını, kategori kırılımlarını ve açılış/kapanış
+    bakiyelerini döndürür. Veriler önceden hesaplanmış aylık özet tablosundan
+    okunur. Parametre verilmezse son 12 ay döner; en fazla 60 ay istenebilir.
+    Geçerli bir JWT (access_token) gereklidir.
+    ---
+    tags:
+      - Finansal (Financials)
+    security:
+      - bearerAuth: []
+    parameters:
+      - name: from
+        in: query
+        type: string
+        required: false
+        description: Başlangıç ayı (YYYY-MM). Varsayılan, bitiş ayından 11 ay öncesidir.
+        example: "2024-01"
+      - name: to
+        in: query
+        type: string
+        required: false
+        description: Bitiş ayı (YYYY-MM). Varsayılan, içinde bulunulan aydır.
+        example: "2024-12"
+    responses:
+      200:
+        description: Aylık finansal geçmiş başarıyla döndürüldü.
+        schema:
+          type: object
+          properties:
+            success:
+              type: boolean
+            data:
+              type: object
+              properties:
+                from:
+                  type: string
+                to:
+                  type: string
+                months:
+                  type: array
+                  items:
+                    type: object
+                    properties:
+                      period:
+                        type: string
+                        example: "2024-03"
+                      month_name:
+                        type: string
+                      opening_balance:
+                        type: number
+                      closing_balance:
+                        type: number
+                      closing_balance_display:
+                        type: string
+                      total_income:
+                        type: number
+                      total_income_display:
+                        type: string
+                      total_expense:
+                        type: number
+                      total_expense_display:
+                        type: string
+                      income_by_category:
+                        type: object
+                      expense_by_category:
+                        type: object
+      400:
+        description: Geçersiz tarih formatı veya izin verilen aralığın dışında bir istek.
+      401:
+        description: Geçerli bir JWT (access_token) sağlanmadı.
+      404:
+        description: Token'a ait kullanıcı bulunamadı.
+    """
+    user = get_current_user()
+
+    def parse_period(value):
+        try:
+            return datetime.strptime(value, '%Y-%m').date()
+        except (TypeError, ValueError):
+            return None
+
+    end = month_start(datetime.utcnow())
+    if request.args.get('to'):
+        end = parse_period(request.args.get('to'))
+    start = add_months(end, -11) if end else None
+    if request.args.get('from'):
+        start = parse_period(request.args.get('from'))
+
+    if not start or not end:
+        return api_error("Tarih formatı 'YYYY-MM' olmalıdır.", 400)
+    if start > end:
+        return api_error("Başlangıç ayı bitiş ayından sonra olamaz.", 400)
+    if add_months(start, FINANCIAL_HISTORY_MAX_MONTHS) <= end:
+        return api_error(f"En fazla {FINANCIAL_HISTORY_MAX_MONTHS} aylık geçmiş istenebilir.", 400)
+
+    months = []
+    for item in get_monthly_history(user.apartment_id, start, end):
+        months.append({
+            "period": item['period'].strftime('%Y-%m'),
+            "month_name": format_date(item['period'], '%B %Y'),
+            "opening_balance": round(item['opening_balance'], 2),
+            "closing_balance": round(item['closing_balance'], 2),
+            "closing_balance_display": format_tl(item['closing_balance']),
+            "total_income": round(item['total_income'], 2),
+            "total_income_display": format_tl(item['total_income']),
+            "total_expense": round(item['total_expense'], 2),
+            "total_expense_display": format_tl(item['total_expense']),
+            "income_by_category": item['income_breakdown'],
+            "expense_by_category": item['expense_breakdown']
+        })
+
+    return api_success({
+        "from": start.strftime('%Y-%m'),
+        "to": end.strftime('%Y-%m'),
+        "months": months
+    })
+
+
 @api_bp.route('/register', methods=['POST'])
 def api_register():
     """Yeni Kullanıcı Kaydı Oluşturur
@@ -1995,7 +2434,7 @@ def api_register():
             if User.query.filter_by(email=form.email.data.lower()).first():
                 return api_error("Bu e-posta adresi zaten kayıtlı.", 409)
 
-            hashed_password = generate_password_hash(form.password.data)
+            hashed_password = hash_password(form.password.data)
 
             full_name = f"{form.first_name.data} {form.last_name.data}".strip()
 
@@ -2076,7 +2515,7 @@ def api_register():
         return api_error(", ".join(error_messages), 400)
 
 @api_bp.route('/devices/register', methods=['POST'])
-@jwt_required()
+@jwt_user_required
 def register_device():
     """Push Bildirim Token'ını Kaydeder
     Mobil cihazın, push bildirimleri alabilmesi için gerekli olan token'ını
@@ -2119,10 +2558,7 @@ def register_device():
       500:
         description: Token kaydedilirken bir sunucu hatası oluştu.
     """
-    current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
-    if not user:
-        return api_error("Kullanıcı bulunamadı.", 404)
+    user = get_current_user()
 
     data = request.get_json()
     if not data:
@@ -2363,14 +2799,14 @@ def reset_password(token):
             error_message = f"{errors[0]}"
             return api_error(error_message, 400)
     
-    hashed_password = generate_password_hash(form.password.data)
+    hashed_password = hash_password(form.password.data)
     user.password = hashed_password
     db.session.commit()
 
     return api_success({"msg": "Şifreniz başarıyla güncellendi. Şimdi giriş yapabilirsiniz."})
 
 @api_bp.route('/profile/delete', methods=['POST'])
-@jwt_required()
+@jwt_user_required
 def api_delete_account():
     """Kullanıcı Hesabını Siler (Anonimleştirir)
     Giriş yapmış kullanıcının, mevcut şifresini doğrulayarak kendi hesabını
@@ -2408,8 +2844,8 @@ def api_delete_account():
       500:
         description: "İşlem sırasında bir sunucu hatası oluştu."
     """
-    current_user_id = get_jwt_identity()
-    user_to_delete = User.query.get(current_user_id)
+    # Şifre doğrulaması ve anonimleştirme için tam kullanıcı kaydı gerekir
+    user_to_delete = User.query.get(get_current_user().id)
     if not user_to_delete:
         return api_error("Kullanıcı bulunamadı.", 404)
 
@@ -2435,7 +2871,10 @@ def api_delete_account():
             user_to_delete.is_active = False
             
             db.session.commit()
-            
+
+            # Diğer cihazlardaki oturumlar da hemen kapanır
+            revoke_all_user_tokens(user_to_delete.id)
+
             return api_success(
                 data={"msg": "Hesabınız başarıyla silinmiştir."},
                 msg="Hesap silme işlemi başarılı."
@@ -2447,8 +2886,66 @@ def api_delete_account():
     else:
         return api_error("Girdiğiniz şifre yanlış.", 401)
 
+@api_bp.route('/profile/notification-preferences', methods=['GET', 'PUT'])
+@jwt_user_required
+def notification_preferences():
+    """Bildirim E-postası Tercihini Getirir / Günceller
+    Duyuru, anket, aidat ve talep e-postalarının her olayda mı ('immediate'),
+    yoksa saatlik ('hourly') ya da günlük ('daily') tek bir özet e-postası olarak mı
+    gönderileceğini belirler. Push bildirimleri bu tercihten etkilenmez.
+    Geçerli bir JWT (access_token) gereklidir.
+    ---
+    tags:
+      - Profil (Profile)
+    security:
+      - bearerAuth: []
+    consumes:
+      - application/json
+    parameters:
+      - in: body
+        name: body
+        required: false
+        description: "Sadece PUT için."
+        schema:
+          id: NotificationPreferencesPayload
+          required:
+            - notification_digest
+          properties:
+            notification_digest:
+              type: string
+              enum: ["immediate", "hourly", "daily"]
+    responses:
+      200:
+        description: "Geçerli tercih ve seçenekler döndürüldü / tercih güncellendi."
+      400:
+        description: "Geçersiz 'notification_digest' değeri."
+      401:
+        description: Geçerli bir JWT (access_token) sağlanmadı.
+      404:
+        description: Token'a ait kullanıcı bulunamadı.
+    """
+    # Tercih alanı yetki özetinde yok; tam kullanıcı kaydı okunur
+    user = User.query.get(get_current_user().id)
+    if not user:
+        return api_error("Kullanıcı bulunamadı.", 404)
+
+    msg = "Bildirim tercihi getirildi."
+    if request.method == 'PUT':
+        data = request.get_json(silent=True) or {}
+        mode = data.get('notification_digest')
+        if mode not in dict(NOTIFICATION_DIGEST_CHOICES):
+            return api_error("Geçersiz 'notification_digest' değeri. 'immediate', 'hourly' veya 'daily' olmalıdır.", 400)
+        user.notification_digest = mode
+        db.session.commit()
+        msg = "Bildirim tercihi güncellendi."
+
+    return api_success({
+        "notification_digest": user.notification_digest,
+        "choices": [{"value": value, "label": label} for value, label in NOTIFICATION_DIGEST_CHOICES]
+    }, msg=msg)
+
 @api_bp.route('/rules', methods=['GET'])
-@jwt_required()
+@jwt_user_required
 def get_rules():
     """Dinamik İçerikleri (Kurallar vb.) Getirir
     Yönetici panelinden eklenen/düzenlenen 'Site Kuralları', 'Havuz Kullanımı'
@@ -1,6 +1,5 @@
 from flask import Blueprint, render_template, redirect, url_for, flash, request, current_app
 from flask_login import login_user, logout_user, login_required, current_user
-from werkzeug.security import generate_password_hash, check_password_hash
 from app.models import User, Apartment, Block
 from app.models import User, Apartment
 from app.email import send_email
@@ -11,6 +10,7 @@ from app.extensions import limiter
 from app.extensions import db
 from app.forms.auth_forms import LoginForm, RegisterForm, ProfileEditForm
 from app.forms.auth_forms import RequestResetForm, ResetPasswordForm
+from app.passwords import authenticate, hash_password, PasswordCheckOverloaded
 
 # Blueprint tanımı
 auth_bp = Blueprint("auth", __name__)
@@ -32,7 +32,13 @@ def login():
     form = LoginForm()
     if form.validate_on_submit():
         user = User.query.filter_by(email=form.email.data).first()
-        if user and check_password_hash(user.password, form.password.data):
+        try:
+            authenticated = authenticate(user, form.password.data)
+        except PasswordCheckOverloaded:
+            flash("Sunucu şu anda yoğun. Lütfen birkaç saniye sonra tekrar deneyin.", "warning")
+            return render_template("login.html", form=form), 503
+
+        if authenticated:
             
             # Önce e-posta doğrulanmış mı?
             if not user.is_email_verified:
@@ -88,7 +94,7 @@ def signup():
         if existing_user:
             form.email.errors.append("Bu e-posta adresi zaten kayıtlı. Lütfen farklı bir adres deneyin.")
         else:
-            hashed_password = generate_password_hash(form.password.data)
+            hashed_password = hash_password(form.password.data)
             selected_block_id = form.block_id.data if form.block_id.data != 0 else None
 
             new_user = User(
@@ -143,11 +149,11 @@ def edit_profile():
     if form.validate_on_submit():
         current_user.name = form.name.data
         current_user.email = form.email.data
-        current_user.phone_number = form.phone_number.data
+        current_user.notification_digest = form.notification_digest.data
         
         # Sadece yeni şifre alanı doldurulduysa şifreyi güncelle
         if form.password.data:
-            current_user.password = generate_password_hash(form.password.data)
+            current_user.password = hash_password(form.password.data)
             
         db.session.commit()
         flash("Profil bilgileriniz başarıyla güncellendi.", "success")
@@ -205,7 +211,7 @@ def reset_token(token):
     form = ResetPasswordForm()
     if form.validate_on_submit():
         # Yeni şifreyi hash'le ve kullanıcıyı güncelle
-        hashed_password = generate_password_hash(form.password.data)
+        hashed_password = hash_password(form.password.data)
         user.password = hashed_password
         db.session.commit()
         flash('Şifreniz başarıyla güncellendi! Şimdi giriş yapabilirsiniz.', 'success')
@@ -1,20 +1,29 @@
-from flask import Blueprint, render_template, abort
+from flask import Blueprint, render_template, abort, request, current_app
 from app.models import Post
+from app.posts import published_posts_page
+from app.page_cache import cache_page
+from app.sitemap import published_posts_stamp
 
 # Yeni blog blueprint'ini oluşturuyoruz
 blog_bp = Blueprint('blog', __name__, url_prefix='/blog')
 
 @blog_bp.route('/')
+@cache_page('blog', stamp=published_posts_stamp)
 def index():
     """
-    Tüm yayınlanmış blog yazılarını, en yeniden eskiye doğru listeleyen
-    ana blog sayfasını oluşturur.
+    Yayınlanmış blog yazılarını en yeniden eskiye doğru, imleçle sayfalayarak
+    listeleyen ana blog sayfasını oluşturur.
     """
-    # Sadece is_published=True olan yazıları alıyoruz
-    posts = Post.query.filter_by(is_published=True).order_by(Post.created_at.desc()).all()
-    return render_template('blog/blog_index.html', posts=posts, title="Blog")
+    cursor = request.args.get('after')
+    try:
+        posts, next_cursor = published_posts_page(cursor, per_page=current_app.config.get('BLOG_PAGE_SIZE', 12))
+    except ValueError:
+        abort(404)
+    return render_template('blog/blog_index.html', posts=posts, next_cursor=next_cursor,
+                           is_first_page=not cursor, title="Blog")
 
 @blog_bp.route('/<slug>')
+@cache_page(lambda slug: f"post:{slug}", stamp=published_posts_stamp)
 def view_post(slug):
     """
     Belirli bir blog yazısını URL uzantısına (slug) göre bulur ve gösterir.
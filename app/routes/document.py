@@ -1,11 +1,12 @@
 import os
 import uuid
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, send_from_directory, abort
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, send_from_directory, abort, jsonify
 from flask_login import login_required, current_user
 from werkzeug.utils import secure_filename
 from app.forms.document_form import DocumentUploadForm
 from app.gcs_utils import upload_to_gcs 
 from app.models import db, Document
+from app.direct_uploads import create_upload, complete_upload, DirectUploadError
 
 document_bp = Blueprint("document", __name__)
 
@@ -70,3 +71,53 @@ def download_document(document_id):
     # Artık dosyayı sunucudan göndermek yerine, doğrudan GCS linkine yönlendiriyoruz.
     return redirect(doc.filename)
 
+
+# ─── Doğrudan depolamaya yükleme (web formları için; bkz. static/js/direct_upload.js) ───
+# Yükleme tamamlandıktan sonra kullanıcının yönlendirileceği sayfalar
+DIRECT_UPLOAD_REDIRECTS = {
+    'receipt': 'resident.dues_list',
+    'document': 'resident.dashboard',
+    'request': 'resident_request.request_list',
+    'invoice': 'expense.expense_list',
+}
+
+
+@document_bp.route('/uploads/sign', methods=['POST'])
+@login_required
+def sign_direct_upload():
+    """Web formlarının dosyayı doğrudan depolamaya yüklemesi için imzalı URL üretir."""
+    data = request.get_json(silent=True) or {}
+    try:
+        upload = create_upload(
+            current_user,
+            data.get('purpose'),
+            data.get('filename'),
+            data.get('content_type'),
+            target_id=data.get('target_id'),
+            size=data.get('size')
+        )
+    except DirectUploadError as e:
+        return jsonify({"error": e.message}), e.status_code
+    except Exception as e:
+        current_app.logger.error(f"İmzalı yükleme URL'i oluşturulamadı: {e}", exc_info=True)
+        return jsonify({"error": "Yükleme başlatılamadı."}), 500
+    return jsonify(upload)
+
+
+@document_bp.route('/uploads/complete', methods=['POST'])
+@login_required
+def complete_direct_upload():
+    """Doğrudan yüklenen dosyayı ilgili kayda işler ve yönlendirilecek sayfayı döndürür."""
+    data = request.get_json(silent=True) or {}
+    try:
+        msg, response_data = complete_upload(current_user, data.get('upload_token'), data)
+    except DirectUploadError as e:
+        return jsonify({"error": e.message}), e.status_code
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Doğrudan yükleme tamamlanamadı: {e}", exc_info=True)
+        return jsonify({"error": "Yükleme tamamlanamadı."}), 500
+
+    flash(msg, 'success')
+    redirect_endpoint = DIRECT_UPLOAD_REDIRECTS.get(data.get('purpose'), 'resident.dashboard')
+    return jsonify({"redirect_url": url_for(redirect_endpoint), "data": response_data})
@@ -0,0 +1,93 @@
+# app/routes/profiling.py
+"""Yöneticilerin kaydettiği istek profilleri ve superadmin için örnekleyici (bkz. app/profiling.py)."""
+
+import os
+import time
+from functools import wraps
+
+from flask import Blueprint, Response, abort, flash, redirect, render_template, request, url_for
+from flask_login import current_user, login_required
+
+from app.forms.admin_forms import CSRFProtectForm
+from app.profiling import PROFILER_ROLES, get_profile, get_stack_sampler, list_profiles, start_sampler
+
+profiling_bp = Blueprint("profiling", __name__, url_prefix="/profiling")
+
+
+def profiler_required(f):
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        if not current_user.is_authenticated or current_user.role not in PROFILER_ROLES:
+            abort(403)
+        return f(*args, **kwargs)
+    return decorated_function
+
+
+def _get_own_profile_or_404(profile_id):
+    """Profili döndürür; yöneticiler sadece kendi profillerini, superadmin hepsini görür."""
+    profile = get_profile(profile_id)
+    if profile is None or (current_user.role != 'superadmin' and profile.owner_id != current_user.id):
+        abort(404)
+    return profile
+
+
+@profiling_bp.route("/")
+@login_required
+@profiler_required
+def index():
+    """Süresi dolmamış profilleri ve (superadmin için) örnekleyici durumunu listeler."""
+    is_superadmin = current_user.role == 'superadmin'
+    profiles = list_profiles(owner_id=None if is_superadmin else current_user.id)
+    sampler = get_stack_sampler() if is_superadmin else None
+    sampler_remaining = max(0, round(sampler.ends_at - time.time())) if sampler and sampler.running else None
+    return render_template(
+        "profiling/index.html",
+        profiles=profiles,
+        sampler=sampler,
+        sampler_remaining=sampler_remaining,
+        worker_pid=os.getpid(),
+        csrf_form=CSRFProtectForm(),
+        title="Performans Profilleri",
+    )
+
+
+@profiling_bp.route("/<profile_id>")
+@login_required
+@profiler_required
+def view_profile(profile_id):
+    """Profil özetini (en pahalı fonksiyonlar veya folded yığınlar) düz metin olarak gösterir."""
+    profile = _get_own_profile_or_404(profile_id)
+    return Response(profile.text, mimetype='text/plain')
+
+
+@profiling_bp.route("/<profile_id>/download")
+@login_required
+@profiler_required
+def download_profile(profile_id):
+    """İstek profilini .prof (pstats/snakeviz), örnekleyici sonucunu .folded (flamegraph) olarak indirir."""
+    profile = _get_own_profile_or_404(profile_id)
+    if profile.kind == 'request':
+        body, filename, mimetype = profile.data, f"{profile_id}.prof", 'application/octet-stream'
+    else:
+        body, filename, mimetype = profile.text, f"{profile_id}.folded", 'text/plain'
+    return Response(body, mimetype=mimetype, headers={'Content-Disposition': f'attachment; filename={filename}'})
+
+
+@profiling_bp.route("/sampler", methods=['POST'])
+@login_required
+@profiler_required
+def start_stack_sampler():
+    """Bu işçi süreçte istatistiksel örnekleyiciyi verilen süre için başlatır (sadece superadmin)."""
+    if current_user.role != 'superadmin':
+        abort(403)
+    form = CSRFProtectForm()
+    if not form.validate_on_submit():
+        abort(400)
+
+    started, seconds = start_sampler(request.form.get('seconds', 30, type=int), current_user.id)
+    if started:
+        flash(f"Örnekleyici {seconds} saniyeliğine başlatıldı (işçi {os.getpid()}). "
+              f"Süre dolunca sonuç bu listede görünür.", "success")
+    else:
+        flash("Bu işçide örnekleyici zaten çalışıyor.", "warning")
+    return redirect(url_for('profiling.index'))
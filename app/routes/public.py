@@ -7,11 +7,16 @@ from app.models import Post
 from app.models import DynamicContent
 from app.forms.auth_forms import RequestAccountDeletionForm
 from app.models import User
+from app.page_cache import cache_page
+from app.posts import LIST_COLUMNS
+from app.sitemap import get_sitemap, published_posts_stamp
+from sqlalchemy.orm import load_only
 
 public_bp = Blueprint('public', __name__)
 
 
 @public_bp.route("/")
+@cache_page('blog', stamp=published_posts_stamp)
 def index():
     """Uygulamanın ana karşılama sayfasını gösterir."""
     
@@ -29,7 +34,7 @@ def index():
     # ===== KONTROL SONU =====
 
     # 3. Eğer kullanıcı giriş yapmamışsa, herkese açık ana sayfayı göster.
-    recent_posts = Post.query.filter_by(
+    recent_posts = Post.query.options(load_only(*LIST_COLUMNS)).filter_by(
         is_published=True
     ).order_by(Post.created_at.desc()).limit(3).all()
     
@@ -69,26 +74,31 @@ def contact():
 # --- DEĞİŞEN BÖLÜM: ESKİ /about ROTASI KALDIRILDI, YENİLERİ EKLENDİ ---
 
 @public_bp.route("/kullanim-sartlari")
+@cache_page('static_pages')
 def terms(): # <-- Fonksiyon adını terms_and_conditions'dan terms'e değiştirin
     """Kullanım Şartları sayfasını doğrudan gösterir."""
     return render_template("about/terms.html")
 
 @public_bp.route("/gizlilik-politikasi")
+@cache_page('static_pages')
 def privacy(): # <-- Fonksiyon adını privacy_policy'den privacy'e değiştirin
     """Gizlilik Politikası sayfasını doğrudan gösterir."""
     return render_template("about/privacy.html")
 
 @public_bp.route("/kvkk-aydinlatma-metni")
+@cache_page('static_pages')
 def kvkk(): # <-- Fonksiyon adını kvkk_text'ten kvkk'ya değiştirin
     """KVKK Aydınlatma Metni sayfasını doğrudan gösterir."""
     return render_template("about/kvkk.html")
 
 @public_bp.route("/hakkimizda")
+@cache_page('static_pages')
 def about_us():
     """Hakkımızda sayfasını doğrudan gösterir."""
     return render_template("about/about_us.html")
 
 @public_bp.route("/yardim")
+@cache_page('static_pages')
 def help(): # <-- Bu fonksiyon adını da help_page'den help'e kısaltabilirsiniz
     """Yardım sayfasını doğrudan gösterir."""
     return render_template("about/help.html")
@@ -102,9 +112,16 @@ def robots_txt():
 
 @public_bp.route('/sitemap.xml')
 def sitemap_xml():
-    return send_from_directory(current_app.static_folder, 'sitemap.xml')
+    """Yazılar yayınlandıkça güncellenen, önbellekteki sitemap'i döndürür (bkz. app/sitemap.py)."""
+    sitemap = get_sitemap()
+    response = current_app.response_class(sitemap['xml'], mimetype='application/xml')
+    response.set_etag(sitemap['etag'])
+    response.cache_control.public = True
+    response.cache_control.max_age = 3600
+    return response.make_conditional(request)
 
 @public_bp.route("/cookie-settings")
+@cache_page('static_pages')
 def cookie_settings():
     """Çerez ayarları sayfasını gösterir."""
     return render_template("public/cookie_settings.html")
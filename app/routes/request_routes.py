@@ -6,6 +6,7 @@ from app.models import db, User, Request as RequestModel, RequestStatus
 # YENİ: E-posta gönderme fonksiyonumuzu import ediyoruz.
 from app.email import send_email
 from app.gcs_utils import upload_to_gcs
+from app.image_variants import start_image_processing
 from datetime import datetime
 import pytz
 
@@ -88,6 +89,10 @@ def create_request():
         db.session.add(new_request)
         db.session.commit()
 
+        # Ek bir resimse küçük resim ve küçültülmüş varyantlar arka planda üretilir
+        if attachment_url:
+            start_image_processing('request', new_request.id)
+
         # --- Yöneticiyi e-posta ile bilgilendir (mevcut mantık + ekstra parametreler) ---
         try:
             admin = User.query.filter_by(
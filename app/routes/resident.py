@@ -1,4 +1,3 @@
-import os
 from flask import Blueprint, render_template, flash, request, redirect, url_for, current_app, jsonify, abort
 from flask_login import login_required, current_user, login_user
 from app.models import Announcement, Dues, User, db, Expense
@@ -14,7 +13,7 @@ from werkzeug.security import check_password_hash, generate_password_hash
 from app.gcs_utils import upload_to_gcs
 from flask_login import logout_user
 from app.forms.reservation_forms import ReservationForm
-from app.document_ai_helper import process_receipt_from_gcs
+from app.receipt_processing import queue_receipt, start_receipt_verification, serialize_receipt_status
 from app.models import Request as RequestModel
 import pytz
 import uuid
@@ -109,54 +108,25 @@ def upload_receipt(dues_id):
             flash("Makbuz yüklenirken bir sunucu hatası oluştu. Lütfen tekrar deneyin.", "danger")
             return redirect(url_for("resident.dues_list"))
 
-        # 2. Document AI'a gönder ve verileri çıkar
-        processor_id = current_app.config.get('DOCAI_PROCESSOR_ID')
-        project_id = os.environ.get('GCLOUD_PROJECT') 
-        location = current_app.config.get('DOCAI_LOCATION')
-
-        extracted_data = process_receipt_from_gcs(gcs_uri, processor_id, project_id, location)
-
-        # 3. Otomatik Onaylama Mantığı
-        auto_approved = False
-        if extracted_data and 'amount' in extracted_data:
-            # Tutar kontrolü (1 TL'lik kuruş farklarına izin verelim)
-            is_amount_ok = abs(extracted_data['amount'] - float(dues.amount)) < 1.0
-
-            # Alıcı kontrolü (Apartman adının dekontta geçip geçmediği)
-            supplier_name = extracted_data.get('supplier', '').lower()
-            official_name_to_check = current_user.apartment.bank_account_name or current_user.apartment.name
-            check_word = official_name_to_check.split()[0].lower()
-            is_recipient_ok = check_word in supplier_name if supplier_name else False
-
-            if is_amount_ok and is_recipient_ok:
-                # BAŞARILI: Ödemeyi otomatik onayla
-                dues.is_paid = True
-                dues.payment_date = datetime.utcnow()
-                dues.receipt_filename = gcs_uri
-
-                income_transaction = Transaction(
-                    amount=dues.amount,
-                    description=f"Aidat Ödemesi (Otomatik Onay): {dues.user.name} - {dues.description}",
-                    transaction_date=dues.payment_date,
-                    source_type='dues', source_id=dues.id,
-                    user_id=dues.user_id, apartment_id=dues.apartment_id
-                )
-                db.session.add(income_transaction)
-                db.session.commit()
-                flash("Dekontunuz otomatik olarak doğrulandı ve ödemeniz onaylandı!", "success")
-                auto_approved = True
-
-        if not auto_approved:
-            # BAŞARISIZ veya VERİ ÇIKARILAMADI: Manuel onaya düşür
-            dues.receipt_filename = gcs_uri
-            dues.receipt_upload_date = datetime.utcnow()
-            db.session.commit()
-            flash("Dekontunuz yüklendi ve yönetici onayına gönderildi.", "info")
+        # 2. Doğrulamayı (OCR + otomatik onay) arka plana bırak, sakini bekletme
+        queue_receipt(dues, gcs_uri)
+        db.session.commit()
+        start_receipt_verification(dues.id)
 
+        flash("Dekontunuz alındı ve doğrulanıyor. Sonuç kısa süre içinde bu sayfada ve bildirim olarak görünecek.", "info")
         return redirect(url_for("resident.dues_list"))
 
     return render_template("upload_receipt.html", form=form, dues=dues)
 
+@resident_bp.route('/upload_receipt/<int:dues_id>/status')
+@login_required
+def receipt_status(dues_id):
+    """Aidat listesindeki 'Doğrulanıyor' rozetinin sorguladığı dekont durumu (JSON)."""
+    dues = Dues.query.get_or_404(dues_id)
+    if dues.user_id != current_user.id:
+        abort(403)
+    return jsonify(serialize_receipt_status(dues))
+
 @resident_bp.route('/confirm-account-deletion/<token>')
 def confirm_account_deletion(token):
     """
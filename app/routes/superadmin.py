@@ -2,7 +2,7 @@ from functools import wraps
 from flask import Blueprint, render_template, flash, redirect, url_for, request
 from flask_login import login_required, current_user
 from sqlalchemy.exc import IntegrityError
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_
 
 from app import db
 from app.models import User, Apartment, Request, Expense, CommonArea
@@ -10,6 +10,8 @@ from app.forms.admin_forms import ApartmentForm, CSRFProtectForm
 from app.forms.superadmin_forms import CommonAreaForm
 from app.models import Block
 from app.forms.superadmin_forms import BlockForm
+from app.auth_tokens import revoke_all_user_tokens
+from app.search import apply_user_search
 
 superadmin_bp = Blueprint("superadmin", __name__, url_prefix="/superadmin")
 
@@ -128,8 +130,8 @@ def user_management():
     if is_search_active:
         # ARAMA AKTİFSE: Gelen kriterlere göre filtrele
         if search_query:
-            search_term = f"%{search_query}%"
-            base_query = base_query.filter(or_(User.name.ilike(search_term), User.email.ilike(search_term)))
+            # Ad, e-posta, telefon ve daire no üzerindeki n-gram indeksi (bkz. app/search.py)
+            base_query, _ = apply_user_search(base_query, search_query)
         if apartment_filter:
             base_query = base_query.filter(User.apartment_id == int(apartment_filter))
         if role_filter:
@@ -230,6 +232,8 @@ def delete_user(user_id):
     try:
         db.session.delete(user_to_delete)
         db.session.commit()
+        # Mobil uygulamadaki oturumları da kapat
+        revoke_all_user_tokens(user_id)
         flash(f"'{user_to_delete.name}' kullanıcısı başarıyla silindi.", "success")
     except IntegrityError:
         db.session.rollback()
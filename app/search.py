@@ -0,0 +1,257 @@
+# app/search.py
+"""
+Tam metin arama.
+
+Aranan metin, Türkçe harfleri katlanmış (İ/I/ı→i, ş→s, ğ→g, ç→c, ö→o, ü→u) küçük
+harf bir kopya olarak modelin search_text sütununda tutulur; sütun kayıt
+yazılırken otomatik doldurulur. Böylece "ısıtıcı", "ISITICI" ve "isitici" aynı
+sonucu verir.
+
+Talepler (Request) başlık ve açıklamalarında kelime bazında aranır
+(apply_request_search):
+  - MySQL: search_text üzerindeki FULLTEXT indeksi, MATCH ... AGAINST (BOOLEAN MODE).
+  - SQLite (testler): search_text'i indeksleyen FTS5 tablosu (request_fts), bm25 sırası.
+  - Diğerleri: katlanmış sütunda LIKE (indekssiz yedek).
+Sonuçlar alaka düzeyine göre sıralanır; highlight_snippet eşleşen kelimeleri
+<mark> ile işaretleyen kısa bir alıntı üretir.
+
+Kullanıcılar (User) ad, e-posta, telefon ve daire no'da kelime içinde de
+(n-gram) aranır (apply_user_search): MySQL'de ngram ayrıştırıcılı FULLTEXT
+indeksi, SQLite'ta trigram FTS5 tablosu (user_fts). İndeksin kapsamadığı kadar
+kısa kelimeler LIKE ile süzülür.
+"""
+
+import re
+
+import click
+from flask.cli import with_appcontext
+from markupsafe import Markup, escape
+from sqlalchemy import DDL, column, event, table, text, update
+from sqlalchemy.dialects.mysql import match as mysql_match
+
+from app.extensions import db
+from app.models import Request as RequestModel, User
+
+# Uzunluğu değiştirmeyen katlama: vurgulama, katlanmış metindeki konumları orijinale taşır
+_TURKISH_FOLD = str.maketrans({
+    'İ': 'i', 'I': 'i', 'ı': 'i',
+    'Ş': 's', 'ş': 's',
+    'Ğ': 'g', 'ğ': 'g',
+    'Ç': 'c', 'ç': 'c',
+    'Ö': 'o', 'ö': 'o',
+    'Ü': 'u', 'ü': 'u',
+})
+
+_TERM_RE = re.compile(r'[^\W_]+')
+
+# Bir aramada kullanılan en fazla kelime
+MAX_SEARCH_TERMS = 8
+
+# MySQL InnoDB FULLTEXT varsayılan en kısa kelime uzunluğu (innodb_ft_min_token_size)
+MYSQL_MIN_TOKEN_SIZE = 3
+# MySQL ngram ayrıştırıcısının parça uzunluğu (ngram_token_size) ve SQLite trigram
+MYSQL_NGRAM_SIZE = 2
+SQLITE_TRIGRAM_SIZE = 3
+
+_request_fts = table('request_fts', column('rowid'))
+_user_fts = table('user_fts', column('rowid'))
+
+
+def fold_turkish(value):
+    """Metni Türkçe harflerden arındırılmış küçük harfe çevirir."""
+    return (value or '').translate(_TURKISH_FOLD).lower()
+
+
+def search_terms(query_text):
+    """Arama kutusundaki metinden katlanmış kelimeleri çıkarır."""
+    terms = _TERM_RE.findall(fold_turkish(query_text))
+    return list(dict.fromkeys(terms))[:MAX_SEARCH_TERMS]
+
+
+def request_search_text(title, description):
+    return fold_turkish(f"{title or ''}\n{description or ''}")
+
+
+def user_search_text(name, email, phone_number, daire_no):
+    # Telefon hem yazıldığı gibi hem sadece rakam olarak tutulur ("0532 123" ve "0532123" bulunur)
+    phone_digits = re.sub(r'\D', '', phone_number or '')
+    return fold_turkish('\n'.join([name or '', email or '', phone_number or '', phone_digits, daire_no or '']))
+
+
+# ──────────────────────────────────────────────────────────────
+# 1) İndeksin güncel tutulması
+# ──────────────────────────────────────────────────────────────
+@event.listens_for(RequestModel, 'before_insert')
+@event.listens_for(RequestModel, 'before_update')
+def _set_request_search_text(mapper, connection, target):
+    target.search_text = request_search_text(target.title, target.description)
+
+
+@event.listens_for(User, 'before_insert')
+@event.listens_for(User, 'before_update')
+def _set_user_search_text(mapper, connection, target):
+    target.search_text = user_search_text(target.name, target.email, target.phone_number, target.daire_no)
+
+
+def _sqlite_fts_ddl(fts_table, source_table, tokenize):
+    """
+    SQLite: search_text'i harici içerik (external content) olarak indeksleyen FTS5 tablosu.
+    Tetikleyiciler indeksi kaynak tabloyla aynı transaction içinde günceller.
+    """
+    return (
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+        f"search_text, content='{source_table}', content_rowid='id', tokenize='{tokenize}')",
+        f'CREATE TRIGGER IF NOT EXISTS {fts_table}_ai AFTER INSERT ON "{source_table}" BEGIN '
+        f"INSERT INTO {fts_table}(rowid, search_text) VALUES (new.id, new.search_text); END",
+        f'CREATE TRIGGER IF NOT EXISTS {fts_table}_ad AFTER DELETE ON "{source_table}" BEGIN '
+        f"INSERT INTO {fts_table}({fts_table}, rowid, search_text) VALUES ('delete', old.id, old.search_text); END",
+        f'CREATE TRIGGER IF NOT EXISTS {fts_table}_au AFTER UPDATE OF search_text ON "{source_table}" BEGIN '
+        f"INSERT INTO {fts_table}({fts_table}, rowid, search_text) VALUES ('delete', old.id, old.search_text); "
+        f"INSERT INTO {fts_table}(rowid, search_text) VALUES (new.id, new.search_text); END",
+    )
+
+
+for _model, _statements in (
+    (RequestModel, _sqlite_fts_ddl('request_fts', 'request', 'unicode61')),
+    (User, _sqlite_fts_ddl('user_fts', 'user', 'trigram')),
+):
+    for _statement in _statements:
+        event.listen(_model.__table__, 'after_create', DDL(_statement).execute_if(dialect='sqlite'))
+
+
+# ──────────────────────────────────────────────────────────────
+# 2) Sorgu
+# ──────────────────────────────────────────────────────────────
+def apply_request_search(query, query_text):
+    """
+    Talep sorgusunu arama metnine göre filtreler ve alaka düzeyine göre sıralar.
+    (sorgu, kelimeler) döndürür; kelime yoksa sorgu değişmeden döner.
+    """
+    terms = search_terms(query_text)
+    if not terms:
+        return query, terms
+
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'mysql' and all(len(term) >= MYSQL_MIN_TOKEN_SIZE for term in terms):
+        score = mysql_match(
+            RequestModel.search_text,
+            against=' '.join(f"+{term}*" for term in terms)
+        ).in_boolean_mode()
+        query = query.filter(score).order_by(None).order_by(score.desc(), RequestModel.created_at.desc())
+    elif dialect == 'sqlite':
+        fts_query = ' '.join(f'"{term}"*' for term in terms)
+        query = query.join(_request_fts, _request_fts.c.rowid == RequestModel.id).filter(
+            text("request_fts MATCH :fts_query").bindparams(fts_query=fts_query)
+        ).order_by(None).order_by(text("bm25(request_fts)"), RequestModel.created_at.desc())
+    else:
+        # FULLTEXT indeksinin bulamadığı kısa kelimeler veya başka veritabanları
+        for term in terms:
+            query = query.filter(RequestModel.search_text.like(f"%{term}%"))
+    return query, terms
+
+
+def apply_user_search(query, query_text):
+    """
+    Kullanıcı sorgusunu, her kelimenin ad/e-posta/telefon/daire no içinde geçmesine göre
+    süzer (sıralama çağıranda kalır). (sorgu, kelimeler) döndürür.
+    """
+    terms = search_terms(query_text)
+    if not terms:
+        return query, terms
+
+    dialect = db.session.get_bind().dialect.name
+    min_size = {'mysql': MYSQL_NGRAM_SIZE, 'sqlite': SQLITE_TRIGRAM_SIZE}.get(dialect)
+    indexed = [term for term in terms if min_size and len(term) >= min_size]
+    short = [term for term in terms if term not in indexed]
+
+    if indexed and dialect == 'mysql':
+        query = query.filter(mysql_match(
+            User.search_text,
+            against=' '.join(f'+"{term}"' for term in indexed)
+        ).in_boolean_mode())
+    elif indexed:
+        query = query.join(_user_fts, _user_fts.c.rowid == User.id).filter(
+            text("user_fts MATCH :user_fts_query").bindparams(
+                user_fts_query=' '.join(f'"{term}"' for term in indexed)
+            )
+        )
+    for term in short:
+        query = query.filter(User.search_text.like(f"%{term}%"))
+    return query, terms
+
+
+def highlight_snippet(value, terms, width=160):
+    """
+    Metinden, ilk eşleşmenin çevresinde en fazla width karakterlik bir alıntı üretir;
+    kelime başında eşleşen aranan kelimeler <mark> ile işaretlenir (HTML güvenli).
+    """
+    value = value or ''
+    folded = fold_turkish(value)
+    matches = []
+    if terms and len(folded) == len(value):
+        pattern = re.compile(
+            r'(?<![^\W_])(' + '|'.join(re.escape(t) for t in sorted(terms, key=len, reverse=True)) + ')'
+        )
+        matches = list(pattern.finditer(folded))
+
+    start = max(0, matches[0].start() - width // 3) if matches else 0
+    end = min(len(value), start + width)
+
+    parts = [Markup('…') if start else Markup('')]
+    position = start
+    for m in matches:
+        if m.start() < position:
+            continue
+        if m.end() > end:
+            break
+        parts.append(escape(value[position:m.start()]))
+        parts.append(Markup('<mark>%s</mark>') % value[m.start():m.end()])
+        position = m.end()
+    parts.append(escape(value[position:end]))
+    if end < len(value):
+        parts.append(Markup('…'))
+    return Markup('').join(parts)
+
+
+# ──────────────────────────────────────────────────────────────
+# 3) Mevcut kayıtlar için indeks (flask rebuild-search-index)
+# ──────────────────────────────────────────────────────────────
+def _rebuild_search_text(model, columns, build, batch_size):
+    """Modelin tüm satırlarının search_text'ini parti parti yeniden yazar; satır sayısını döndürür."""
+    total, last_id = 0, 0
+    while True:
+        rows = db.session.query(model.id, *columns).filter(
+            model.id > last_id
+        ).order_by(model.id).limit(batch_size).all()
+        if not rows:
+            break
+        db.session.execute(update(model), [{'id': row.id, 'search_text': build(row), **{
+            # onupdate'li sütunlar (updated_at) aynen yazılır; indeks yenilemesi kaydı "güncellenmiş" göstermez
+            column.key: getattr(row, column.key) for column in columns
+            if model.__table__.c[column.key].onupdate is not None
+        }} for row in rows])
+        db.session.commit()
+        total += len(rows)
+        last_id = rows[-1].id
+    return total
+
+
+@click.command('rebuild-search-index')
+@click.option('--batch-size', default=1000, show_default=True)
+@with_appcontext
+def rebuild_search_index_command(batch_size):
+    """Talep ve kullanıcıların arama metnini yeniden üretir (mevcut kayıtlar ve katlama değişiklikleri için)."""
+    requests_total = _rebuild_search_text(
+        RequestModel, [RequestModel.title, RequestModel.description, RequestModel.updated_at],
+        lambda row: request_search_text(row.title, row.description), batch_size
+    )
+    users_total = _rebuild_search_text(
+        User, [User.name, User.email, User.phone_number, User.daire_no],
+        lambda row: user_search_text(row.name, row.email, row.phone_number, row.daire_no), batch_size
+    )
+
+    if db.session.get_bind().dialect.name == 'sqlite':
+        db.session.execute(text("INSERT INTO request_fts(request_fts) VALUES ('rebuild')"))
+        db.session.execute(text("INSERT INTO user_fts(user_fts) VALUES ('rebuild')"))
+        db.session.commit()
+    click.echo(f"{requests_total} talep ve {users_total} kullanıcının arama metni güncellendi.")
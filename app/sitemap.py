@@ -0,0 +1,168 @@
+# app/sitemap.py
+"""
+Oluşturulan sitemap.xml.
+
+Sitemap sabit sayfalar ile yayınlanmış blog yazılarından üretilir ve önbellekte
+(get_cache) hazır bir XML olarak tutulur; /sitemap.xml her istekte sadece bu
+metni ETag ile döndürür. Yazı eklenip/düzenlenip/silindiğinde tüm yazılar
+yeniden sorgulanmaz: önbellekteki yazı listesinde (slug → lastmod) sadece
+değişen yazının kaydı güncellenip XML yeniden yazılır (commit'ten sonra).
+
+Önbellekte kayıt yoksa (ilk istek, yeniden başlatma, SITEMAP_CACHE_TTL dolması)
+sitemap bir sorguyla baştan üretilir. `flask rebuild-blog` da baştan üretir.
+
+Önbellek süreç içi bellekse değişikliği sadece commit eden işçi görür. Bu yüzden
+her istekte yayınlanmış yazıların sayısı ve en yeni updated_at değeri (tek bir
+toplama sorgusu) önbellekteki sitemap'in damgasıyla karşılaştırılır; farklıysa
+sitemap baştan üretilir. Böylece diğer işçiler eski kopyayı sunmaz.
+"""
+
+import hashlib
+from urllib.parse import urlsplit
+from xml.sax.saxutils import escape
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session, object_session
+
+from app.cache import get_cache
+from app.extensions import db
+from app.models import Post
+
+SITEMAP_KEY = 'sitemap:xml'
+SITEMAP_POSTS_KEY = 'sitemap:posts'
+
+# Commit'i bekleyen yazı değişiklikleri {slug: lastmod veya None (çıkar)} (session.info içinde)
+_PENDING_CHANGES = 'ays_sitemap_changes'
+
+# Arama motorlarına açık sabit sayfalar (giriş/kayıt sayfaları bilerek yok)
+STATIC_ENDPOINTS = (
+    'public.index', 'blog.index', 'public.contact', 'public.about_us', 'public.help',
+    'public.terms', 'public.privacy', 'public.kvkk',
+)
+
+
+def _lastmod(value):
+    # Zaman damgaları UTC tutulur
+    return value.strftime('%Y-%m-%dT%H:%M:%S+00:00') if value else None
+
+
+def _url_adapter():
+    site = urlsplit(current_app.config['SITE_URL'])
+    return current_app.url_map.bind(site.netloc, script_name=site.path or '/', url_scheme=site.scheme)
+
+
+def render_sitemap(post_entries):
+    """Sabit sayfalar ve {slug: lastmod} yazı listesinden sitemap XML'i üretir."""
+    adapter = _url_adapter()
+    urls = [(adapter.build(endpoint, force_external=True), None) for endpoint in STATIC_ENDPOINTS]
+    urls.extend(
+        (adapter.build('blog.view_post', {'slug': slug}, force_external=True), lastmod)
+        for slug, lastmod in sorted(post_entries.items(), key=lambda item: item[1] or '', reverse=True)
+    )
+
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for loc, lastmod in urls:
+        lines.append(f"  <url><loc>{escape(loc)}</loc>"
+                     + (f"<lastmod>{lastmod}</lastmod>" if lastmod else '') + "</url>")
+    lines.append('</urlset>')
+    return '\n'.join(lines) + '\n'
+
+
+def _stamp(post_entries):
+    """Yazı listesinin damgası: (yazı sayısı, en yeni lastmod)."""
+    return [len(post_entries), max(filter(None, post_entries.values()), default=None)]
+
+
+def published_posts_stamp():
+    """
+    Veritabanındaki yayınlanmış yazıların damgası (_stamp ile aynı biçimde). Blog
+    sayfalarının önbelleği de (app/page_cache.py) aynı damgayla doğrulanır.
+    """
+    count, last_updated = db.session.query(func.count(Post.id), func.max(Post.updated_at)).filter(
+        Post.is_published.is_(True)
+    ).one()
+    return [count, _lastmod(last_updated)]
+
+
+def _store(post_entries):
+    xml = render_sitemap(post_entries)
+    sitemap = {'xml': xml, 'etag': hashlib.md5(xml.encode('utf-8')).hexdigest(), 'stamp': _stamp(post_entries)}
+    ttl = current_app.config.get('SITEMAP_CACHE_TTL', 86400)
+    cache = get_cache()
+    cache.set(SITEMAP_POSTS_KEY, post_entries, ttl=ttl)
+    cache.set(SITEMAP_KEY, sitemap, ttl=ttl)
+    return sitemap
+
+
+def rebuild_sitemap():
+    """Yayınlanmış yazıları sorgulayıp sitemap'i baştan üretir."""
+    rows = db.session.query(Post.slug, Post.updated_at).filter(Post.is_published.is_(True)).all()
+    return _store({row.slug: _lastmod(row.updated_at) for row in rows})
+
+
+def get_sitemap():
+    """Önbellekteki sitemap'i ({'xml', 'etag'}) döndürür; yoksa veya yazılardan eskiyse üretir."""
+    sitemap = get_cache().get(SITEMAP_KEY)
+    if sitemap is None or sitemap.get('stamp') != published_posts_stamp():
+        sitemap = rebuild_sitemap()
+    return sitemap
+
+
+def _apply_post_changes(changes):
+    post_entries = get_cache().get(SITEMAP_POSTS_KEY)
+    if post_entries is None:
+        # Liste önbellekte yoksa bir sonraki /sitemap.xml isteği baştan üretir
+        get_cache().delete(SITEMAP_KEY)
+        return
+    for slug, lastmod in changes.items():
+        if lastmod is None:
+            post_entries.pop(slug, None)
+        else:
+            post_entries[slug] = lastmod
+    _store(post_entries)
+
+
+# ──────────────────────────────────────────────────────────────
+# ORM olayları: yayınlanan/güncellenen/silinen yazı commit'ten sonra sitemap'e işlenir
+# ──────────────────────────────────────────────────────────────
+def _collect_post_change(target, removed=False):
+    session = object_session(target)
+    if session is None:
+        return
+    changes = session.info.setdefault(_PENDING_CHANGES, {})
+    state = inspect(target)
+    for old_slug in state.attrs.slug.history.deleted:
+        changes.setdefault(old_slug, None)
+    if target.is_published and not removed:
+        changes[target.slug] = _lastmod(state.dict.get('updated_at'))
+    else:
+        changes.setdefault(target.slug, None)
+
+
+@event.listens_for(Post, 'after_insert')
+@event.listens_for(Post, 'after_update')
+def _collect_saved_post(mapper, connection, target):
+    _collect_post_change(target)
+
+
+@event.listens_for(Post, 'after_delete')
+def _collect_deleted_post(mapper, connection, target):
+    _collect_post_change(target, removed=True)
+
+
+@event.listens_for(Session, 'after_commit')
+def _apply_after_commit(session):
+    changes = session.info.pop(_PENDING_CHANGES, None)
+    if not changes or not has_app_context():
+        return
+    try:
+        _apply_post_changes(changes)
+    except Exception as e:
+        current_app.logger.error(f"sitemap.xml güncellenemedi: {e}")
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop(_PENDING_CHANGES, None)
@@ -0,0 +1,74 @@
+// Dosyayı uygulama sunucusundan geçirmeden, imzalı URL ile doğrudan depolamaya yükler.
+// Kullanım: <form data-direct-upload="receipt|document|invoice" data-target-id="..."> içinde bir dosya alanı.
+// Herhangi bir adımda hata olursa form normal (multipart) şekilde gönderilir.
+document.addEventListener('DOMContentLoaded', function () {
+    const forms = document.querySelectorAll('form[data-direct-upload]');
+    if (!forms.length || !window.fetch) {
+        return;
+    }
+
+    forms.forEach(function (form) {
+        form.addEventListener('submit', function (e) {
+            const fileInput = form.querySelector('input[type="file"]');
+            const file = fileInput && fileInput.files && fileInput.files[0];
+            // Dosya yoksa sunucu tarafı doğrulaması hatayı göstersin
+            if (!file || form.dataset.directUploadFallback) {
+                return;
+            }
+            e.preventDefault();
+
+            const csrfInput = form.querySelector('input[name="csrf_token"]');
+            const jsonHeaders = {
+                'Content-Type': 'application/json',
+                'X-CSRFToken': csrfInput ? csrfInput.value : ''
+            };
+            const purpose = form.dataset.directUpload;
+
+            // Formdaki diğer alanlar (ör. belge türü) tamamlama adımına iletilir
+            const extra = {};
+            new FormData(form).forEach(function (value, key) {
+                if (key !== 'csrf_token' && !(value instanceof File)) {
+                    extra[key] = value;
+                }
+            });
+
+            fetch('/uploads/sign', {
+                method: 'POST',
+                headers: jsonHeaders,
+                credentials: 'same-origin',
+                body: JSON.stringify({
+                    purpose: purpose,
+                    filename: file.name,
+                    content_type: file.type,
+                    size: file.size,
+                    target_id: form.dataset.targetId ? parseInt(form.dataset.targetId, 10) : null
+                })
+            })
+                .then(function (r) { return r.ok ? r.json() : Promise.reject(r); })
+                .then(function (upload) {
+                    return fetch(upload.upload_url, { method: 'PUT', headers: upload.headers, body: file })
+                        .then(function (r) { return r.ok ? upload : Promise.reject(r); });
+                })
+                .then(function (upload) {
+                    return fetch('/uploads/complete', {
+                        method: 'POST',
+                        headers: jsonHeaders,
+                        credentials: 'same-origin',
+                        body: JSON.stringify(Object.assign({}, extra, {
+                            purpose: purpose,
+                            upload_token: upload.upload_token
+                        }))
+                    });
+                })
+                .then(function (r) { return r.ok ? r.json() : Promise.reject(r); })
+                .then(function (result) {
+                    window.location.href = result.redirect_url;
+                })
+                .catch(function () {
+                    // Doğrudan yükleme başarısız: klasik form gönderimine geri dön
+                    form.dataset.directUploadFallback = '1';
+                    form.submit();
+                });
+        });
+    });
+});
@@ -0,0 +1,278 @@
+# app/storage.py
+"""
+Dosya depolama katmanı.
+
+Uygulama dosyaları STORAGE_BACKEND ayarına göre Google Cloud Storage'a ('gcs')
+veya yerel diske, UPLOAD_FOLDER altına ('local') yazar. Yerel arka uç,
+yüklemelerin internet/GCS kimlik bilgisi olmadan test edilip ölçülebilmesi içindir.
+
+GCS istemcisi süreç başına bir kez oluşturulur ve bağlantı havuzu olan tek bir
+HTTP oturumunu paylaşır. Büyük dosyalar (GCS_RESUMABLE_THRESHOLD ve üstü)
+parça parça (resumable) yüklenir; dosya hiçbir zaman belleğe bütün olarak okunmaz.
+"""
+
+import io
+import os
+import shutil
+import threading
+import uuid
+from datetime import timedelta
+from urllib.parse import quote, unquote, urlsplit
+
+from flask import current_app, has_request_context, url_for
+from itsdangerous.url_safe import URLSafeTimedSerializer as Serializer
+from werkzeug.utils import secure_filename
+
+_gcs_client = None
+_gcs_client_lock = threading.Lock()
+
+
+def _stream_size(stream):
+    """Akışın kalan boyutunu (byte) döndürür; okuma konumunu değiştirmez."""
+    try:
+        position = stream.tell()
+        stream.seek(0, os.SEEK_END)
+        size = stream.tell() - position
+        stream.seek(position)
+        return size
+    except (AttributeError, OSError):
+        return None
+
+
+def new_object_key(folder_name, filename):
+    """İmzalı yüklemeler için çakışmayan, URL'de güvenle kullanılabilen bir nesne adı üretir."""
+    safe_name = secure_filename(filename or '') or 'dosya'
+    return f"{folder_name}/{uuid.uuid4().hex}-{safe_name}"
+
+
+def get_gcs_client():
+    """
+    Süreç genelinde paylaşılan storage.Client'ı döndürür (ilk çağrıda oluşturur).
+    İstemci; kimlik doğrulamayı ve bağlantı havuzunu tüm isteklerle paylaşır.
+    """
+    global _gcs_client
+    if _gcs_client is None:
+        with _gcs_client_lock:
+            if _gcs_client is None:
+                import google.auth
+                from google.auth.transport.requests import AuthorizedSession
+                from google.cloud import storage
+                from requests.adapters import HTTPAdapter
+
+                pool_size = current_app.config.get('GCS_HTTP_POOL_SIZE', 10)
+                credentials, project = google.auth.default(
+                    scopes=['https://www.googleapis.com/auth/devstorage.read_write']
+                )
+                session = AuthorizedSession(credentials)
+                adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+                session.mount('https://', adapter)
+
+                _gcs_client = storage.Client(project=project, credentials=credentials, _http=session)
+    return _gcs_client
+
+
+class GCSStorage:
+    """Google Cloud Storage arka ucu."""
+
+    name = 'gcs'
+
+    def __init__(self, bucket_name, chunk_size, resumable_threshold):
+        if not bucket_name:
+            raise ValueError("GCS_BUCKET_NAME konfigürasyonda ayarlanmamış.")
+        self.bucket_name = bucket_name
+        self.chunk_size = chunk_size
+        self.resumable_threshold = resumable_threshold
+
+    def save(self, file_to_upload, folder_name):
+        """Dosyayı yükler; (public_url, gs_uri) döndürür."""
+        bucket = get_gcs_client().bucket(self.bucket_name)
+        unique_filename = f"{folder_name}/{uuid.uuid4().hex}-{file_to_upload.filename}"
+
+        # Belirli bir boyutun üzerindeki dosyalar parça parça (resumable) yüklenir;
+        # böylece kopan bir bağlantı tüm dosyanın yeniden gönderilmesini gerektirmez.
+        stream = getattr(file_to_upload, 'stream', file_to_upload)
+        size = _stream_size(stream)
+        chunk_size = self.chunk_size if size is None or size >= self.resumable_threshold else None
+
+        blob = bucket.blob(unique_filename, chunk_size=chunk_size)
+        blob.upload_from_file(stream, content_type=file_to_upload.content_type, size=size)
+
+        return blob.public_url, f"gs://{self.bucket_name}/{unique_filename}"
+
+    def generate_upload_url(self, key, content_type, expires_in, max_size):
+        """
+        İstemcinin dosyayı doğrudan GCS'e PUT etmesi için kısa ömürlü V4 imzalı URL üretir.
+        İstemcinin göndermesi gereken başlıklarla birlikte (url, headers) döndürür.
+        """
+        from google.auth.credentials import Signing
+        from google.auth.transport.requests import Request as AuthRequest
+
+        client = get_gcs_client()
+        blob = client.bucket(self.bucket_name).blob(key)
+        headers = {
+            'Content-Type': content_type,
+            # GCS, gövde bu aralığın dışındaysa yüklemeyi reddeder
+            'x-goog-content-length-range': f"0,{max_size}",
+        }
+
+        signing_kwargs = {}
+        credentials = client._credentials
+        if not isinstance(credentials, Signing):
+            # App Engine / Cloud Run varsayılan kimlikleri özel anahtar taşımaz;
+            # imzalama IAM signBlob üzerinden servis hesabı adına yapılır.
+            if not credentials.valid:
+                credentials.refresh(AuthRequest())
+            signing_kwargs = {
+                'service_account_email': credentials.service_account_email,
+                'access_token': credentials.token,
+            }
+
+        url = blob.generate_signed_url(
+            version='v4',
+            expiration=timedelta(seconds=expires_in),
+            method='PUT',
+            content_type=content_type,
+            headers={'x-goog-content-length-range': headers['x-goog-content-length-range']},
+            **signing_kwargs
+        )
+        return url, headers
+
+    def get_size(self, key):
+        """Nesne varsa boyutunu, yoksa None döndürür."""
+        blob = get_gcs_client().bucket(self.bucket_name).get_blob(key)
+        return blob.size if blob else None
+
+    def delete(self, key):
+        blob = get_gcs_client().bucket(self.bucket_name).blob(key)
+        blob.delete()
+
+    def public_url(self, key):
+        return get_gcs_client().bucket(self.bucket_name).blob(key).public_url
+
+    def key_for_url(self, url):
+        """Bu kovaya ait bir public URL'den / gs:// URI'ından nesne adını çıkarır."""
+        for prefix in (f"https://storage.googleapis.com/{self.bucket_name}/", f"gs://{self.bucket_name}/"):
+            if url and url.startswith(prefix):
+                return unquote(url[len(prefix):])
+        return None
+
+    def read(self, key):
+        return get_gcs_client().bucket(self.bucket_name).blob(key).download_as_bytes()
+
+    def save_bytes(self, key, data, content_type, cache_control=None):
+        """Bellekteki küçük bir içeriği (ör. küçük resim) yükler; public URL döndürür."""
+        blob = get_gcs_client().bucket(self.bucket_name).blob(key)
+        if cache_control:
+            blob.cache_control = cache_control
+        blob.upload_from_string(data, content_type=content_type)
+        return blob.public_url
+
+
+class LocalStorage:
+    """UPLOAD_FOLDER altına yazan yerel disk arka ucu (geliştirme, test ve benchmark için)."""
+
+    name = 'local'
+
+    def __init__(self, root, chunk_size):
+        self.root = root
+        self.chunk_size = chunk_size
+
+    def _path(self, key):
+        return os.path.join(self.root, *key.split('/'))
+
+    def write(self, key, stream):
+        target_path = self._path(key)
+        os.makedirs(os.path.dirname(target_path), exist_ok=True)
+        with open(target_path, 'wb') as target:
+            shutil.copyfileobj(stream, target, self.chunk_size)
+
+    def save(self, file_to_upload, folder_name):
+        """Dosyayı diske yazar; (public_url, file_uri) döndürür."""
+        key = new_object_key(folder_name, file_to_upload.filename)
+        self.write(key, getattr(file_to_upload, 'stream', file_to_upload))
+        return self.public_url(key), f"file://{os.path.abspath(self._path(key))}"
+
+    def generate_upload_url(self, key, content_type, expires_in, max_size):
+        """
+        GCS imzalı URL'inin yerel karşılığı: uygulamanın kendi PUT ucuna imzalı bir token.
+        (Sadece geliştirme/test içindir; bu modda dosya baytları uygulamadan geçer.)
+        """
+        token = _local_upload_serializer().dumps({'k': key, 'ct': content_type})
+        url = url_for('api.local_direct_upload', token=token, _external=True)
+        return url, {'Content-Type': content_type}
+
+    def key_for_url(self, url):
+        """public_url'in tersi: static URL'den UPLOAD_FOLDER'a göre nesne adını çıkarır."""
+        path = unquote(urlsplit(url or '').path)
+        static_prefix = current_app.static_url_path.rstrip('/') + '/'
+        if not path.startswith(static_prefix):
+            return None
+        absolute_path = os.path.abspath(os.path.join(current_app.static_folder, path[len(static_prefix):]))
+        root = os.path.abspath(self.root)
+        if not absolute_path.startswith(root + os.sep):
+            return None
+        return os.path.relpath(absolute_path, root).replace(os.sep, '/')
+
+    def read(self, key):
+        with open(self._path(key), 'rb') as f:
+            return f.read()
+
+    def save_bytes(self, key, data, content_type, cache_control=None):
+        self.write(key, io.BytesIO(data))
+        return self.public_url(key)
+
+    def get_size(self, key):
+        path = self._path(key)
+        return os.path.getsize(path) if os.path.exists(path) else None
+
+    def delete(self, key):
+        path = self._path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def public_url(self, key):
+        # UPLOAD_FOLDER, static klasörünün altındaysa dosya doğrudan static olarak sunulur
+        static_root = os.path.abspath(current_app.static_folder)
+        absolute_path = os.path.abspath(self._path(key))
+        if absolute_path.startswith(static_root + os.sep):
+            static_name = os.path.relpath(absolute_path, static_root).replace(os.sep, '/')
+            if has_request_context():
+                return url_for('static', filename=static_name, _external=True)
+            # İstek dışında (varyant iş parçacığı, CLI) sunucu adresi bilinmez; uygulamaya göre yol döner
+            return f"{current_app.static_url_path}/{quote(static_name)}"
+        return f"file://{absolute_path}"
+
+
+def _local_upload_serializer():
+    return Serializer(current_app.config['SECRET_KEY'], salt='local-direct-upload')
+
+
+def verify_local_upload_token(token, max_age):
+    """Yerel PUT ucunun token'ını doğrular; geçerliyse (key, content_type), değilse None döndürür."""
+    try:
+        data = _local_upload_serializer().loads(token, max_age=max_age)
+    except Exception:
+        return None
+    return data['k'], data['ct']
+
+
+def get_storage():
+    """Uygulamanın ayarlı depolama arka ucunu döndürür (uygulama başına bir kez oluşturulur)."""
+    app = current_app._get_current_object()
+    backend = app.extensions.get('storage')
+    if backend is None:
+        config = app.config
+        backend_name = config.get('STORAGE_BACKEND', 'gcs')
+        chunk_size = config.get('STORAGE_CHUNK_SIZE', 1024 * 1024)
+        if backend_name == 'local':
+            backend = LocalStorage(config['UPLOAD_FOLDER'], chunk_size)
+        elif backend_name == 'gcs':
+            backend = GCSStorage(
+                config.get('GCS_BUCKET_NAME'),
+                chunk_size,
+                config.get('GCS_RESUMABLE_THRESHOLD', 4 * 1024 * 1024),
+            )
+        else:
+            raise ValueError(f"Bilinmeyen depolama arka ucu: {backend_name}")
+        app.extensions['storage'] = backend
+    return backend
@@ -0,0 +1,2 @@
+# bench/__init__.py
+"""Performans ölçüm betikleri. Proje kök dizininden `python -m bench.<betik>` ile çalıştırılır."""
@@ -0,0 +1,132 @@
+# bench/dues_serialization.py
+"""
+1.000 satırlık aidat sayfasının JSON'a dönüştürülme maliyeti: eski yol ile yeni yol.
+
+    python -m bench.dues_serialization --rows 1000 --repeat 20
+
+/api/v1/dues cevabındaki satırlar (tutar, dönem, *_display alanları) iki yolla
+üretilip yazılır:
+  - before: satır başına strftime + önbelleksiz format_tl, Flask'ın varsayılan JSON sağlayıcısı
+  - after:  app/formatters.py (önbellekli) + uygulamanın JSON sağlayıcısı (orjson kuruluysa orjson)
+Satır üretimi ve serileştirme ayrı ayrı da raporlanır. Veritabanına bağlanılmaz.
+"""
+
+import argparse
+import os
+import time
+from datetime import date
+from types import SimpleNamespace
+
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-jwt-secret-key-bench-jwt-secret-key")
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+
+from dateutil.relativedelta import relativedelta  # noqa: E402
+from flask.json.provider import DefaultJSONProvider  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.formatters import format_date, format_tl  # noqa: E402
+from app.json_provider import json_provider_class  # noqa: E402
+
+
+def _format_tl_uncached(value):
+    try:
+        v = float(value)
+    except (TypeError, ValueError):
+        v = 0.0
+    return f"₺{v:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+def _make_dues(n):
+    # Gerçekçi dağılım: 24 dönem, daire tipine göre birkaç farklı tutar
+    amounts = [850.0, 1250.0, 1250.0, 1600.5, 2100.0]
+    first = date(2025, 1, 31)
+    return [
+        SimpleNamespace(
+            id=i + 1,
+            description=f"{(first + relativedelta(months=i % 24)):%B %Y} Aidatı",
+            amount=amounts[i % len(amounts)],
+            due_date=first + relativedelta(months=i % 24),
+            is_paid=i % 3 == 0,
+        )
+        for i in range(n)
+    ]
+
+
+def _status(due, today):
+    if due.is_paid:
+        return "Ödendi"
+    return "Gecikmede" if due.due_date < today else "Ödenmedi"
+
+
+def _rows_before(dues, today):
+    return [{
+        "id": due.id,
+        "description": due.description,
+        "amount": due.amount,
+        "due_date": due.due_date.isoformat(),
+        "status": _status(due, today),
+        "period": due.due_date.strftime("%B %Y"),
+        "amount_display": _format_tl_uncached(due.amount),
+    } for due in dues]
+
+
+def _rows_after(dues, today):
+    return [{
+        "id": due.id,
+        "description": due.description,
+        "amount": due.amount,
+        "due_date": due.due_date.isoformat(),
+        "status": _status(due, today),
+        "period": format_date(due.due_date, "%B %Y"),
+        "amount_display": format_tl(due.amount),
+    } for due in dues]
+
+
+def _payload(rows):
+    return {"success": True, "msg": "İşlem başarılı.", "error": None, "errorMessage": "",
+            "data": {"dues_list": rows, "total_debt_display": "₺0,00"}}
+
+
+def _best_of(func, repeat, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app()
+    dues = _make_dues(args.rows)
+    today = date(2026, 10, 19)
+    default_provider = DefaultJSONProvider(app)
+    app_provider = json_provider_class(app.config.get("JSON_PROVIDER", "auto"))(app)
+
+    with app.test_request_context("/"):
+        rows = _rows_before(dues, today)
+        build_before = _best_of(_rows_before, args.repeat, dues, today)
+        build_after = _best_of(_rows_after, args.repeat, dues, today)
+        dump_before = _best_of(lambda: default_provider.response(_payload(rows)), args.repeat)
+        dump_after = _best_of(lambda: app_provider.response(_payload(rows)), args.repeat)
+        size_before = len(default_provider.response(_payload(rows)).get_data())
+        size_after = len(app_provider.response(_payload(rows)).get_data())
+
+    total_before = build_before + dump_before
+    total_after = build_after + dump_after
+    print(f"Aidat sayfası — {args.rows} satır, en iyi {args.repeat} deneme, sağlayıcı: {type(app_provider).__name__}")
+    print(f"  satır üretimi : {build_before * 1000:8.2f} ms → {build_after * 1000:8.2f} ms")
+    print(f"  serileştirme  : {dump_before * 1000:8.2f} ms → {dump_after * 1000:8.2f} ms")
+    print(f"  toplam        : {total_before * 1000:8.2f} ms → {total_after * 1000:8.2f} ms"
+          f"  ({total_before / total_after:.1f}x)")
+    print(f"  cevap boyutu  : {size_before:8d} B  → {size_after:8d} B")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+# bench/email_render.py
+"""
+Toplu e-posta render maliyeti: alıcı başına render ile tek render + yer değiştirme.
+
+    python -m bench.email_render --recipients 500 --repeat 5
+
+'email/new_dues_notification' şablonu N sakin için iki yolla hazırlanır:
+  - per_recipient: her alıcı için render_template + _html_to_text (eski send_email yolu)
+  - render_once:   tek _render_broadcast + alıcı başına işaret değiştirme (send_bulk_email yolu)
+Her yol --repeat kez çalıştırılır, en iyi süre raporlanır. Dış servislere bağlanılmaz.
+"""
+
+import argparse
+import os
+import time
+from datetime import date
+from types import SimpleNamespace
+
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-jwt-secret-key-bench-jwt-secret-key")
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite://")
+
+from flask import render_template  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.email import _apply_substitutions, _html_to_text, _render_broadcast, _substitutions  # noqa: E402
+
+TEMPLATE = "email/new_dues_notification"
+
+
+def _per_recipient(residents, dues):
+    for name in residents:
+        html_body = render_template(f"{TEMPLATE}.html", resident_name=name, dues=dues)
+        _html_to_text(html_body)
+
+
+def _render_once(residents, dues):
+    html_body, text_body = _render_broadcast(TEMPLATE, {"dues": dues}, {"resident_name"})
+    for name in residents:
+        substitutions = _substitutions({"resident_name": name})
+        _apply_substitutions(html_body, substitutions)
+        _apply_substitutions(text_body, substitutions)
+
+
+def _best_of(func, repeat, *args):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func(*args)
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--recipients", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    app = create_app()
+    residents = [f"Sakin {i}" for i in range(args.recipients)]
+    dues = SimpleNamespace(description="Ekim 2026 Aidatı", amount=1250.0, due_date=date(2026, 10, 31))
+
+    with app.test_request_context("/"):
+        _render_once(residents[:1], dues)  # şablon derlemesini ölçüm dışında tut
+        per_recipient = _best_of(_per_recipient, args.repeat, residents, dues)
+        render_once = _best_of(_render_once, args.repeat, residents, dues)
+
+    n = args.recipients
+    print(f"{TEMPLATE} — {n} alıcı, en iyi {args.repeat} deneme")
+    print(f"  per_recipient : {per_recipient * 1000:9.2f} ms  ({per_recipient / n * 1e6:8.1f} µs/alıcı)")
+    print(f"  render_once   : {render_once * 1000:9.2f} ms  ({render_once / n * 1e6:8.1f} µs/alıcı)")
+    print(f"  hızlanma      : {per_recipient / render_once:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
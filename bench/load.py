@@ -0,0 +1,362 @@
+# bench/load.py
+"""
+Sık kullanılan uç noktalar için senaryolu yük testi; sonuçları JSON olarak raporlar.
+
+    python -m bench.seed --reset
+    python -m bench.load --requests 200 --concurrency 4 --output bench-results.json
+    python -m bench.load --output yeni.json --compare bench-results.json
+
+Senaryolar (--scenarios ile seçilir, varsayılan hepsi):
+  api_login            POST /api/v1/login (şifre doğrulama dahil)
+  api_dues             GET  /api/v1/dues
+  api_announcements    GET  /api/v1/announcements
+  api_polls            GET  /api/v1/polls
+  api_monthly_summary  GET  /api/v1/financials/monthly_summary
+  admin_dashboard      GET  /admin/dashboard (web oturumu)
+  financial_report     POST /admin/reports/financial (son 12 ay)
+  cron_recurring_dues  GET  /admin/tasks/generate-recurring-dues (tüm sitelerin sakinlerine aidat + e-posta)
+
+İstekler uygulamaya WSGI üzerinden (Flask test istemcisi) gönderilir; ağ ve
+sunucu süreci ölçüme girmez, uygulama kodu ve veritabanı ölçülür. Her iş
+parçacığının kendi istemcisi vardır; sakinler bench.seed'in ürettiği veriden
+--users kadar seçilir ve istekler aralarında dağıtılır. Her senaryo için:
+istek/saniye, gecikme yüzdelikleri (ms), istek başına SQL sorgu sayısı
+(app.query_stats.capture_queries ile) ve durum kodları raporlanır.
+
+Dış servisler bench/stubs.py ile sahtelenir (FCM, HMS, SendGrid, Brevo, GCS,
+Document AI); --stub-latency-ms ile servis gecikmesi taklit edilebilir.
+Veritabanı bench.seed ile aynı şekilde SQLALCHEMY_DATABASE_URI'dan seçilir
+(SQLite veya yerel MySQL).
+
+--compare ile önceki bir sonuç dosyasıyla karşılaştırılır: p95 gecikmesi
+--max-regression oranından fazla artan veya istek başına (medyan) sorgu sayısı artan
+senaryolar listelenir ve komut 1 ile çıkar (CI'da gerileme kontrolü için).
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from collections import Counter, namedtuple
+from datetime import date, datetime, timedelta
+from itertools import cycle
+
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-jwt-secret-key-bench-jwt-secret-key")
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite:////tmp/ays-bench.db")
+
+from app import create_app  # noqa: E402
+from app.extensions import db, limiter  # noqa: E402
+from app.models import Dues, RecurringExpense, User  # noqa: E402
+from app.query_stats import capture_queries  # noqa: E402
+from bench.seed import BENCH_PASSWORD  # noqa: E402
+from bench.stubs import get_stub_calls, install_stubs, stub_config  # noqa: E402
+
+# Gerçek istemciler gibi sıkıştırılmış cevap ister (sıkıştırma maliyeti de ölçülür)
+DEFAULT_HEADERS = {"Accept-Encoding": "gzip"}
+CRON_HEADERS = {**DEFAULT_HEADERS, "X-Appengine-Cron": "true"}
+RECURRING_DUES_DESCRIPTION = "Aylık Aidat"
+
+# build(ctx, worker) -> call() ; before_each/after_all(ctx) ölçüme girmez, uygulama bağlamında çalışır
+Scenario = namedtuple("Scenario", "build before_each after_all serial max_requests",
+                      defaults=(None, None, False, None))
+
+
+class BenchContext:
+    """Senaryoların paylaştığı uygulama, sakin token'ları ve yönetici hesapları."""
+
+    def __init__(self, app, users, random_seed):
+        self.app = app
+        self.today = date.today()
+        with app.app_context():
+            residents = User.query.filter_by(role="resident", is_active=True).order_by(User.id).all()
+            admins = User.query.filter_by(role="admin", is_active=True).order_by(User.id).all()
+            self.resident_emails = [u.email for u in residents]
+            self.admin_emails = [u.email for u in admins]
+        if not self.resident_emails or not self.admin_emails:
+            raise SystemExit("Veritabanında sakin/yönetici yok; önce `python -m bench.seed --reset` çalıştırın.")
+
+        rng = random.Random(random_seed)
+        self.login_emails = rng.sample(self.resident_emails, min(users, len(self.resident_emails)))
+        client = app.test_client()
+        self.resident_headers = [
+            {**DEFAULT_HEADERS, "Authorization": f"Bearer {self._api_token(client, email)}"}
+            for email in self.login_emails
+        ]
+
+    @staticmethod
+    def _api_token(client, email):
+        response = client.post("/api/v1/login", json={"email": email, "password": BENCH_PASSWORD})
+        if response.status_code != 200:
+            raise SystemExit(f"{email} API girişi başarısız: {response.status_code} {response.get_data(as_text=True)}")
+        return response.get_json()["data"]["access_token"]
+
+    def admin_client(self, worker):
+        """İş parçacığı başına (sırayla farklı sitelerin) yöneticisiyle oturum açmış web istemcisi."""
+        client = self.app.test_client()
+        email = self.admin_emails[worker % len(self.admin_emails)]
+        response = client.post("/login", data={"email": email, "password": BENCH_PASSWORD})
+        if response.status_code != 302 or not response.headers["Location"].endswith("/admin/dashboard"):
+            raise SystemExit(f"{email} web girişi başarısız: {response.status_code}")
+        return client
+
+
+# ──────────────────────────────────────────────────────────────
+# Senaryolar
+# ──────────────────────────────────────────────────────────────
+def _api_login(ctx, worker):
+    emails = cycle(ctx.login_emails[worker:] + ctx.login_emails[:worker])
+    client = ctx.app.test_client()
+    return lambda: client.post("/api/v1/login", json={"email": next(emails), "password": BENCH_PASSWORD},
+                               headers=DEFAULT_HEADERS)
+
+
+def _api_get(path):
+    def build(ctx, worker):
+        headers = cycle(ctx.resident_headers[worker:] + ctx.resident_headers[:worker])
+        client = ctx.app.test_client()
+        return lambda: client.get(path, headers=next(headers))
+    return build
+
+
+def _admin_dashboard(ctx, worker):
+    client = ctx.admin_client(worker)
+    return lambda: client.get("/admin/dashboard", headers=DEFAULT_HEADERS)
+
+
+def _financial_report(ctx, worker):
+    client = ctx.admin_client(worker)
+    form = {"start_date": (ctx.today - timedelta(days=365)).isoformat(), "end_date": ctx.today.isoformat()}
+    return lambda: client.post("/admin/reports/financial", data=form, headers=DEFAULT_HEADERS)
+
+
+def _cron_recurring_dues(ctx, worker):
+    # Aylık aidat kuralları bugüne çekilir ki cron her çalışmada tüm sakinler için aidat oluştursun
+    with ctx.app.app_context():
+        RecurringExpense.query.filter_by(description=RECURRING_DUES_DESCRIPTION).update(
+            {"day_of_month": datetime.utcnow().day}
+        )
+        db.session.commit()
+    client = ctx.app.test_client()
+    return lambda: client.get("/admin/tasks/generate-recurring-dues", headers=CRON_HEADERS)
+
+
+def _delete_generated_dues(ctx):
+    """Cron'un bugün oluşturduğu aidatları siler (her çalışma aynı işi yapsın, veri büyümesin)."""
+    Dues.query.filter_by(description=RECURRING_DUES_DESCRIPTION, due_date=datetime.utcnow().date()).delete()
+    db.session.commit()
+
+
+def _restore_recurring_rules(ctx):
+    _delete_generated_dues(ctx)
+    RecurringExpense.query.filter_by(description=RECURRING_DUES_DESCRIPTION).update({"day_of_month": 1})
+    db.session.commit()
+
+
+SCENARIOS = {
+    "api_login": Scenario(_api_login),
+    "api_dues": Scenario(_api_get("/api/v1/dues")),
+    "api_announcements": Scenario(_api_get("/api/v1/announcements")),
+    "api_polls": Scenario(_api_get("/api/v1/polls")),
+    "api_monthly_summary": Scenario(_api_get("/api/v1/financials/monthly_summary")),
+    "admin_dashboard": Scenario(_admin_dashboard),
+    "financial_report": Scenario(_financial_report),
+    "cron_recurring_dues": Scenario(_cron_recurring_dues, before_each=_delete_generated_dues,
+                                    after_all=_restore_recurring_rules, serial=True, max_requests=5),
+}
+
+
+# ──────────────────────────────────────────────────────────────
+# Çalıştırma ve raporlama
+# ──────────────────────────────────────────────────────────────
+def _percentile(sorted_values, percent):
+    """En yakın sıra yöntemiyle yüzdelik (sorted_values boş olmamalı)."""
+    index = max(0, min(len(sorted_values) - 1, round(percent / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def _summarize(samples, elapsed):
+    latencies = sorted(latency for latency, _status, _queries in samples)
+    queries = sorted(query_count for _latency, _status, query_count in samples)
+    statuses = Counter(str(status) for _latency, status, _queries in samples)
+    errors = sum(count for status, count in statuses.items() if int(status) >= 400)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "status": dict(sorted(statuses.items())),
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "min": round(latencies[0], 2),
+            "mean": round(sum(latencies) / len(latencies), 2),
+            **{f"p{p}": round(_percentile(latencies, p), 2) for p in (50, 90, 95, 99)},
+            "max": round(latencies[-1], 2),
+        },
+        "queries": {
+            "mean": round(sum(queries) / len(queries), 2),
+            "p50": _percentile(queries, 50),
+            "p95": _percentile(queries, 95),
+            "max": queries[-1],
+            "total": sum(queries),
+        },
+    }
+
+
+def run_scenario(ctx, scenario, requests, concurrency, warmup):
+    """Senaryoyu çalıştırır; (gecikme ms, durum kodu, sorgu sayısı) örneklerinin özetini döndürür."""
+    app = ctx.app
+    if scenario.max_requests:
+        requests = min(requests, scenario.max_requests)
+    workers = 1 if scenario.serial else max(1, min(concurrency, requests))
+    samples, samples_lock = [], threading.Lock()
+    errors = []
+
+    # İstemciler kendi istek bağlamlarını açar; dışta bir uygulama bağlamı olsa oturumlar (g) karışırdı
+    calls = [scenario.build(ctx, worker) for worker in range(workers)]
+
+    def prepare():
+        if scenario.before_each:
+            with app.app_context():
+                scenario.before_each(ctx)
+
+    for _ in range(warmup):
+        prepare()
+        calls[0]()
+
+    def worker_loop(call, count):
+        local = []
+        try:
+            for _ in range(count):
+                prepare()
+                with capture_queries() as statements:
+                    started = time.perf_counter()
+                    response = call()
+                    response.get_data()
+                    latency = (time.perf_counter() - started) * 1000
+                local.append((latency, response.status_code, len(statements)))
+        except Exception as e:
+            errors.append(e)
+        with samples_lock:
+            samples.extend(local)
+
+    counts = [requests // workers + (1 if i < requests % workers else 0) for i in range(workers)]
+    threads = [threading.Thread(target=worker_loop, args=(call, count)) for call, count in zip(calls, counts)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    if scenario.after_all:
+        with app.app_context():
+            scenario.after_all(ctx)
+    if errors:
+        raise errors[0]
+    summary = _summarize(samples, elapsed)
+    summary["concurrency"] = workers
+    return summary
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(results, baseline, max_regression):
+    """Önceki sonuçla karşılaştırma satırları ve gerileme gösteren senaryolar."""
+    lines, regressions = [], []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        p95, old_p95 = current["latency_ms"]["p95"], previous["latency_ms"]["p95"]
+        # Ortalama, önbellek ısınmasıyla oynar; medyan sorgu sayısı kararlıdır
+        queries, old_queries = current["queries"]["p50"], previous["queries"].get("p50", previous["queries"]["mean"])
+        change = (p95 - old_p95) / old_p95 if old_p95 else 0.0
+        regressed = change > max_regression or queries > old_queries
+        if regressed:
+            regressions.append(name)
+        lines.append(f"  {name:<22} p95 {old_p95:9.2f} → {p95:9.2f} ms ({change:+.0%})   "
+                     f"sorgu {old_queries:5} → {queries:5}{'   GERİLEME' if regressed else ''}")
+    return lines, regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default="all", help="Virgülle ayrılmış senaryo adları veya 'all'")
+    parser.add_argument("--requests", type=int, default=100, help="Senaryo başına istek sayısı")
+    parser.add_argument("--concurrency", type=int, default=1, help="Eşzamanlı iş parçacığı sayısı")
+    parser.add_argument("--warmup", type=int, default=3, help="Ölçülmeyen ısınma isteği sayısı")
+    parser.add_argument("--users", type=int, default=20, help="İstekleri paylaşan sakin sayısı")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--stub-latency-ms", type=float, default=0.0, help="Sahte dış servis çağrısı gecikmesi")
+    parser.add_argument("--output", help="JSON sonuç dosyası (verilmezse stdout'a yazılır)")
+    parser.add_argument("--compare", help="Karşılaştırılacak önceki JSON sonuç dosyası")
+    parser.add_argument("--max-regression", type=float, default=0.2, help="İzin verilen p95 artışı (0.2 = %%20)")
+    args = parser.parse_args()
+
+    names = list(SCENARIOS) if args.scenarios == "all" else [name.strip() for name in args.scenarios.split(",")]
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"Bilinmeyen senaryo: {', '.join(unknown)} (seçenekler: {', '.join(SCENARIOS)})")
+
+    app = create_app()
+    app.config.update(stub_config(), WTF_CSRF_ENABLED=False)
+    app.logger.setLevel("WARNING")
+    limiter.enabled = False
+    install_stubs(args.stub_latency_ms)
+
+    ctx = BenchContext(app, args.users, args.seed)
+    with app.app_context():
+        database = db.engine.url.get_backend_name()
+    results = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(timespec="seconds"),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "database": database,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "users": len(ctx.login_emails),
+            "residents": len(ctx.resident_emails),
+            "apartments": len(ctx.admin_emails),
+            "stub_latency_ms": args.stub_latency_ms,
+        },
+        "scenarios": {},
+    }
+    for name in names:
+        summary = run_scenario(ctx, SCENARIOS[name], args.requests, args.concurrency, args.warmup)
+        results["scenarios"][name] = summary
+        latency = summary["latency_ms"]
+        print(f"{name:<22} {summary['throughput_rps']:8.1f} ist/sn   p50 {latency['p50']:8.2f}   "
+              f"p95 {latency['p95']:8.2f}   p99 {latency['p99']:8.2f} ms   "
+              f"sorgu {summary['queries']['mean']:6.1f}   hata {summary['errors']}", file=sys.stderr)
+    results["stubs"] = get_stub_calls()
+
+    report = json.dumps(results, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(report + "\n")
+    else:
+        print(report)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            lines, regressions = compare(results, json.load(f), args.max_regression)
+        print(f"Karşılaştırma ({args.compare}):", file=sys.stderr)
+        print("\n".join(lines), file=sys.stderr)
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
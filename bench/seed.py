@@ -0,0 +1,318 @@
+# bench/seed.py
+"""
+Yük testleri için gerçekçi ve tekrarlanabilir sentetik veri.
+
+    python -m bench.seed --apartments 3 --blocks 4 --residents-per-block 25 --years 3 --reset
+
+Her apartman (site) için: bloklar, sakinler ve bir yönetici, push token'ları,
+geçmiş yıllar boyunca aylık aidatlar (eski aylar büyük ölçüde ödenmiş; son
+aylarda ödenmemiş ve dekontu incelemede bekleyenler var), ödenen aidatların ve
+aylık giderlerin kasa hareketleri, talepler, duyurular, anketler ve oylar, ortak
+alanlar ve rezervasyonlar, aylık aidat kuralı. Aynı --seed ve --today ile aynı
+veri üretilir.
+
+Satırlar toplu INSERT ile yazılır (ORM olayları çalışmaz): arama metni burada
+hesaplanır, aylık finansal özetler sonunda rebuild_rollups ile oluşturulur.
+Veritabanı SQLALCHEMY_DATABASE_URI ile seçilir (varsayılan sqlite:////tmp/ays-bench.db);
+yerel MySQL için:
+
+    SQLALCHEMY_DATABASE_URI=mysql+pymysql://root@localhost/ays_bench python -m bench.seed --reset
+
+Tüm kullanıcıların şifresi BENCH_PASSWORD'dür. Yöneticiler admin<N>@bench.example.com,
+sakinler sakin<N>-<blok>-<daire>@bench.example.com adresini kullanır.
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+from collections import Counter
+from datetime import date, datetime, timedelta
+
+os.environ.setdefault("SECRET_KEY", "bench")
+os.environ.setdefault("JWT_SECRET_KEY", "bench-jwt-secret-key-bench-jwt-secret-key")
+os.environ.setdefault("SQLALCHEMY_DATABASE_URI", "sqlite:////tmp/ays-bench.db")
+
+from dateutil.relativedelta import relativedelta  # noqa: E402
+from sqlalchemy import func, insert  # noqa: E402
+from werkzeug.security import generate_password_hash  # noqa: E402
+
+from app import create_app  # noqa: E402
+from app.extensions import db  # noqa: E402
+from app.financial_rollups import rebuild_rollups  # noqa: E402
+from app.models import (  # noqa: E402
+    Announcement, Apartment, Block, CommonArea, Dues, Expense, Poll, PollOption, PushToken,
+    RecurringExpense, Request, RequestStatus, Reservation, Transaction, User, Vote,
+)
+from app.receipt_processing import RECEIPT_NEEDS_REVIEW  # noqa: E402
+from app.search import request_search_text, user_search_text  # noqa: E402
+
+BENCH_PASSWORD = "bench-password"
+BENCH_EMAIL_DOMAIN = "bench.example.com"
+
+# Toplu INSERT'lerde tek seferde gönderilen satır sayısı
+INSERT_BATCH_SIZE = 2000
+
+FIRST_NAMES = ["Ahmet", "Ayşe", "Mehmet", "Fatma", "Mustafa", "Emine", "Ali", "Hatice", "Hüseyin", "Zeynep",
+               "İbrahim", "Elif", "Murat", "Şule", "Ömer", "Gül", "Can", "Özge", "Burak", "Çiğdem"]
+LAST_NAMES = ["Yılmaz", "Kaya", "Demir", "Şahin", "Çelik", "Yıldız", "Öztürk", "Aydın", "Özdemir", "Arslan",
+              "Doğan", "Kılıç", "Aslan", "Çetin", "Koç", "Kurt", "Özkan", "Şimşek", "Polat", "Erdoğan"]
+
+# (açıklama, aylık ortalama tutar); her ay bir kısmı gerçekleşir
+MONTHLY_EXPENSES = [
+    ("Ortak Alan Elektrik Faturası", 2400), ("Su Faturası", 1800), ("Temizlik Hizmeti", 6500),
+    ("Asansör Bakımı", 1500), ("Bahçe Bakımı", 1200), ("Güvenlik Hizmeti", 9000), ("Kazan Dairesi Bakımı", 2000),
+]
+REQUEST_SAMPLES = [
+    ("Arıza", "Asansör", "Asansör arızası", "Asansör katlar arasında duruyor, kapı geç açılıyor."),
+    ("Arıza", "Elektrik", "Merdiven lambası yanmıyor", "Üçüncü kat merdiven boşluğundaki lamba birkaç gündür yanmıyor."),
+    ("Arıza", "Su Tesisatı", "Su kaçağı", "Otoparkın tavanından su damlıyor, üst kattaki tesisat kontrol edilmeli."),
+    ("Bakım", "Bahçe", "Bahçe sulaması", "Bahçedeki otomatik sulama sistemi sabahları çalışmıyor."),
+    ("Bakım", "Ortak Alan", "Boya badana", "Giriş holündeki duvarlar çok kirlendi, boya yapılmasını rica ederim."),
+    ("Yeni talep", "Otopark", "Bisiklet park yeri", "Otoparka bisiklet park yeri yapılabilir mi?"),
+    ("Yeni talep", "Güvenlik", "Kamera ekleme", "Arka kapıya güvenlik kamerası eklenmesini öneriyorum."),
+    ("Diğer", None, "Gürültü şikayeti", "Gece yarısından sonra üst kattan yüksek ses geliyor."),
+]
+POLL_SAMPLES = [
+    ("Dış cephe boyası yapılsın mı?", ["Evet", "Hayır", "Gelecek yıl"]),
+    ("Aidatlara yıllık artış oranı ne olsun?", ["%20", "%30", "%40", "Enflasyon kadar"]),
+    ("Havuz açılış saatleri uzatılsın mı?", ["Evet", "Hayır"]),
+    ("Güvenlik şirketi değiştirilsin mi?", ["Evet", "Hayır", "Fikrim yok"]),
+    ("Çocuk parkı yenilensin mi?", ["Evet", "Hayır"]),
+]
+ANNOUNCEMENT_SAMPLES = [
+    "Yarın 10:00-14:00 arasında planlı su kesintisi olacaktır.",
+    "Asansör bakımı nedeniyle B blok asansörü gün boyu kullanılamayacaktır.",
+    "Olağan genel kurul toplantısı toplantı salonunda yapılacaktır, katılımınızı rica ederiz.",
+    "Otoparkta misafir araçlarının en fazla bir gün kalmasına izin verilmektedir.",
+    "Bahçe ilaçlaması yapılacağından evcil hayvanlarınızı bahçeye çıkarmayınız.",
+]
+COMMON_AREAS = [("Toplantı Salonu", 30), ("Spor Salonu", 8), ("Barbekü Alanı", 15)]
+
+
+def resident_email(apartment_no, block_no, flat_no):
+    return f"sakin{apartment_no}-{block_no}-{flat_no}@{BENCH_EMAIL_DOMAIN}"
+
+
+def admin_email(apartment_no):
+    return f"admin{apartment_no}@{BENCH_EMAIL_DOMAIN}"
+
+
+def _month_starts(today, years):
+    first = date(today.year, today.month, 1) - relativedelta(months=years * 12 - 1)
+    return [first + relativedelta(months=i) for i in range(years * 12)]
+
+
+def _random_moment(rng, start, end):
+    """[start, end) arasında rastgele bir datetime."""
+    span = (end - start).total_seconds()
+    return start + timedelta(seconds=int(rng.random() * span))
+
+
+class _Rows:
+    """Tablo başına açık id'li satırlar; id'ler FK'lar için önceden verilir."""
+
+    def __init__(self):
+        self.rows = {}
+        self.next_ids = Counter()
+
+    def add(self, model, **values):
+        self.next_ids[model] += 1
+        values['id'] = self.next_ids[model]
+        self.rows.setdefault(model, []).append(values)
+        return values['id']
+
+    def flush(self, models):
+        for model in models:
+            rows = self.rows.pop(model, [])
+            for start in range(0, len(rows), INSERT_BATCH_SIZE):
+                db.session.execute(insert(model), rows[start:start + INSERT_BATCH_SIZE])
+        db.session.commit()
+
+
+def _seed_apartment(rows, rng, apartment_no, blocks, residents_per_block, months, today, password_hash):
+    now = datetime.combine(today, datetime.min.time()) + timedelta(hours=12)
+    first_day = datetime.combine(months[0], datetime.min.time())
+    apartment_id = rows.add(Apartment, name=f"Bench Sitesi {apartment_no}",
+                            address=f"{apartment_no}. Sokak No: {rng.randint(1, 99)}, Kadıköy/İstanbul",
+                            created_at=first_day)
+    due_amount = rng.randrange(750, 2500, 50)
+
+    def add_user(email, name, role, block_id, daire_no, is_active=True):
+        phone = f"05{rng.randint(30, 59)} {rng.randint(100, 999)} {rng.randint(1000, 9999)}"
+        return rows.add(
+            User, apartment_id=apartment_id, block_id=block_id, email=email, password=password_hash, name=name,
+            role=role, created_at=_random_moment(rng, first_day, first_day + timedelta(days=60)),
+            phone_number=phone, daire_no=daire_no, is_email_verified=True, is_active=is_active,
+            notification_digest=rng.choices(['immediate', 'hourly', 'daily'], [0.8, 0.05, 0.15])[0],
+            search_text=user_search_text(name, email, phone, daire_no),
+        )
+
+    admin_id = add_user(admin_email(apartment_no), f"Yönetici {apartment_no}", 'admin', None, None)
+    residents = []
+    for block_no in range(1, blocks + 1):
+        block_id = rows.add(Block, name=f"{chr(64 + block_no)} Blok", apartment_id=apartment_id)
+        for flat_no in range(1, residents_per_block + 1):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            # Sakinlerin küçük bir kısmı onay bekliyor (pasif)
+            is_active = rng.random() > 0.03
+            user_id = add_user(resident_email(apartment_no, block_no, flat_no), name, 'resident',
+                               block_id, str(flat_no), is_active)
+            if is_active:
+                residents.append((user_id, name))
+            if rng.random() < 0.8:
+                service = 'hms' if rng.random() < 0.15 else 'fcm'
+                rows.add(PushToken, user_id=user_id, token=f"{service}-bench-{user_id}-{rng.getrandbits(64):016x}",
+                         service=service, created_at=now)
+
+    rows.add(RecurringExpense, apartment_id=apartment_id, description="Aylık Aidat", amount=due_amount,
+             day_of_month=1, is_active=True, created_at=first_day)
+
+    # Aidatlar ve aidat ödemelerinin kasa hareketleri
+    for index, month in enumerate(months):
+        months_ago = len(months) - 1 - index
+        due_date = month + timedelta(days=14)
+        description = f"{month:%m/%Y} Aidatı"
+        for user_id, name in residents:
+            paid = rng.random() < (0.97 if months_ago >= 2 else 0.6 if months_ago == 1 else 0.35)
+            values = dict(apartment_id=apartment_id, user_id=user_id, amount=due_amount, due_date=due_date,
+                          is_paid=paid, description=description)
+            if paid:
+                paid_at = min(now, datetime.combine(due_date, datetime.min.time())
+                              + timedelta(days=rng.randint(-10, 20), hours=rng.randint(8, 22)))
+                dues_id = rows.add(Dues, payment_date=paid_at, **values)
+                rows.add(Transaction, apartment_id=apartment_id, amount=due_amount,
+                         description=f"Aidat Ödemesi: {name} - {description}", transaction_date=paid_at,
+                         source_type='dues', source_id=dues_id, user_id=admin_id)
+            elif months_ago <= 1 and rng.random() < 0.3:
+                uploaded = now - timedelta(days=rng.randint(0, 20))
+                rows.add(Dues, receipt_filename=f"receipts/bench-{apartment_no}-{user_id}-{index}.pdf",
+                         receipt_upload_date=uploaded, receipt_status=RECEIPT_NEEDS_REVIEW,
+                         receipt_status_updated_at=uploaded, **values)
+            else:
+                rows.add(Dues, **values)
+
+        # Aylık giderler
+        month_start = datetime.combine(month, datetime.min.time())
+        month_end = min(now, month_start + relativedelta(months=1))
+        for expense, average in rng.sample(MONTHLY_EXPENSES, rng.randint(3, len(MONTHLY_EXPENSES))):
+            amount = round(average * rng.uniform(0.7, 1.4), 2)
+            spent_at = _random_moment(rng, month_start, month_end)
+            expense_id = rows.add(Expense, apartment_id=apartment_id, description=expense, amount=amount,
+                                  expense_date=spent_at.date(), created_at=spent_at, created_by_id=admin_id)
+            rows.add(Transaction, apartment_id=apartment_id, amount=-amount, description=f"Masraf: {expense}",
+                     transaction_date=spent_at, source_type='expense', source_id=expense_id, user_id=admin_id)
+
+        # Ayda 1-3 duyuru
+        for n in range(rng.randint(1, 3)):
+            rows.add(Announcement, apartment_id=apartment_id, title=f"{month:%m/%Y} Duyurusu #{n + 1}",
+                     content=f"Değerli site sakinlerimiz, {rng.choice(ANNOUNCEMENT_SAMPLES)}",
+                     created_at=_random_moment(rng, month_start, month_end), created_by=admin_id)
+
+    # Talepler: sakin başına yılda ortalama 1,5
+    for _ in range(int(len(residents) * len(months) / 8)):
+        user_id, _name = rng.choice(residents)
+        category, location, title, text = rng.choice(REQUEST_SAMPLES)
+        created_at = _random_moment(rng, first_day, now)
+        age_days = (now - created_at).days
+        status = (RequestStatus.TAMAMLANDI if age_days > 30 and rng.random() < 0.9
+                  else rng.choice([RequestStatus.BEKLEMEDE, RequestStatus.ISLEMDE, RequestStatus.TAMAMLANDI]))
+        rows.add(Request, apartment_id=apartment_id, title=title, description=text, status=status,
+                 created_at=created_at, updated_at=created_at + timedelta(days=min(age_days, rng.randint(0, 10))),
+                 reply="Talebiniz ilgili ekibe iletildi." if status != RequestStatus.BEKLEMEDE else None,
+                 user_id=user_id, created_by_id=user_id, category=category,
+                 priority=rng.choice(["Düşük", "Orta", "Orta", "Yüksek"]), location=location,
+                 search_text=request_search_text(title, text))
+
+    # Anketler: üç ayda bir; en yenisi hâlâ açık
+    poll_months = months[::3]
+    for index, month in enumerate(poll_months):
+        question, options = POLL_SAMPLES[index % len(POLL_SAMPLES)]
+        created_at = datetime.combine(month, datetime.min.time()) + timedelta(days=rng.randint(0, 10))
+        is_open = index == len(poll_months) - 1
+        poll_id = rows.add(Poll, question=question, is_active=is_open, created_at=created_at,
+                           expiration_date=now + timedelta(days=10) if is_open else created_at + timedelta(days=14),
+                           result_notification_sent=not is_open, apartment_id=apartment_id, created_by_id=admin_id)
+        option_ids = [rows.add(PollOption, text=text, poll_id=poll_id) for text in options]
+        weights = [rng.random() for _ in option_ids]
+        for user_id, _name in residents:
+            if rng.random() < (0.3 if is_open else 0.6):
+                rows.add(Vote, user_id=user_id, poll_id=poll_id, option_id=rng.choices(option_ids, weights)[0],
+                         voted_at=created_at + timedelta(hours=rng.randint(1, 24 * 10)))
+
+    # Ortak alanlar: son 6 ay ve önümüzdeki ay için haftada birkaç rezervasyon
+    for area, capacity in COMMON_AREAS:
+        area_id = rows.add(CommonArea, name=area, description=f"{area} (en fazla {capacity} kişi)",
+                           is_active=True, capacity=capacity, apartment_id=apartment_id)
+        for day in range(-180, 30):
+            if rng.random() < 0.4:
+                start = now.replace(hour=rng.randint(9, 20)) + timedelta(days=day)
+                user_id, _name = rng.choice(residents)
+                rows.add(Reservation, start_time=start, end_time=start + timedelta(hours=rng.choice([1, 2, 3])),
+                         num_of_people=rng.randint(1, capacity), notes=None, user_id=user_id,
+                         common_area_id=area_id, apartment_id=apartment_id,
+                         created_at=start - timedelta(days=rng.randint(1, 14)))
+
+
+# FK sırasına göre yazım sırası
+INSERT_ORDER = [Apartment, Block, User, PushToken, RecurringExpense, Dues, Expense, Transaction, Announcement,
+                Request, Poll, PollOption, Vote, CommonArea, Reservation]
+
+
+def seed(apartments=3, blocks=3, residents_per_block=20, years=2, random_seed=42, today=None):
+    """
+    Boş bir veritabanına sentetik veri yazar; tablo başına satır sayılarını döndürür.
+    Uygulama bağlamı içinde çağrılmalıdır.
+    """
+    if db.session.query(func.count(Apartment.id)).scalar():
+        raise RuntimeError("Veritabanı boş değil; --reset ile tabloları sıfırlayın.")
+
+    rng = random.Random(random_seed)
+    today = today or date.today()
+    months = _month_starts(today, years)
+    # Şifre özeti bir kez hesaplanır (tüm kullanıcılar aynı şifreyi kullanır)
+    password_hash = generate_password_hash(BENCH_PASSWORD)
+
+    rows = _Rows()
+    for apartment_no in range(1, apartments + 1):
+        _seed_apartment(rows, rng, apartment_no, blocks, residents_per_block, months, today, password_hash)
+    counts = {model.__tablename__: len(rows.rows.get(model, [])) for model in INSERT_ORDER}
+    rows.flush(INSERT_ORDER)
+
+    counts['monthly_financial_summary'] = rebuild_rollups()
+    return counts
+
+
+def reset_database():
+    db.drop_all()
+    db.create_all()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--apartments", type=int, default=3)
+    parser.add_argument("--blocks", type=int, default=3, help="Apartman başına blok sayısı")
+    parser.add_argument("--residents-per-block", type=int, default=20)
+    parser.add_argument("--years", type=int, default=2, help="Aidat/kasa geçmişi (yıl)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--today", type=date.fromisoformat, default=None,
+                        help="Verinin biteceği gün (YYYY-AA-GG); tekrarlanabilirlik için sabitlenebilir")
+    parser.add_argument("--reset", action="store_true", help="Tabloları silip yeniden oluştur")
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        if args.reset:
+            reset_database()
+        started = time.perf_counter()
+        counts = seed(args.apartments, args.blocks, args.residents_per_block, args.years, args.seed, args.today)
+        elapsed = time.perf_counter() - started
+
+        database = db.engine.url.render_as_string(hide_password=True)
+    print(json.dumps({"database": database, "seconds": round(elapsed, 2), "rows": counts},
+                     ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
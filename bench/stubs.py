@@ -0,0 +1,109 @@
+# bench/stubs.py
+"""
+Yük testlerinde dış servislerin yerine geçen sahte istemciler.
+
+install_stubs() sonrasında:
+  - FCM: messaging.send_each_for_multicast tüm token'lar için başarılı döner
+  - HMS: erişim token'ı ve gönderim isteği ağa çıkmadan başarılı döner
+  - SendGrid: _get_sg_client 202 döndüren sahte istemci verir
+  - Brevo: _open_brevo_session mesajı sayıp bırakan sahte SMTP oturumu açar
+  - GCS ve Document AI: stub_config() ile uygulamanın kendi yerel depolama ('local')
+    ve sahte OCR ('stub') arka uçları seçilir
+
+Gönderimler kodun gerçek yolundan geçer (parçalara bölme, toplu e-posta gruplama,
+metrikler); sadece ağ çağrısı yapılmaz. latency_ms verilirse her sahte çağrı o kadar
+bekler (servis gecikmesinin istek süresine etkisini görmek için). Çağrı sayıları
+get_stub_calls ile alınır.
+"""
+
+import threading
+import time
+from collections import Counter
+from types import SimpleNamespace
+
+from firebase_admin import messaging
+
+from app import email, notifications
+
+_calls = Counter()
+_calls_lock = threading.Lock()
+_latency = 0.0
+
+
+def _record(**counts):
+    with _calls_lock:
+        _calls.update(counts)
+    if _latency:
+        time.sleep(_latency)
+
+
+def get_stub_calls():
+    """Servis başına sahte çağrı sayıları (fcm/hms istekleri, e-posta istekleri ve mesajları)."""
+    with _calls_lock:
+        return dict(_calls)
+
+
+def reset_stub_calls():
+    with _calls_lock:
+        _calls.clear()
+
+
+def _fake_send_each_for_multicast(message, dry_run=False, app=None):
+    _record(fcm_requests=1, fcm_messages=len(message.tokens))
+    return messaging.BatchResponse([messaging.SendResponse({'name': 'bench'}, None) for _ in message.tokens])
+
+
+def _fake_hms_access_token(self, expired_token=None):
+    return 'bench-hms-token'
+
+
+def _fake_hms_send_chunk(self, access_token, tokens, message):
+    _record(hms_requests=1, hms_messages=len(tokens))
+    return len(tokens), 0, []
+
+
+class _FakeSendGridClient:
+    def send(self, msg):
+        recipients = sum(len(p.tos) for p in msg.personalizations or []) or 1
+        _record(sendgrid_requests=1, sendgrid_recipients=recipients)
+        return SimpleNamespace(status_code=202)
+
+
+class _FakeSMTP:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def send_message(self, msg):
+        _record(brevo_messages=1)
+
+    def quit(self):
+        pass
+
+    close = quit
+
+
+def stub_config():
+    """Dış servis gerektirmeyen uygulama ayarları (create_app'ten sonra app.config'e yazılır)."""
+    return {
+        'STORAGE_BACKEND': 'local',
+        'RECEIPT_OCR_BACKEND': 'stub',
+        'RECEIPT_OCR_STUB_RESULT': None,
+        'SENDGRID_API_KEY': 'bench',
+        'HMS_APP_ID': 'bench',
+        'HMS_APP_SECRET': 'bench',
+        'MAIL_DEBUG_MODE': 'False',
+    }
+
+
+def install_stubs(latency_ms=0):
+    """Dış servis istemcilerini süreç genelinde sahteleriyle değiştirir."""
+    global _latency
+    _latency = latency_ms / 1000
+    messaging.send_each_for_multicast = _fake_send_each_for_multicast
+    notifications.HMSClient.get_access_token = _fake_hms_access_token
+    notifications.HMSClient.send_chunk = _fake_hms_send_chunk
+    email._get_sg_client = _FakeSendGridClient
+    email._open_brevo_session = lambda brevo_config: _FakeSMTP()
@@ -1,5 +1,6 @@
 # app/config.py
 import os
+from datetime import timedelta
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -23,6 +24,11 @@ class Config:
     # ─────────────────────────── Upload
     UPLOAD_FOLDER   = os.path.join(basedir, "app", "static", "uploads")
     MAX_CONTENT_LENGTH = 5 * 1024 * 1024  # 5 MB
+    # Depolama arka ucu: 'gcs' (üretim) veya 'local' (UPLOAD_FOLDER'a yazar; test/benchmark için)
+    STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "gcs")
+    STORAGE_CHUNK_SIZE = 1024 * 1024  # 1 MB (GCS için 256 KB'ın katı olmalı)
+    # İstemcinin doğrudan depolamaya yükleme yaptığı imzalı URL'lerin geçerlilik süresi (saniye)
+    DIRECT_UPLOAD_URL_EXPIRES = 15 * 60
 
     # ─────────────────────────── E-posta
     MAIL_DEFAULT_SENDER = os.environ.get("MAIL_DEFAULT_SENDER", "noreply@flatnetsite.com")
@@ -38,6 +44,10 @@ class Config:
     BREVO_SMTP_LOGIN = os.environ.get("BREVO_SMTP_LOGIN")
     BREVO_SMTP_PASSWORD = os.environ.get("BREVO_SMTP_PASSWORD")
 
+    # Toplu gönderim (send_bulk_email): SendGrid isteği başına alıcı, Brevo SMTP oturumu başına mesaj
+    SENDGRID_PERSONALIZATIONS_PER_REQUEST = 1000
+    BREVO_SMTP_BATCH_SIZE = 100
+
     # (Opsiyonel/eski SMTP ayarları – kullanmıyorsan kalsın, zararı yok)
     MAIL_SERVER   = "smtp.sendgrid.net"
     MAIL_PORT     = 2525
@@ -49,15 +59,67 @@ class Config:
 
     # Cloud Storage
     GCS_BUCKET_NAME = os.environ.get("GCS_BUCKET_NAME")
+    GCS_HTTP_POOL_SIZE = int(os.environ.get("GCS_HTTP_POOL_SIZE", 10))
+    # Bu boyut ve üzerindeki dosyalar parça parça (resumable) yüklenir
+    GCS_RESUMABLE_THRESHOLD = 4 * 1024 * 1024
     
     # --- DOCUMENT AI AYARLARI ---
     DOCAI_PROCESSOR_ID = '90480319095c8879'
     DOCAI_LOCATION = 'eu'
+    # Talep eki / blog resmi varyantları: ad → en uzun kenar (px). Hepsi EXIF'siz WebP.
+    IMAGE_VARIANTS = {'thumb': 480, 'medium': 1280}
+    IMAGE_WEBP_QUALITY = 80
+    IMAGE_VARIANTS_ASYNC = os.environ.get("IMAGE_VARIANTS_ASYNC", "True") == "True"
+
+    # Dekont OCR arka ucu: 'documentai' (üretim) veya 'stub' (yerel/test, RECEIPT_OCR_STUB_RESULT döner)
+    RECEIPT_OCR_BACKEND = os.environ.get("RECEIPT_OCR_BACKEND", "documentai")
+    RECEIPT_OCR_STUB_RESULT = None
+    # False ise doğrulama yükleme isteği içinde çalışır (testlerde deterministik sonuç için)
+    RECEIPT_OCR_ASYNC = os.environ.get("RECEIPT_OCR_ASYNC", "True") == "True"
+    # Bu süreden uzun 'queued'/'processing' kalan dekontlar cron ile yeniden işlenir
+    RECEIPT_OCR_STALE_MINUTES = 15
 
     # ─────────────────────────── BİLDİRİM SERVİSLERİ (YENİ EKLENDİ)
     # Huawei Push Kit (HMS) için ayarlar
     HMS_APP_ID = os.environ.get("HMS_APP_ID")
     HMS_APP_SECRET = os.environ.get("HMS_APP_SECRET")
+    HMS_HTTP_POOL_SIZE = 4
+    # Bildirim kutusu (outbox): False ise gönderim isteğin içinde yapılır (testler için)
+    NOTIFICATION_DISPATCH_ASYNC = os.environ.get("NOTIFICATION_DISPATCH_ASYNC", "True") == "True"
+    NOTIFICATION_BATCH_SIZE = 500
+    NOTIFICATION_MAX_ATTEMPTS = 5
+    # Bu süreden uzun 'sending' kalan bildirimler cron ile yeniden kuyruğa alınır
+    NOTIFICATION_STALE_MINUTES = 10
+    NOTIFICATION_RETENTION_DAYS = 90
+    # Ayarlıysa paylaşılan önbellek (ör. HMS erişim token'ı) tüm işçi süreçlerince Redis'te tutulur
+    CACHE_REDIS_URL = os.environ.get("CACHE_REDIS_URL")
+    # API yetki kontrolünde kullanılan kullanıcı özetinin önbellekte kalma süresi (saniye)
+    PRINCIPAL_CACHE_TTL = 300
+    # Giriş yapmamış ziyaretçilere giden public/blog sayfalarının önbelleği (app/page_cache.py)
+    PAGE_CACHE_ENABLED = os.environ.get("PAGE_CACHE_ENABLED", "True") == "True"
+    PAGE_CACHE_TTL = int(os.environ.get("PAGE_CACHE_TTL", "600"))
+    # Blog listesinde sayfa başına yazı ve sitemap.xml'deki mutlak adreslerin kökü
+    BLOG_PAGE_SIZE = 12
+    SITE_URL = os.environ.get("SITE_URL", "https://www.flatnetsite.com")
+    SITEMAP_CACHE_TTL = 24 * 60 * 60
+    # JSON cevap yazıcısı: "auto" (orjson kuruluysa orjson), "orjson" veya "stdlib"
+    JSON_PROVIDER = os.environ.get("JSON_PROVIDER", "auto")
+    # Cevap sıkıştırma: bu boyuttan (bayt) küçük gövdeler sıkıştırılmaz
+    COMPRESS_ENABLED = os.environ.get("COMPRESS_ENABLED", "True") == "True"
+    COMPRESS_MIN_SIZE = 500
+    COMPRESS_LEVEL = 6
+    COMPRESS_BROTLI_QUALITY = 4
+    # Bu süreden (ms) uzun sorgular rota ve parametre yapısıyla günlüğe yazılır
+    SLOW_QUERY_THRESHOLD_MS = int(os.environ.get("SLOW_QUERY_THRESHOLD_MS", "200"))
+    # Cevaplara sorgu sayısı/süresini gösteren Server-Timing başlığı eklenir
+    SERVER_TIMING_ENABLED = os.environ.get("SERVER_TIMING_ENABLED", "True") == "True"
+    # Yöneticiler ?_profile=1 ile tek isteğin profilini çıkarabilir (bkz. app/profiling.py)
+    PROFILING_ENABLED = os.environ.get("PROFILING_ENABLED", "True") == "True"
+    PROFILE_TTL = int(os.environ.get("PROFILE_TTL", "3600"))
+    PROFILE_TOP_N = 60
+    # İstatistiksel örnekleyici: örnek aralığı (ms) ve en uzun çalışma süresi (sn)
+    SAMPLER_INTERVAL_MS = int(os.environ.get("SAMPLER_INTERVAL_MS", "10"))
+    SAMPLER_MAX_SECONDS = int(os.environ.get("SAMPLER_MAX_SECONDS", "300"))
     # ─────────────────────────── EKLEME SONU
 
     # ─────────────────────────── CORS
@@ -74,4 +136,16 @@ class Config:
             "https://api.flatnetsite.com",
         ],
     )
-    JWT_ACCESS_TOKEN_EXPIRES = False
+    # Mobil erişim token'ı kısa ömürlüdür; uygulama /api/v1/token/refresh ile yeniler.
+    # İptal listesi önbellekte tutulur (birden fazla işçi varsa CACHE_REDIS_URL gerekir).
+    JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=int(os.environ.get("JWT_ACCESS_TOKEN_MINUTES", "15")))
+    JWT_REFRESH_TOKEN_EXPIRES = timedelta(days=int(os.environ.get("JWT_REFRESH_TOKEN_DAYS", "30")))
+
+    # ─────────────────────────── Şifreler
+    # Yeni şifrelerin özet yöntemi/iş yükü (werkzeug biçimi, ör. "scrypt:32768:8:1" veya
+    # "pbkdf2:sha256:600000"). Farklı ayarla kaydedilmiş şifreler girişte yeniden özetlenir.
+    PASSWORD_HASH_METHOD = os.environ.get("PASSWORD_HASH_METHOD", "scrypt:32768:8:1")
+    # Girişte aynı anda çalışan doğrulama sayısı ve bekleyebilecek en fazla istek; fazlası 503 alır
+    PASSWORD_HASH_WORKERS = int(os.environ.get("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_PENDING = int(os.environ.get("PASSWORD_HASH_MAX_PENDING", "16"))
+    PASSWORD_HASH_TIMEOUT = 10